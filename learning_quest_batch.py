@@ -0,0 +1,329 @@
+"""
+Learning Quest - Batch Simulator
+
+Runs many independent Learning Quest sessions at once with NumPy so the level
+thresholds, penalties and timer in GameRules can be tuned against simulated
+play. Every session is one row in a set of parallel arrays (positions, scores,
+levels, timers, obstacles and collectibles), and every rule is applied to all
+rows at once instead of looping over GameEngine one session at a time.
+
+The simulated player is simple but plausible: every second they either answer
+a question (correct with a given accuracy) or take a few steps, mostly towards
+the nearest coin.
+
+Usage:
+    python learning_quest_batch.py --sessions 100000 --accuracy 0.7
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from learning_quest_engine import GameRules
+
+# Random candidates drawn per entity when a level is generated
+PLACEMENT_CANDIDATES = 4
+
+# Random candidates drawn for a replacement coin. GameEngine searches the whole area when its
+# random tries fail; with this many, a coin is only missing when almost no room is left
+RESPAWN_CANDIDATES = 20
+
+
+class BatchSimulator:
+    """
+    Simulates N Learning Quest sessions in parallel arrays.
+
+    The rules follow GameEngine: the same collision boxes, spawn areas,
+    scoring and level goals, with one simulation step per second of game time.
+    """
+
+    def __init__(self, sessions, rules=None, seed=None, accuracy=0.7,
+                 question_rate=0.25, moves_per_second=3, skill=0.8):
+        """Create the arrays for the given number of sessions"""
+        self.sessions = sessions
+        self.rules = rules or GameRules()
+        self.rng = np.random.default_rng(seed)
+
+        # Player model
+        self.accuracy = accuracy
+        self.question_rate = question_rate
+        self.moves_per_second = moves_per_second
+        self.skill = skill
+
+        rules = self.rules
+        self.max_obstacles = rules.base_obstacles + rules.max_level * rules.obstacles_per_level
+        self.max_collectibles = rules.num_collectibles
+
+        # Session state
+        self.position = np.tile(np.array(rules.start_position, dtype=np.int32), (sessions, 1))
+        self.score = np.zeros(sessions, dtype=np.int32)
+        self.level = np.ones(sessions, dtype=np.int32)
+        self.time_remaining = np.full(sessions, rules.start_time, dtype=np.int32)
+        self.active = np.ones(sessions, dtype=bool)
+        self.won = np.zeros(sessions, dtype=bool)
+        self.seconds_played = np.zeros(sessions, dtype=np.int32)
+        # Game time at which each level was finished (-1 if never)
+        self.level_finished = np.full((sessions, rules.max_level), -1, dtype=np.int32)
+
+        # Entities: positions plus an "alive" mask per slot
+        self.obstacles = np.zeros((sessions, self.max_obstacles, 2), dtype=np.int32)
+        self.obstacle_alive = np.zeros((sessions, self.max_obstacles), dtype=bool)
+        self.collectibles = np.zeros((sessions, self.max_collectibles, 2), dtype=np.int32)
+        self.collectible_alive = np.zeros((sessions, self.max_collectibles), dtype=bool)
+
+        self.generate_levels(np.ones(sessions, dtype=bool))
+
+    def random_points(self, shape, area):
+        """Random integer points inside an (left, top, right, bottom) area"""
+        left, top, right, bottom = area
+        x = self.rng.integers(left, right + 1, size=shape)
+        y = self.rng.integers(top, bottom + 1, size=shape)
+        return np.stack([x, y], axis=-1).astype(np.int32)
+
+    def pick_points(self, candidates, valid, counts):
+        """
+        The first counts[i] valid candidates of every row, as (points, alive).
+
+        GameEngine always places the full count (see learning_quest_placement);
+        drawing several candidates per slot gets the same counts here without
+        the spacing rules.
+        """
+        slots = candidates.shape[1] // PLACEMENT_CANDIDATES
+        keep = valid & (np.cumsum(valid, axis=1) <= counts[:, None])
+        # Move the kept candidates to the front of each row
+        order = np.argsort(~keep, axis=1, kind="stable")[:, :slots]
+        points = np.take_along_axis(candidates, order[:, :, None], axis=1)
+        return points, np.take_along_axis(keep, order, axis=1)
+
+    def clear_of_obstacles(self, rows, points):
+        """For points of shape (len(rows), K, 2), check that none overlaps an obstacle"""
+        obstacles = self.obstacles[rows]
+        dx = np.abs(points[:, :, None, 0] - obstacles[:, None, :, 0])
+        dy = np.abs(points[:, :, None, 1] - obstacles[:, None, :, 1])
+        overlap = (dx < 50) & (dy < 50) & self.obstacle_alive[rows][:, None, :]
+        return ~overlap.any(axis=2)
+
+    def generate_levels(self, mask):
+        """Generate new obstacles and collectibles for the sessions in mask"""
+        rows = np.flatnonzero(mask)
+        if rows.size == 0:
+            return
+        rules = self.rules
+
+        # Obstacles: more per level, never too close to the start position
+        candidates = self.random_points((rows.size, self.max_obstacles * PLACEMENT_CANDIDATES),
+                                        rules.obstacle_area)
+        counts = rules.base_obstacles + self.level[rows] * rules.obstacles_per_level
+        start_x, start_y = rules.start_position
+        away_from_start = ((np.abs(candidates[:, :, 0] - start_x) > 60) |
+                           (np.abs(candidates[:, :, 1] - start_y) > 60))
+        self.obstacles[rows], self.obstacle_alive[rows] = self.pick_points(candidates, away_from_start, counts)
+
+        # Collectibles: never inside an obstacle
+        candidates = self.random_points((rows.size, self.max_collectibles * PLACEMENT_CANDIDATES),
+                                        rules.collectible_area)
+        counts = np.full(rows.size, rules.num_collectibles)
+        self.collectibles[rows], self.collectible_alive[rows] = self.pick_points(
+            candidates, self.clear_of_obstacles(rows, candidates), counts)
+
+    def choose_moves(self, rows):
+        """Pick a move (dx, dy) for each session in rows"""
+        position = self.position[rows]
+
+        # Random direction for the unskilled moves
+        directions = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)], dtype=np.int32)
+        moves = directions[self.rng.integers(0, 4, size=rows.size)]
+
+        # Skilled moves head along the larger axis towards the nearest coin
+        coin_centers = self.collectibles[rows] + 15
+        delta = coin_centers - position[:, None, :]
+        distance = np.abs(delta).sum(axis=2)
+        distance = np.where(self.collectible_alive[rows], distance, np.iinfo(np.int32).max)
+        nearest = distance.argmin(axis=1)
+        has_coin = self.collectible_alive[rows].any(axis=1)
+        target = delta[np.arange(rows.size), nearest]
+
+        horizontal = np.abs(target[:, 0]) >= np.abs(target[:, 1])
+        towards = np.zeros_like(moves)
+        towards[:, 0] = np.where(horizontal, np.sign(target[:, 0]), 0)
+        towards[:, 1] = np.where(horizontal, 0, np.sign(target[:, 1]))
+
+        skilled = has_coin & (self.rng.random(rows.size) < self.skill)
+        return np.where(skilled[:, None], towards, moves)
+
+    def move(self, rows):
+        """Move the sessions in rows one step and apply collisions"""
+        rules = self.rules
+        left, top, right, bottom = rules.bounds
+        position = self.position[rows] + self.choose_moves(rows) * rules.step_size
+        position[:, 0] = np.clip(position[:, 0], left, right)
+        position[:, 1] = np.clip(position[:, 1], top, bottom)
+        self.position[rows] = position
+        index = np.arange(rows.size)
+
+        # Obstacle collisions: the first obstacle hit costs points and disappears
+        obstacles = self.obstacles[rows]
+        hit = ((np.abs(position[:, None, 0] - (obstacles[:, :, 0] + 20)) < 35) &
+               (np.abs(position[:, None, 1] - (obstacles[:, :, 1] + 20)) < 35) &
+               self.obstacle_alive[rows])
+        any_hit = hit.any(axis=1)
+        first_hit = hit.argmax(axis=1)
+        hit_rows = rows[any_hit]
+        self.score[hit_rows] = np.maximum(0, self.score[hit_rows] - rules.obstacle_penalty)
+        self.obstacle_alive[hit_rows, first_hit[any_hit]] = False
+
+        # Collectible collisions: the first coin touched gives points and is replaced
+        collectibles = self.collectibles[rows]
+        touch = ((np.abs(position[:, None, 0] - (collectibles[:, :, 0] + 15)) < 30) &
+                 (np.abs(position[:, None, 1] - (collectibles[:, :, 1] + 15)) < 30) &
+                 self.collectible_alive[rows])
+        any_touch = touch.any(axis=1)
+        if not any_touch.any():
+            return
+        slot = touch.argmax(axis=1)[any_touch]
+        touch_rows = rows[any_touch]
+        self.score[touch_rows] += rules.coin_points
+        self.collectible_alive[touch_rows, slot] = False
+
+        # The first free one of several random spots for the replacement coin
+        candidates = self.random_points((touch_rows.size, RESPAWN_CANDIDATES), rules.collectible_area)
+        valid = self.clear_of_obstacles(touch_rows, candidates)
+        valid &= np.abs(candidates[:, :, 0] - position[index[any_touch], None, 0]) > 40
+        found = valid.any(axis=1)
+        first_valid = valid.argmax(axis=1)
+        placed_rows = touch_rows[found]
+        self.collectibles[placed_rows, slot[found]] = candidates[found, first_valid[found]]
+        self.collectible_alive[placed_rows, slot[found]] = True
+
+    def answer_questions(self, rows):
+        """Let the sessions in rows answer one question each"""
+        rules = self.rules
+        correct = self.rng.random(rows.size) < self.accuracy
+
+        right_rows = rows[correct]
+        self.score[right_rows] += rules.correct_points
+        wrong_rows = rows[~correct]
+        self.score[wrong_rows] = np.maximum(0, self.score[wrong_rows] - rules.wrong_penalty)
+
+        # Only a correct answer can advance the level
+        advancing = right_rows[self.score[right_rows] >= self.level[right_rows] * rules.points_per_level]
+        if advancing.size == 0:
+            return
+        self.level_finished[advancing, self.level[advancing] - 1] = self.seconds_played[advancing]
+
+        finished = advancing[self.level[advancing] >= rules.max_level]
+        self.active[finished] = False
+        self.won[finished] = True
+
+        leveling = advancing[self.level[advancing] < rules.max_level]
+        self.level[leveling] += 1
+        self.time_remaining[leveling] += rules.level_bonus_time
+        mask = np.zeros(self.sessions, dtype=bool)
+        mask[leveling] = True
+        self.generate_levels(mask)
+
+    def tick(self):
+        """Let one second of game time pass for every active session"""
+        active = np.flatnonzero(self.active)
+        running = active[self.time_remaining[active] > 0]
+        self.time_remaining[running] -= 1
+        self.seconds_played[running] += 1
+        self.active[active[self.time_remaining[active] <= 0]] = False
+
+    def run(self):
+        """Simulate until every session has ended"""
+        while self.active.any():
+            # Like the game, the timer ticks as soon as the session starts
+            self.tick()
+            rows = np.flatnonzero(self.active)
+            if rows.size == 0:
+                break
+
+            asking = self.rng.random(rows.size) < self.question_rate
+            self.answer_questions(rows[asking])
+
+            moving = rows[~asking & self.active[rows]]
+            for _ in range(self.moves_per_second):
+                if moving.size:
+                    self.move(moving)
+        return self.report()
+
+    def report(self):
+        """Summarize win rate, scores and level completion times"""
+        report = {
+            "sessions": int(self.sessions),
+            "win_rate": float(self.won.mean()),
+            "mean_score": float(self.score.mean()),
+            "score_percentiles": {
+                str(p): float(v) for p, v in zip((10, 25, 50, 75, 90),
+                                                 np.percentile(self.score, (10, 25, 50, 75, 90)))
+            },
+            "final_level_counts": {
+                str(level): int((self.level == level).sum())
+                for level in range(1, self.rules.max_level + 1)
+            },
+            "level_completion_seconds": {},
+        }
+        for level in range(1, self.rules.max_level + 1):
+            times = self.level_finished[:, level - 1]
+            times = times[times >= 0]
+            report["level_completion_seconds"][str(level)] = {
+                "completed": int(times.size),
+                "median": float(np.median(times)) if times.size else None,
+            }
+        return report
+
+
+def score_histogram(scores, bins=10, width=40):
+    """Return a small text histogram of the final scores"""
+    counts, edges = np.histogram(scores, bins=bins)
+    peak = max(int(counts.max()), 1)
+    lines = []
+    for count, low, high in zip(counts, edges[:-1], edges[1:]):
+        bar = "#" * int(width * count / peak)
+        lines.append(f"{int(low):5d}-{int(high):<5d} {int(count):8d} {bar}")
+    return "\n".join(lines)
+
+
+def main():
+    """Run a batch simulation from the command line and print the results"""
+    parser = argparse.ArgumentParser(description="Simulate many Learning Quest sessions with NumPy")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--accuracy", type=float, default=0.7, help="chance of answering correctly")
+    parser.add_argument("--question-rate", type=float, default=0.25, help="chance per second of answering a question")
+    parser.add_argument("--skill", type=float, default=0.8, help="chance a move heads for the nearest coin")
+    parser.add_argument("--points-per-level", type=int, default=50)
+    parser.add_argument("--obstacle-penalty", type=int, default=5)
+    parser.add_argument("--wrong-penalty", type=int, default=10)
+    parser.add_argument("--start-time", type=int, default=60)
+    parser.add_argument("--level-bonus-time", type=int, default=30)
+    args = parser.parse_args()
+
+    rules = GameRules(points_per_level=args.points_per_level,
+                      obstacle_penalty=args.obstacle_penalty,
+                      wrong_penalty=args.wrong_penalty,
+                      start_time=args.start_time,
+                      level_bonus_time=args.level_bonus_time)
+    simulator = BatchSimulator(args.sessions, rules=rules, seed=args.seed, accuracy=args.accuracy,
+                               question_rate=args.question_rate, skill=args.skill)
+
+    start = time.perf_counter()
+    report = simulator.run()
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulated {report['sessions']} sessions in {elapsed:.2f}s")
+    print(f"Win rate: {report['win_rate']:.1%}")
+    print(f"Mean score: {report['mean_score']:.1f}")
+    print("Score percentiles: " + ", ".join(f"p{p}={v:.0f}" for p, v in report["score_percentiles"].items()))
+    print("Final level: " + ", ".join(f"L{l}={c}" for l, c in report["final_level_counts"].items()))
+    for level, stats in report["level_completion_seconds"].items():
+        print(f"Level {level} completed by {stats['completed']} sessions, "
+              f"median {stats['median']}s since the game started")
+    print()
+    print(score_histogram(simulator.score))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Learning Quest - Benchmarks
+
+Times the hot paths of the game without a player: drawing a frame at
+different entity counts, collision checks, obstacle and collectible
+generation, loading high scores from score files of 1k to 1M lines and
+building the question dialog.
+
+Drawing uses a stand-in canvas by default so the suite runs on machines
+without a display; --tk draws on a real tkinter canvas instead (use Xvfb on
+a headless machine) and first checks the sprite images pixel by pixel (any
+wrong pixel stops the run with exit status 1). The question dialog always
+needs Tk and is skipped when there is no display. Every benchmark uses the
+same random seed, so runs are comparable.
+
+Results can be saved as a baseline and later runs are compared against it:
+a benchmark that got slower than the tolerance allows is reported as a
+regression and the exit status is 1.
+
+Usage:
+    python learning_quest_benchmark.py --save-baseline
+    python learning_quest_benchmark.py --quick
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from learning_quest_engine import GameEngine, GameRules
+from learning_quest_profiler import Profiler
+from learning_quest_scene import SceneLayer, ToastOverlay
+from learning_quest_scores import ScoreStore, parse_score_line
+from learning_quest_sprites import SPRITE_THEMES, SpriteCache, render_sprite
+
+BASELINE_FILE = "learning_quest_benchmarks.json"
+BENCHMARK_SEED = 2025
+
+
+class StubCanvas:
+    """The part of the tkinter Canvas API the game uses, doing only the bookkeeping"""
+
+    def __init__(self):
+        self.items = {}
+        self.next_item = 1
+
+    def create_item(self, coords, options):
+        item = self.next_item
+        self.next_item += 1
+        self.items[item] = [list(coords), options]
+        return item
+
+    def create_text(self, *coords, **options):
+        return self.create_item(coords, options)
+
+    create_rectangle = create_oval = create_image = create_line = create_text
+
+    def move(self, item, dx, dy):
+        coords = self.items[item][0]
+        self.items[item][0] = [value + (dx if i % 2 == 0 else dy) for i, value in enumerate(coords)]
+
+    def coords(self, item, *coords):
+        if coords:
+            self.items[item][0] = list(coords)
+        return self.items[item][0]
+
+    def itemconfig(self, item, **options):
+        self.items[item][1].update(options)
+
+    def delete(self, item):
+        if item == "all":
+            self.items.clear()
+        else:
+            self.items.pop(item, None)
+
+    def tag_raise(self, tag):
+        pass
+
+    def config(self, **options):
+        pass
+
+    def find_all(self):
+        return tuple(self.items)
+
+
+class StubSprites(SpriteCache):
+    """A SpriteCache that renders the pixels but makes no Tk images"""
+
+    def create_image(self, width, height, pixels=None):
+        return (width, height)
+
+    def copy_image(self, target, source):
+        pass
+
+
+class StubRoot:
+    """Stands in for the Tk root when drawing on a StubCanvas"""
+
+    def after_idle(self, callback):
+        callback()
+
+
+def time_calls(function, repeat, number=1, setup=None):
+    """
+    Time `repeat` runs of `number` calls and return the mean time per call of each run (ms).
+
+    setup (if given) runs before every call and is not timed. The garbage
+    collector is off while timing, like in timeit, so runs are comparable.
+    """
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            total = 0.0
+            for _ in range(number):
+                if setup is not None:
+                    setup()
+                start = time.perf_counter()
+                function()
+                total += time.perf_counter() - start
+            timings.append(total / number * 1000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return timings
+
+
+def entity_rules(count):
+    """Rules for a game with about `count` obstacles and `count` collectibles"""
+    return GameRules(base_obstacles=count, obstacles_per_level=0, num_collectibles=count)
+
+
+def game_view(engine, canvas, root):
+    """A LearningQuestGame that only has what draw_game needs (no window is opened)"""
+    from learning_quest_final_project import LearningQuestGame
+
+    game = LearningQuestGame.__new__(LearningQuestGame)
+    game.root = root
+    game.canvas = canvas
+    game.engine = engine
+    game.profiler = Profiler()
+    game.show_profiler = False
+    game.scene = SceneLayer(canvas, layers=("obstacles", "collectibles", "character", "hud", "toasts",
+                                            "profiler"))
+    game.toasts = ToastOverlay(game.scene)
+    game.sprites = StubSprites() if isinstance(root, StubRoot) else SpriteCache(root)
+    return game
+
+
+def bench_draw_game(results, counts, repeat, tk_root=None):
+    """Time the first (building) frame and a frame after one move at each entity count"""
+    for count in counts:
+        engine = GameEngine(rules=entity_rules(count), seed=BENCHMARK_SEED)
+        engine.start()
+        if tk_root is not None:
+            import tkinter as tk
+            canvas = tk.Canvas(tk_root, width=800, height=450)
+            canvas.pack()
+            game = game_view(engine, canvas, tk_root)
+        else:
+            game = game_view(engine, StubCanvas(), StubRoot())
+
+        def reset():
+            game.canvas.delete("all")
+            game.scene.reset()
+
+        results[f"draw_game/first_frame/{count}"] = time_calls(game.draw_game, repeat, number=5, setup=reset)
+
+        moves = ["left", "right"]
+
+        def move_and_draw():
+            engine.step(moves[0])
+            moves.reverse()
+            game.draw_game()
+
+        game.draw_game()
+        results[f"draw_game/move_frame/{count}"] = time_calls(move_and_draw, repeat, number=50)
+
+        if tk_root is not None:
+            game.canvas.update()
+            game.canvas.destroy()
+
+
+def bench_collisions(results, counts, repeat):
+    """Time check_collisions with many entities around"""
+    for count in counts:
+        engine = GameEngine(rules=entity_rules(count), seed=BENCHMARK_SEED)
+        engine.start()
+        results[f"check_collisions/{count}"] = time_calls(engine.check_collisions, repeat, number=1000)
+
+
+def bench_generation(results, counts, repeat):
+    """Time generating the obstacles and collectibles of a level"""
+    for count in counts:
+        engine = GameEngine(rules=entity_rules(count), seed=BENCHMARK_SEED)
+        engine.start()
+
+        # Reseed before every call so each call places exactly the same entities
+        def reseed():
+            engine.random.seed(BENCHMARK_SEED)
+
+        results[f"generate_obstacles/{count}"] = time_calls(engine.generate_obstacles, repeat,
+                                                            number=5, setup=reseed)
+        results[f"generate_collectibles/{count}"] = time_calls(engine.generate_collectibles, repeat,
+                                                               number=5, setup=reseed)
+
+
+def write_score_file(path, lines, seed=BENCHMARK_SEED):
+    """Write a score file with the given number of random lines"""
+    rng = random.Random(seed)
+    with open(path, "w") as file:
+        for i in range(lines):
+            file.write(f"player{rng.randrange(1000)},{rng.randrange(400)},{rng.randint(1, 3)},"
+                       f"2025-06-{rng.randint(1, 30):02d} 12:00:{i % 60:02d}\n")
+
+
+def bench_scores(results, sizes, repeat):
+    """Time parsing score files and loading them into the high score database"""
+    with tempfile.TemporaryDirectory() as folder:
+        for lines in sizes:
+            path = os.path.join(folder, f"scores_{lines}.txt")
+            write_score_file(path, lines)
+
+            def parse():
+                with open(path) as file:
+                    for line in file:
+                        parse_score_line(line)
+
+            results[f"parse_scores/{lines}"] = time_calls(parse, repeat)
+
+            def load_high_scores():
+                # What the high score window needs: import the file, count it and read the first page
+                database = os.path.join(folder, "scores.db")
+                if os.path.exists(database):
+                    os.remove(database)
+                store = ScoreStore(database)
+                try:
+                    store.import_csv(path)
+                    store.count()
+                    store.page(0, 50)
+                finally:
+                    store.close()
+
+            results[f"load_high_scores/{lines}"] = time_calls(load_high_scores, repeat)
+
+
+def bench_question_dialog(results, repeat, tk_root):
+    """Time building the question dialog and showing a question in it"""
+    from learning_quest_dialogs import QuestionDialog
+    from learning_quest_questions import QUESTIONS
+
+    dialogs = []
+
+    def build():
+        dialogs.append(QuestionDialog(tk_root, lambda choice: None, lambda: None))
+
+    results["question_dialog/build"] = time_calls(build, repeat)
+
+    dialog = dialogs[-1]
+
+    def show():
+        dialog.show(1, QUESTIONS[1][0])
+        dialog.window.update_idletasks()
+        dialog.hide()
+
+    results["question_dialog/show"] = time_calls(show, repeat)
+
+    for dialog in dialogs:
+        dialog.window.destroy()
+
+
+def check_sprites(tk_root):
+    """
+    Check that the Tk sprite images show the rendered pixels: the colors
+    put() wrote, the pixels made transparent and the live images after
+    every theme change (copied with -compositingrule set). Returns the
+    number of wrong pixels.
+    """
+    sprites = SpriteCache(tk_root)
+    wrong = 0
+    # Every theme, then the first one again from the cache
+    for theme in list(SPRITE_THEMES) + [1]:
+        sprites.use_theme(theme)
+        for kind, image in sprites.live.items():
+            for y, row in enumerate(render_sprite(kind, theme)):
+                for x, color in enumerate(row):
+                    transparent = image.tk.getboolean(image.tk.call(image.name, "transparency", "get", x, y))
+                    if color is None:
+                        wrong += not transparent
+                        continue
+                    shown = tuple(int(value) for value in image.tk.splitlist(image.tk.call(image.name, "get", x, y)))
+                    expected = tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+                    wrong += transparent or shown[:3] != expected
+    return wrong
+
+
+def summarize(timings):
+    """Median, minimum and maximum of a list of timings"""
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "max_ms": max(timings),
+        "runs": len(timings),
+    }
+
+
+def run_benchmarks(quick=False, use_tk=False):
+    """Run the whole suite and return {benchmark name: summary}"""
+    repeat = 5 if quick else 20
+    counts = (10, 100, 1000) if quick else (10, 100, 1000, 5000)
+    sizes = (1000, 10000) if quick else (1000, 10000, 100000, 1000000)
+
+    # Tk is only needed for --tk drawing and the question dialog
+    tk_root = None
+    try:
+        import tkinter as tk
+        tk_root = tk.Tk()
+        tk_root.withdraw()
+    except Exception as e:  # No display (or no tkinter at all)
+        print(f"Tk is not available, skipping the Tk benchmarks: {e}", file=sys.stderr)
+
+    results = {}
+    try:
+        if use_tk and tk_root is not None:
+            wrong = check_sprites(tk_root)
+            if wrong:
+                # Timing the drawing of wrong images tells nothing: fail like a regression does
+                sys.exit(f"Sprite images: {wrong} wrong pixels")
+            print("Sprite images: OK")
+        bench_draw_game(results, counts, repeat, tk_root if use_tk else None)
+        bench_collisions(results, counts, repeat)
+        bench_generation(results, counts, repeat)
+        bench_scores(results, sizes, 3 if len(sizes) > 2 else repeat)
+        if tk_root is not None:
+            bench_question_dialog(results, repeat, tk_root)
+    finally:
+        if tk_root is not None:
+            tk_root.destroy()
+
+    return {name: summarize(timings) for name, timings in results.items()}
+
+
+def load_baseline(path=BASELINE_FILE):
+    """The saved baseline results (an empty dict if there are none)"""
+    try:
+        with open(path) as file:
+            return json.load(file).get("results", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    """Save results as the baseline, with the machine they were measured on"""
+    with open(path, "w") as file:
+        json.dump({
+            "saved": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "results": results,
+        }, file, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, tolerance):
+    """Print every result next to its baseline and return the names that regressed"""
+    regressions = []
+    for name, summary in results.items():
+        line = f"{name:<34} {summary['median_ms']:10.3f} ms"
+        previous = baseline.get(name)
+        if previous:
+            ratio = summary["median_ms"] / max(previous["median_ms"], 1e-6)
+            line += f"   baseline {previous['median_ms']:10.3f} ms   x{ratio:.2f}"
+            if ratio > tolerance:
+                line += "   REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    """Run the benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of Learning Quest")
+    parser.add_argument("--quick", action="store_true", help="fewer runs and smaller sizes")
+    parser.add_argument("--tk", action="store_true", help="draw on a real Tk canvas (needs a display or Xvfb)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="save these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowdown against the baseline that counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(quick=args.quick, use_tk=args.tk)
+    regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} benchmark(s) slower than x{args.tolerance} of the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Learning Quest - Dialogs
+
+The question dialog is built once and then only hidden (withdraw) and shown
+again (deiconify) with new text in its existing widgets, instead of building
+and destroying a whole Toplevel for every question. The time from the click on
+"Answer Question" until the dialog is on screen is recorded for every show.
+"""
+
+import time
+import tkinter as tk
+
+
+class QuestionDialog:
+    """
+    A persistent multiple choice question window.
+
+    on_submit(choice) is called with the selected option (-1 if none) and
+    on_skip() when the player presses Skip or closes the window.
+    """
+
+    def __init__(self, root, on_submit, on_skip, max_options=4):
+        """Build the dialog once and keep it hidden"""
+        self.root = root
+        self.on_submit = on_submit
+        self.on_skip = on_skip
+
+        # Click-to-visible latency instrumentation
+        self.shown_at = None
+        self.latencies = []
+
+        self.window = tk.Toplevel(root)
+        self.window.withdraw()
+        self.window.geometry("600x400")
+        self.window.resizable(False, False)
+        self.window.configure(bg="#ecf0f1")
+        self.window.transient(root)
+        self.window.protocol("WM_DELETE_WINDOW", self.on_skip)
+        self.window.bind("<Map>", self.on_map)
+
+        # Question header
+        header_frame = tk.Frame(self.window, bg="#3498db", height=60)
+        header_frame.pack(fill=tk.X)
+        header_frame.pack_propagate(False)
+
+        self.header_label = tk.Label(header_frame, text="",
+                                   font=("Arial", 18, "bold"), bg="#3498db", fg="white")
+        self.header_label.pack(pady=15)
+
+        # Question label
+        question_frame = tk.Frame(self.window, bg="#ecf0f1")
+        question_frame.pack(fill=tk.X, padx=20, pady=20)
+
+        self.question_label = tk.Label(question_frame, text="",
+                                     wraplength=550, font=("Arial", 16), bg="#ecf0f1",
+                                     justify=tk.CENTER)
+        self.question_label.pack()
+
+        # Answer frame
+        answer_frame = tk.Frame(self.window, bg="#ecf0f1")
+        answer_frame.pack(pady=10, fill=tk.X, padx=40)
+
+        # Variable to store the selected answer
+        self.selected_answer = tk.IntVar()
+        self.selected_answer.set(-1)  # Default: no selection
+
+        # Radio buttons for the options (unused ones are hidden)
+        self.radio_frames = []
+        self.radios = []
+        for i in range(max_options):
+            radio_frame = tk.Frame(answer_frame, bg="#ffffff", relief=tk.RAISED, bd=1)
+            radio_frame.pack(fill=tk.X, pady=5)
+
+            radio = tk.Radiobutton(radio_frame, text="",
+                                 variable=self.selected_answer, value=i,
+                                 font=("Arial", 12), bg="#ffffff",
+                                 padx=10, pady=8, anchor=tk.W)
+            radio.pack(fill=tk.X)
+            self.radio_frames.append(radio_frame)
+            self.radios.append(radio)
+        self.visible_options = max_options
+
+        # Button frame
+        button_frame = tk.Frame(self.window, bg="#ecf0f1")
+        button_frame.pack(pady=20)
+
+        # Submit button
+        submit_button = tk.Button(button_frame, text="✅ Submit Answer",
+                                command=lambda: self.on_submit(self.selected_answer.get()),
+                                font=("Arial", 14, "bold"),
+                                bg="#2ecc71", fg="white", padx=20, pady=10)
+        submit_button.pack(side=tk.LEFT, padx=10)
+
+        # Skip button
+        skip_button = tk.Button(button_frame, text="⏭️ Skip",
+                              command=self.on_skip, font=("Arial", 14, "bold"),
+                              bg="#95a5a6", fg="white", padx=20, pady=10)
+        skip_button.pack(side=tk.LEFT, padx=10)
+
+    def show(self, level, question_data, clicked_at=None):
+        """Fill in a new question and show the dialog"""
+        self.shown_at = clicked_at if clicked_at is not None else time.perf_counter()
+
+        self.window.title(f"🧠 Level {level} Question")
+        self.header_label.config(text=f"🎯 Level {level} Challenge")
+        self.question_label.config(text=question_data["question"])
+        self.selected_answer.set(-1)
+
+        options = question_data["options"]
+        for i, radio in enumerate(self.radios):
+            if i < len(options):
+                radio.config(text=f"{chr(65+i)}. {options[i]}")
+
+        # Show only as many option rows as the question has (hidden rows are always the last ones)
+        for i in range(self.visible_options, len(options)):
+            self.radio_frames[i].pack(fill=tk.X, pady=5)
+        for i in range(len(options), self.visible_options):
+            self.radio_frames[i].pack_forget()
+        self.visible_options = len(options)
+
+        self.window.deiconify()
+        self.window.lift()
+
+    def hide(self):
+        """Hide the dialog until the next question"""
+        self.window.grab_release()
+        self.window.withdraw()
+
+    def is_visible(self):
+        """Check if the dialog is currently shown"""
+        return self.window.winfo_viewable()
+
+    def on_map(self, event):
+        """The dialog appeared on screen: take the grab and record the latency"""
+        if event.widget is not self.window:
+            return
+        try:
+            self.window.grab_set()
+        except tk.TclError:
+            pass  # Another window holds the grab
+
+        if self.shown_at is not None:
+            self.latencies.append(time.perf_counter() - self.shown_at)
+            self.shown_at = None
+
+    def latency_summary(self):
+        """Count, last, mean and worst click-to-visible latency in milliseconds"""
+        if not self.latencies:
+            return {"count": 0}
+        return {
+            "count": len(self.latencies),
+            "last_ms": self.latencies[-1] * 1000,
+            "mean_ms": sum(self.latencies) / len(self.latencies) * 1000,
+            "max_ms": max(self.latencies) * 1000,
+        }
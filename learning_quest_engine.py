@@ -0,0 +1,581 @@
+"""
+Learning Quest - Game Engine
+
+All the game rules of Learning Quest without any tkinter code: score, level,
+timer, obstacles, collectibles and question scoring. The tkinter window in
+learning_quest_final_project.py is only a view over this engine, so the rules
+can also run headless (for simulations, profiling and tests on machines
+without a display).
+
+Everything happens through GameEngine.step(action), which returns a list of
+events that describe what happened so a view can react to them:
+
+    ("obstacle_hit", penalty)
+    ("collected", points)
+    ("question", question_data)
+    ("correct", points)
+    ("wrong", penalty, correct_option)
+    ("level_up", new_level)
+    ("victory", score)
+    ("time_up", score)
+"""
+
+import random
+
+from learning_quest_entities import EntityStore
+from learning_quest_placement import find_spot, scatter
+from learning_quest_profiler import NullProfiler
+from learning_quest_questions import QuestionBank, QuestionSampler
+
+# Character movement for each direction action
+MOVES = {
+    "left": (-1, 0),
+    "right": (1, 0),
+    "up": (0, -1),
+    "down": (0, 1),
+}
+
+
+class GameRules:
+    """
+    The numbers that define how the game plays: points, penalties, level
+    goals, timer and how many entities are spawned. Tuning tools can pass a
+    modified copy to the engine.
+    """
+
+    def __init__(self, **overrides):
+        """Create the default rules, replacing any value given as a keyword"""
+        # Scoring
+        self.coin_points = 10
+        self.obstacle_penalty = 5
+        self.correct_points = 20
+        self.wrong_penalty = 10
+
+        # Levels: reach level * points_per_level to advance
+        self.points_per_level = 50
+        self.max_level = 3
+
+        # Timer in seconds
+        self.start_time = 60
+        self.level_bonus_time = 30
+
+        # Entities
+        self.base_obstacles = 2
+        self.obstacles_per_level = 2
+        self.num_collectibles = 6
+        # Smallest distance between two obstacles or two collectibles when a level is generated
+        self.obstacle_spacing = 60
+        self.collectible_spacing = 45
+
+        # Movement and playfield as (left, top, right, bottom)
+        self.step_size = 25
+        self.start_position = (400, 400)
+        self.bounds = (20, 90, 780, 400)
+        self.obstacle_area = (50, 100, 710, 350)
+        self.collectible_area = (50, 100, 720, 350)
+
+        # World of (columns, rows) chunks of chunk_size pixels; every chunk gets the obstacles
+        # and collectibles of a whole playfield. (1, 1) is the classic single-screen game.
+        self.world_chunks = (1, 1)
+        self.chunk_size = (800, 450)
+
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Unknown game rule: {name}")
+            setattr(self, name, value)
+
+    def target_score(self, level):
+        """Score needed to finish the given level"""
+        return level * self.points_per_level
+
+    def is_large_world(self):
+        """Check if the world is bigger than one screen (and generated chunk by chunk)"""
+        return tuple(self.world_chunks) != (1, 1)
+
+    def world_size(self):
+        """Width and height of the whole world in pixels"""
+        columns, rows = self.world_chunks
+        chunk_width, chunk_height = self.chunk_size
+        return columns * chunk_width, rows * chunk_height
+
+    def world_bounds(self):
+        """Where the character can go in the whole world as (left, top, right, bottom)"""
+        columns, rows = self.world_chunks
+        chunk_width, chunk_height = self.chunk_size
+        left, top, right, bottom = self.bounds
+        return left, top, right + (columns - 1) * chunk_width, bottom + (rows - 1) * chunk_height
+
+
+class PreparedLevel:
+    """The obstacles and collectibles of a level, built by an executor (e.g. a thread pool)"""
+
+    def __init__(self, build, level, executor):
+        """Start building the layout of a level with build(level)"""
+        self.level = level
+        self.future = executor.submit(build, level)
+
+    def result(self):
+        """
+        The layout if it is ready, or None (if it is not ready yet or building it failed).
+
+        Never waits: the executor may be busy with the levels of other games, so
+        laying the level out right away is quicker than waiting for its turn.
+        """
+        if not self.future.done():
+            self.future.cancel()
+            return None
+        try:
+            return self.future.result()
+        except Exception:
+            return None  # Built again on the engine's thread, where the error is raised
+
+    def cancel(self):
+        """Stop building the layout if it has not started yet"""
+        self.future.cancel()
+
+
+class GameEngine:
+    """
+    The complete state and rules of one Learning Quest session.
+
+    The engine never draws anything or opens dialogs; it only changes its
+    state and reports events, which makes it possible to run many sessions
+    without a display.
+    """
+
+    def __init__(self, rules=None, questions=None, seed=None):
+        """
+        Create a new engine (call start() to begin a game).
+
+        questions is a question bank (see learning_quest_questions) or a
+        {level: [question, ...]} dictionary; the built-in questions are used
+        if it is not given.
+        """
+        self.rules = rules or GameRules()
+        if questions is None or isinstance(questions, dict):
+            questions = QuestionBank(questions)
+        self.questions = questions
+        self.random = random.Random(seed)
+        # Questions are drawn without repeats from their own random numbers (seeded from the
+        # engine's), so that choosing questions differently never changes the world
+        self.sampler = QuestionSampler(questions, random.Random(self.random.getrandbits(64)))
+        # Optional adaptive scheduler (see learning_quest_mastery) that picks questions instead
+        self.scheduler = None
+
+        # Game state variables
+        self.score = 0
+        self.level = 1
+        self.time_remaining = self.rules.start_time
+        self.game_active = False
+        self.character_position = [400, 500]
+        self.achievements = []
+        self.current_question = None
+        self.current_slot = None
+
+        # Obstacle and collectible positions by entity id, with spatial indexes for fast lookups
+        self.obstacles = EntityStore()
+        self.collectibles = EntityStore()
+
+        # Every level (and every chunk of a large world) is laid out with its own random numbers,
+        # seeded from this, so a layout is the same whenever and wherever it is generated
+        self.layout_seed = None
+
+        # Chunks of a large world that have been generated for the current level
+        self.chunks = set()
+        self.current_chunk = None
+
+        # With a level_executor (a concurrent.futures executor, e.g. a thread pool), the next
+        # level is laid out there while the current one is played (from its first tick), so
+        # advancing only swaps it in
+        self.level_executor = None
+        self.prepared_level = None
+
+        # Section timings (see learning_quest_profiler); measures nothing unless replaced
+        self.profiler = NullProfiler()
+
+    def start(self):
+        """Start or restart the game"""
+        # Reset game state
+        self.score = 0
+        self.level = 1
+        self.time_remaining = self.rules.start_time
+        self.game_active = True
+        self.character_position = list(self.rules.start_position)
+        self.achievements = []
+        self.current_question = None
+        self.sampler.reset()
+        self.clear_obstacles()
+        self.clear_collectibles()
+
+        # Generate initial obstacles and collectibles
+        self.layout_seed = self.random.getrandbits(64)
+        self.drop_prepared_level()
+        with self.profiler.measure("generate_level"):
+            if self.rules.is_large_world():
+                self.reset_chunks()
+            else:
+                self.obstacles, self.collectibles = self.level_layout(self.level)
+        return []
+
+    def step(self, action):
+        """
+        Apply one action and return the list of events it caused.
+
+        Actions are "start" (start or restart the game), "left", "right", "up",
+        "down", "tick" (one second passes), "spawn" (top up the collectibles),
+        "ask" (draw a question), ("ask", index) (show a given question of the
+        current level, used by replays), ("answer", option_index) and "skip".
+        """
+        if action in MOVES:
+            return self.move(*MOVES[action])
+        if action == "tick":
+            return self.tick()
+        if action == "spawn":
+            return self.spawn()
+        if action == "ask":
+            return self.ask_question()
+        if action == "start":
+            return self.start()
+        if action == "skip":
+            return self.skip_question()
+        if isinstance(action, tuple) and action[0] == "answer":
+            return self.answer_question(action[1])
+        if isinstance(action, tuple) and action[0] == "ask":
+            return self.ask_question(action[1])
+        raise ValueError(f"Unknown action: {action!r}")
+
+    def target_score(self):
+        """Score needed to finish the current level"""
+        return self.rules.target_score(self.level)
+
+    def move(self, dx, dy):
+        """Move the character one step in a direction and check collisions"""
+        if not self.game_active:
+            return []
+
+        step = self.rules.step_size
+        left, top, right, bottom = self.rules.world_bounds()
+        x, y = self.character_position
+        self.character_position[0] = min(right, max(left, x + dx * step))
+        self.character_position[1] = min(bottom, max(top, y + dy * step))
+        if self.rules.is_large_world():
+            self.generate_nearby_chunks()
+        with self.profiler.measure("check_collisions"):
+            return self.check_collisions()
+
+    def check_collisions(self):
+        """Check if character collides with obstacles or collectibles"""
+        events = []
+        x, y = self.character_position
+
+        # Check obstacle collisions (only obstacles in the nearby cells can touch the character)
+        for obstacle_id, obstacle_x, obstacle_y in self.obstacles.query(x - 55, y - 55, x + 15, y + 15):
+            if (abs(x - (obstacle_x + 20)) < 35 and
+                abs(y - (obstacle_y + 20)) < 35):
+                # Collision with obstacle - lose points
+                self.score = max(0, self.score - self.rules.obstacle_penalty)
+                self.remove_obstacle(obstacle_id)
+                events.append(("obstacle_hit", self.rules.obstacle_penalty))
+                break
+
+        # Check collectible collisions
+        for collectible_id, collectible_x, collectible_y in self.collectibles.query(x - 45, y - 45, x + 15, y + 15):
+            if (abs(x - (collectible_x + 15)) < 30 and
+                abs(y - (collectible_y + 15)) < 30):
+                # Collected a point - gain points
+                self.score += self.rules.coin_points
+                self.remove_collectible(collectible_id)
+                events.append(("collected", self.rules.coin_points))
+
+                # Generate new collectible to replace the collected one
+                self.generate_new_collectible()
+                break
+
+        return events
+
+    def tick(self):
+        """Let one second of game time pass"""
+        if self.game_active and self.time_remaining > 0:
+            self.time_remaining -= 1
+            # Start on the next level during play, not while the view is busy with a level change
+            if self.prepared_level is None:
+                self.prepare_next_level()
+            return []
+        if self.game_active:
+            # Time's up
+            self.game_active = False
+            self.current_question = None
+            return [("time_up", self.score)]
+        return []
+
+    def spawn(self):
+        """Add a collectible if there are fewer than there should be (a respawn fails if there is no room)"""
+        if self.game_active and self.collectibles_near_character() < self.rules.num_collectibles:
+            self.generate_new_collectible()
+        return []
+
+    def ask_question(self, index=None):
+        """Pick a question for the current level that has not been answered yet (or the given one)"""
+        if not self.game_active:
+            return []
+
+        # Levels without questions fall back to the level 1 questions
+        level = self.level if self.questions.count(self.level) else 1
+        if index is not None:
+            self.current_question = self.questions.get(level, index)
+        elif self.scheduler is not None:
+            index, self.current_question = self.scheduler.draw(level)
+        else:
+            index, self.current_question = self.sampler.draw(level)
+        self.current_slot = (level, index)
+        return [("question", self.current_question)]
+
+    def skip_question(self):
+        """Drop the current question without gaining or losing points"""
+        if self.scheduler is not None and self.current_question is not None:
+            self.scheduler.defer(self.current_question)
+        self.current_question = None
+        return []
+
+    def answer_question(self, choice):
+        """Score the answer to the current question"""
+        question_data = self.current_question
+        if question_data is None or not self.game_active:
+            return []
+        self.current_question = None
+        self.sampler.mark_answered(question_data)
+
+        correct = choice == question_data["answer"]
+        if self.scheduler is not None:
+            level, index = self.current_slot
+            self.scheduler.record(level, index, question_data, correct)
+
+        if correct:
+            # Correct answer
+            self.score += self.rules.correct_points
+            events = [("correct", self.rules.correct_points)]
+
+            # Check if score is high enough to advance to next level
+            if self.score >= self.target_score():
+                events.extend(self.advance_level())
+            return events
+
+        # Incorrect answer
+        self.score = max(0, self.score - self.rules.wrong_penalty)
+        correct_option = question_data["options"][question_data["answer"]]
+        return [("wrong", self.rules.wrong_penalty, correct_option)]
+
+    def advance_level(self):
+        """Advance to the next level"""
+        if self.level < self.rules.max_level:
+            self.level += 1
+
+            # Bonus time for advancing
+            self.time_remaining += self.rules.level_bonus_time
+
+            # Generate new obstacles and collectibles
+            with self.profiler.measure("generate_level"):
+                if self.rules.is_large_world():
+                    self.clear_obstacles()
+                    self.clear_collectibles()
+                    self.reset_chunks()
+                else:
+                    self.obstacles, self.collectibles = self.next_layout()
+
+            # Achievement for reaching a new level
+            achievement = f"Reached Level {self.level}"
+            if achievement not in self.achievements:
+                self.achievements.append(achievement)
+            return [("level_up", self.level)]
+
+        # Player has completed all levels
+        self.game_active = False
+        return [("victory", self.score)]
+
+    def level_random(self, level, chunk=None):
+        """The random numbers that lay out a level (or one chunk of it in a large world)"""
+        if chunk is None:
+            return random.Random(f"{self.layout_seed}:{level}")
+        return random.Random(f"{self.layout_seed}:{level}:{chunk[0]}:{chunk[1]}")
+
+    def level_layout(self, level):
+        """
+        New (obstacles, collectibles) stores with the layout of a level.
+
+        Only reads the rules, so it can run on a background thread.
+        """
+        rng = self.level_random(level)
+        obstacles = EntityStore()
+        collectibles = EntityStore()
+        self.place_obstacles(obstacles, level, rng)
+        self.place_collectibles(collectibles, obstacles, rng)
+        return obstacles, collectibles
+
+    def prepare_next_level(self):
+        """Start laying out the next level in the background (if there is a level_executor)"""
+        if (self.level_executor is not None and self.level < self.rules.max_level
+                and not self.rules.is_large_world()):
+            self.prepared_level = PreparedLevel(self.level_layout, self.level + 1, self.level_executor)
+
+    def drop_prepared_level(self):
+        """Forget the level being prepared in the background (e.g. when the game ends for good)"""
+        if self.prepared_level is not None:
+            self.prepared_level.cancel()
+            self.prepared_level = None
+
+    def next_layout(self):
+        """The layout of the current level, prepared in the background if it is ready"""
+        prepared = self.prepared_level
+        self.prepared_level = None
+        if prepared is not None and prepared.level == self.level:
+            layout = prepared.result()
+            if layout is not None:
+                return layout
+        return self.level_layout(self.level)
+
+    def generate_obstacles(self):
+        """Generate random obstacles based on the current level"""
+        self.clear_obstacles()
+        self.place_obstacles(self.obstacles, self.level, self.random)
+
+    def generate_collectibles(self):
+        """Generate random collectibles (bonus points)"""
+        self.clear_collectibles()
+        self.place_collectibles(self.collectibles, self.obstacles, self.random)
+
+    def place_obstacles(self, obstacles, level, rng, chunk=(0, 0)):
+        """Add the obstacles of a level in one chunk (the whole playfield in the classic game)"""
+        # More obstacles as level increases
+        num_obstacles = self.rules.base_obstacles + level * self.rules.obstacles_per_level
+        area = self.chunk_area(self.rules.obstacle_area, chunk)
+        start_x, start_y = self.rules.start_position
+
+        # Make sure obstacles don't spawn too close to character start
+        def allowed(x, y):
+            return abs(x - start_x) > 60 or abs(y - start_y) > 60
+
+        for x, y in scatter(rng, area, num_obstacles, self.rules.obstacle_spacing, allowed):
+            obstacles.add(x, y)
+
+    def place_collectibles(self, collectibles, obstacles, rng, chunk=(0, 0)):
+        """Add the collectibles of one chunk (the whole playfield in the classic game)"""
+        area = self.chunk_area(self.rules.collectible_area, chunk)
+
+        # Make sure collectibles don't spawn inside obstacles
+        def allowed(x, y):
+            return self.is_clear_of_obstacles(x, y, obstacles)
+
+        for x, y in scatter(rng, area, self.rules.num_collectibles, self.rules.collectible_spacing, allowed):
+            collectibles.add(x, y)
+
+    def chunk_area(self, area, chunk):
+        """An area of the playfield moved into a chunk of the world"""
+        chunk_width, chunk_height = self.rules.chunk_size
+        offset_x, offset_y = chunk[0] * chunk_width, chunk[1] * chunk_height
+        left, top, right, bottom = area
+        return left + offset_x, top + offset_y, right + offset_x, bottom + offset_y
+
+    def chunk_of(self, x, y):
+        """The (column, row) of the chunk that contains a point"""
+        chunk_width, chunk_height = self.rules.chunk_size
+        return int(x // chunk_width), int(y // chunk_height)
+
+    def reset_chunks(self):
+        """Forget the generated chunks and generate the ones around the character"""
+        self.chunks = set()
+        self.current_chunk = None
+        self.generate_nearby_chunks()
+
+    def generate_nearby_chunks(self):
+        """
+        Generate the chunks around the character that do not exist yet.
+
+        Only the chunk of the character and its eight neighbours are generated,
+        so a large world costs nothing until someone walks there. Every chunk
+        draws from its own random numbers (see level_random), so it looks the
+        same whatever order the chunks are visited in.
+        """
+        chunk = self.chunk_of(*self.character_position)
+        if chunk == self.current_chunk:
+            return
+        self.current_chunk = chunk
+
+        columns, rows = self.rules.world_chunks
+        for column in range(chunk[0] - 1, chunk[0] + 2):
+            for row in range(chunk[1] - 1, chunk[1] + 2):
+                if 0 <= column < columns and 0 <= row < rows and (column, row) not in self.chunks:
+                    self.chunks.add((column, row))
+                    rng = self.level_random(self.level, (column, row))
+                    with self.profiler.measure("generate_chunk"):
+                        self.place_obstacles(self.obstacles, self.level, rng, (column, row))
+                        self.place_collectibles(self.collectibles, self.obstacles, rng, (column, row))
+
+    def collectibles_near_character(self):
+        """Number of collectibles in the chunk of the character (all of them in the classic game)"""
+        if not self.rules.is_large_world():
+            return len(self.collectibles)
+        left, top, right, bottom = self.chunk_area((0, 0) + tuple(self.rules.chunk_size),
+                                                   self.chunk_of(*self.character_position))
+        return sum(1 for _, x, y in self.collectibles.query(left, top, right, bottom)
+                   if left <= x < right and top <= y < bottom)
+
+    def obstacles_in(self, left, top, right, bottom):
+        """(id, x, y) of the obstacles that can overlap an area (e.g. what a view can see)"""
+        if not self.rules.is_large_world():
+            return self.obstacles
+        return self.obstacles.query(left - 40, top - 40, right, bottom)
+
+    def collectibles_in(self, left, top, right, bottom):
+        """(id, x, y) of the collectibles that can overlap an area (e.g. what a view can see)"""
+        if not self.rules.is_large_world():
+            return self.collectibles
+        return self.collectibles.query(left - 30, top - 30, right, bottom)
+
+    def generate_new_collectible(self):
+        """Generate a single new collectible"""
+        # In a large world the new collectible goes into the chunk of the character
+        chunk = self.chunk_of(*self.character_position) if self.rules.is_large_world() else (0, 0)
+        area = self.chunk_area(self.rules.collectible_area, chunk)
+
+        # Check if position is clear of obstacles and character
+        def allowed(x, y):
+            return self.is_clear_of_obstacles(x, y) and abs(x - self.character_position[0]) > 40
+
+        with self.profiler.measure("generate_collectible"):
+            spot = find_spot(self.random, area, allowed)
+            if spot is not None:
+                self.add_collectible(*spot)
+
+    def add_obstacle(self, x, y):
+        """Add an obstacle and return its id"""
+        return self.obstacles.add(x, y)
+
+    def remove_obstacle(self, obstacle_id):
+        """Remove an obstacle"""
+        self.obstacles.remove(obstacle_id)
+
+    def clear_obstacles(self):
+        """Remove all obstacles"""
+        self.obstacles.clear()
+
+    def add_collectible(self, x, y):
+        """Add a collectible and return its id"""
+        return self.collectibles.add(x, y)
+
+    def remove_collectible(self, collectible_id):
+        """Remove a collectible"""
+        self.collectibles.remove(collectible_id)
+
+    def clear_collectibles(self):
+        """Remove all collectibles"""
+        self.collectibles.clear()
+
+    def is_clear_of_obstacles(self, x, y, obstacles=None):
+        """Check that a new collectible at (x, y) would not overlap an obstacle (of the game by default)"""
+        if obstacles is None:
+            obstacles = self.obstacles
+        # Only obstacles in the cells around the point can be closer than 50 pixels
+        for _, obstacle_x, obstacle_y in obstacles.query(x - 49, y - 49, x + 49, y + 49):
+            if (abs(x - obstacle_x) < 50 and abs(y - obstacle_y) < 50):
+                return False
+        return True
@@ -0,0 +1,115 @@
+"""
+Learning Quest - Entity Store
+
+Compact storage for the obstacles or collectibles of a game. Positions are
+kept in parallel integer arrays instead of one Python list per entity, and
+every entity has a small integer id that stays the same while it exists.
+
+Removing an entity moves the last one into its place, so removal takes the
+same time however many entities there are. Ids of removed entities are
+reused by the next ones added, so the id range stays as small as the number
+of entities, and a view that keys its canvas items by id can move an
+existing item instead of creating a new one.
+
+A spatial hash (see learning_quest_spatial) indexes the ids by position for
+the collision and placement checks.
+"""
+
+from array import array
+
+from learning_quest_spatial import SpatialHash
+
+
+class EntityStore:
+    """
+    The positions of many entities of one kind.
+
+    Iterating over a store, query() and records() all give (id, x, y)
+    tuples, which is what the collision checks and the view work with.
+    """
+
+    def __init__(self, cell_size=64):
+        """Create an empty store (cell_size is the size of the spatial hash cells)"""
+        # Packed entities: entity number i is ids[i] at (xs[i], ys[i])
+        self.ids = array("i")
+        self.xs = array("i")
+        self.ys = array("i")
+        # id -> where it is packed (-1 for ids that are free)
+        self.slots = array("i")
+        self.free = []
+        self.index = SpatialHash(cell_size)
+
+    def __len__(self):
+        """Number of entities"""
+        return len(self.ids)
+
+    def __contains__(self, entity_id):
+        """Check if an entity exists"""
+        return 0 <= entity_id < len(self.slots) and self.slots[entity_id] >= 0
+
+    def __iter__(self):
+        """(id, x, y) of every entity (do not add or remove entities while iterating)"""
+        return zip(self.ids, self.xs, self.ys)
+
+    def add(self, x, y):
+        """Add an entity at (x, y) and return its id"""
+        if self.free:
+            entity_id = self.free.pop()
+        else:
+            entity_id = len(self.slots)
+            self.slots.append(-1)
+        self.slots[entity_id] = len(self.ids)
+        self.ids.append(entity_id)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.index.insert(entity_id, x, y, entity_id)
+        return entity_id
+
+    def remove(self, entity_id):
+        """Remove an entity (its id may be given to the next entity added)"""
+        slot = self.slots[entity_id]
+        if slot < 0:
+            raise KeyError(entity_id)
+
+        # Move the last entity into the hole
+        last_id = self.ids.pop()
+        last_x = self.xs.pop()
+        last_y = self.ys.pop()
+        if last_id != entity_id:
+            self.ids[slot] = last_id
+            self.xs[slot] = last_x
+            self.ys[slot] = last_y
+            self.slots[last_id] = slot
+
+        self.slots[entity_id] = -1
+        self.free.append(entity_id)
+        self.index.remove(entity_id)
+
+    def clear(self):
+        """Remove every entity (ids start from 0 again)"""
+        self.ids = array("i")
+        self.xs = array("i")
+        self.ys = array("i")
+        self.slots = array("i")
+        self.free = []
+        self.index.clear()
+
+    def position(self, entity_id):
+        """The (x, y) of an entity"""
+        slot = self.slots[entity_id]
+        if slot < 0:
+            raise KeyError(entity_id)
+        return self.xs[slot], self.ys[slot]
+
+    def query(self, left, top, right, bottom):
+        """(id, x, y) of the entities in the spatial hash cells that overlap a box"""
+        slots, xs, ys = self.slots, self.xs, self.ys
+        found = []
+        for entity_id in self.index.query(left, top, right, bottom):
+            slot = slots[entity_id]
+            found.append((entity_id, xs[slot], ys[slot]))
+        return found
+
+    def records(self):
+        """(id, x, y) of every entity as a list (safe to change the store while using it)"""
+        return list(zip(self.ids, self.xs, self.ys))
@@ -18,11 +18,34 @@ This project demonstrates:
 - Interactive educational content
 """
 
-import tkinter as tk
-from tkinter import messagebox, simpledialog
-import random
 import time
 
+# Start of the program, for measuring the startup time (--measure-startup)
+STARTED_AT = time.perf_counter()
+
+import argparse
+import random
+import sys
+import tkinter as tk
+
+from learning_quest_engine import GameEngine, GameRules
+from learning_quest_scene import SceneLayer, ToastOverlay
+from learning_quest_scheduler import Scheduler
+from learning_quest_sprites import SpriteCache, theme_for_level
+from learning_quest_profiler import PROFILE_FILE, Profiler
+from learning_quest_questions import QuestionBank, QuestionPackError, load_question_bank
+
+# The dialogs, score database, leaderboard, mastery statistics and replays are
+# imported where they are first used, so they cost nothing at startup.
+
+# Arrow keys and the engine action they trigger
+KEY_DIRECTIONS = {
+    "Left": "left",
+    "Right": "right",
+    "Up": "up",
+    "Down": "down",
+}
+
 class LearningQuestGame:
     """
     Learning Quest: An educational game where players answer questions to advance
@@ -37,86 +60,96 @@ class LearningQuestGame:
     - Game logic and state management
     """
 
-    def __init__(self, root):
-        """Initialize the game with the main window and setup"""
+    def __init__(self, root, frame_ms=50, repeat_delay_ms=250, player="default", seed=None, record_path=None,
+                 engine=None, rules=None):
+        """
+        Initialize the game with the main window and setup.
+
+        frame_ms is the length of one frame of the game loop: at most one move
+        is made and one redraw is done per frame. repeat_delay_ms is how long
+        an arrow key must be held before the character keeps moving. player is
+        the name the question mastery statistics are saved under. The game's
+        random numbers use seed (a random one if it is not given); if
+        record_path is given the session is recorded there for replays.
+        rules are the GameRules of a local game (the defaults if not given).
+        engine replaces the local GameEngine, e.g. with a RemoteEngine that
+        plays on a game server (see learning_quest_server).
+        """
         self.root = root
         self.root.title("Learning Quest - Code in Place Final Project")
         self.root.geometry("800x600")
         self.root.resizable(False, False)
 
-        # Game state variables
-        self.score = 0
-        self.level = 1
-        self.time_remaining = 60
-        self.game_active = False
-        self.character_position = [400, 500]
-        self.achievements = []
-        self.obstacles = []
-        self.collectibles = []
-
-        # Store questions in a dictionary where the key is the difficulty level
-        self.questions = {
-            1: [
-                {"question": "What does the 'print' function do in Python?", 
-                 "options": ["Displays text on the screen", "Prints to a printer", "Creates a PDF file", "Takes a screenshot"], 
-                 "answer": 0},
-                {"question": "Which symbol is used for comments in Python?", 
-                 "options": ["//", "/*", "#", "<!--"], 
-                 "answer": 2},
-                {"question": "What is the correct way to create a variable named 'age' with the value 25?", 
-                 "options": ["variable age = 25", "age = 25", "int age = 25", "age := 25"], 
-                 "answer": 1},
-                {"question": "What type of data can a Python list contain?", 
-                 "options": ["Only numbers", "Only strings", "Any type of data", "Only booleans"], 
-                 "answer": 2},
-                {"question": "How do you get user input in Python?", 
-                 "options": ["get()", "input()", "read()", "scan()"], 
-                 "answer": 1},
-            ],
-            2: [
-                {"question": "What does the 'len()' function return?", 
-                 "options": ["The longest item in a list", "The number of items in a list", "The memory size of an object", "The length of a string in pixels"], 
-                 "answer": 1},
-                {"question": "How do you create a list in Python?", 
-                 "options": ["list = (1, 2, 3)", "list = [1, 2, 3]", "list = {1, 2, 3}", "list = <1, 2, 3>"], 
-                 "answer": 1},
-                {"question": "What is the correct way to start a for loop in Python?", 
-                 "options": ["for i in range(10):", "for(i=0; i<10; i++)", "for i = 1 to 10", "foreach i in 10"], 
-                 "answer": 0},
-                {"question": "How do you add an item to the end of a list?", 
-                 "options": ["list.add(item)", "list.append(item)", "list.insert(item)", "list.push(item)"], 
-                 "answer": 1},
-                {"question": "What does 'random.randint(1, 10)' return?", 
-                 "options": ["A random decimal between 1 and 10", "A random integer between 1 and 9", "A random integer between 1 and 10", "Always returns 5"], 
-                 "answer": 2},
-            ],
-            3: [
-                {"question": "What does the 'append()' method do to a list?", 
-                 "options": ["Removes an item", "Adds an item to the end", "Sorts the list", "Reverses the list"], 
-                 "answer": 1},
-                {"question": "How do you open a file named 'data.txt' for reading in Python?", 
-                 "options": ["file = open('data.txt', 'r')", "file = open('data.txt', 'w')", "file = read('data.txt')", "file = load('data.txt')"], 
-                 "answer": 0},
-                {"question": "Which of these is NOT a valid way to create a dictionary?", 
-                 "options": ["dict = {}", "dict = dict()", "dict = {1, 2, 3}", "dict = {'a': 1, 'b': 2}"], 
-                 "answer": 2},
-                {"question": "What is the purpose of the '__init__' method in a Python class?", 
-                 "options": ["To delete the object", "To initialize object attributes", "To print object information", "To copy the object"], 
-                 "answer": 1},
-                {"question": "How do you handle exceptions in Python?", 
-                 "options": ["try/catch", "try/except", "handle/error", "check/fail"], 
-                 "answer": 1},
-            ]
-        }
+        # All game rules and state live in the headless engine; this class only shows them.
+        # Its random numbers are seeded so a recorded session can be replayed exactly.
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        if engine is None:
+            # Questions from the question_packs folder (only their index is read now)
+            try:
+                questions = load_question_bank()
+            except QuestionPackError as e:
+                from tkinter import messagebox
+                messagebox.showerror("Question Packs", f"Could not load question packs, using the built-in questions:\n{e}")
+                questions = QuestionBank()
+            engine = GameEngine(rules=rules, questions=questions, seed=self.seed)
+            # Lay out the next level on a background thread while the current one is played
+            from concurrent.futures import ThreadPoolExecutor
+            engine.level_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level")
+        self.engine = engine
+        self.recorder = None
+        if record_path:
+            questions = self.engine.questions
+            from learning_quest_replay import SessionRecorder
+            self.recorder = SessionRecorder(record_path, self.seed, self.engine.rules, questions)
+        self.replay = None
+        self.replay_job = None
+        self.live_engine = None  # the player's engine while a replay is shown
+
+        # Runtime measurements, shown on the canvas with F3 and saved with F4
+        self.profiler = Profiler()
+        self.engine.profiler = self.profiler
+        self.show_profiler = False
+
+        # Adaptive question order based on how well this player knows each question
+        # (loaded when the first game starts)
+        self.player = player
+        self.mastery_store = None
+
+        # High score database and its write-behind journal (opened the first time they are needed)
+        self.score_store = None
+        self.score_journal = None
+        self.leaderboard = None
+
+        # The question dialog is built once (in idle time after the first game starts) and reused;
+        # the help window is built the first time it is opened
+        self.question_dialog = None
+        self.help_window = None
+
+        # Input state for the fixed-timestep game loop
+        self.frame_ms = frame_ms
+        self.repeat_delay_ms = repeat_delay_ms
+        self.held_keys = {}  # direction -> time the key went down
+        self.pending_releases = set()
+        self.queued_move = None
+        self.needs_redraw = False
+
+        # All periodic work (countdown, frames, spawning, autosave) runs on one drift-free scheduler
+        self.scheduler = Scheduler(self.root)
+        self.scheduler.every("autosave", 10.0, self.autosave)
 
         # Create and place UI elements
         self.create_widgets()
 
-        # Bind keyboard events for character movement
-        self.root.bind("<Left>", self.move_left)
-        self.root.bind("<Right>", self.move_right)
-        self.root.bind("<Up>", self.move_up)
-        self.root.bind("<Down>", self.move_down)
+        # Bind keyboard events for character movement (moves happen in game_tick)
+        for key in KEY_DIRECTIONS:
+            self.root.bind(f"<KeyPress-{key}>", self.key_pressed)
+            self.root.bind(f"<KeyRelease-{key}>", self.key_released)
+        self.root.bind("<FocusOut>", lambda event: self.clear_input())
+        self.root.bind("<F3>", lambda event: self.toggle_profiler())
+        self.root.bind("<F4>", lambda event: self.export_profile())
+        # The game (and its timer) pauses while the window is minimized
+        self.root.bind("<Unmap>", self.window_hidden)
+        self.root.bind("<Map>", self.window_shown)
         self.root.focus_set()  # Make sure window has focus for key events
 
     def create_widgets(self):
@@ -143,6 +176,16 @@ class LearningQuestGame:
         self.canvas = tk.Canvas(self.root, bg="#ecf0f1", width=800, height=450)
         self.canvas.pack(fill=tk.BOTH, expand=True)
 
+        # Retained scene so redraws only touch the canvas items that changed
+        self.scene = SceneLayer(self.canvas, layers=("obstacles", "collectibles", "character", "hud", "toasts",
+                                                     "profiler"))
+
+        # Feedback during play is shown as toasts on the canvas instead of blocking message boxes
+        self.toasts = ToastOverlay(self.scene)
+
+        # Entity images, rendered once per level theme (the first time a game is drawn)
+        self.sprites = SpriteCache(self.root)
+
         # Create a frame for the bottom controls
         control_frame = tk.Frame(self.root, bg="#2c3e50", height=50)
         control_frame.pack(fill=tk.X)
@@ -176,16 +219,23 @@ class LearningQuestGame:
         self.show_welcome_screen()
 
     def show_welcome_screen(self):
-        """Display the welcome screen"""
+        """Display the welcome screen (drawn once, then only shown again)"""
+        if self.canvas.find_withtag("welcome"):
+            self.canvas.delete("!welcome")
+            self.scene.reset()
+            self.canvas.itemconfig("welcome", state=tk.NORMAL)
+            return
+
         self.canvas.delete("all")
+        self.scene.reset()
 
         # Title
         self.canvas.create_text(400, 100, text="🎓 Learning Quest", 
-                              font=("Arial", 32, "bold"), fill="#2c3e50")
+                              font=("Arial", 32, "bold"), fill="#2c3e50", tags="welcome")
 
         # Subtitle
         self.canvas.create_text(400, 150, text="Code in Place Final Project", 
-                              font=("Arial", 18), fill="#7f8c8d")
+                              font=("Arial", 18), fill="#7f8c8d", tags="welcome")
 
         # Instructions
         instructions = [
@@ -206,47 +256,116 @@ class LearningQuestGame:
             "Press 'Start Game' when you're ready!"
         ]
 
-        y_position = 200
-        for instruction in instructions:
-            self.canvas.create_text(400, y_position, text=instruction, 
-                                  font=("Arial", 12), fill="#2c3e50")
-            y_position += 20
+        # One text item for all the lines instead of one item per line
+        self.canvas.create_text(400, 190, text="\n".join(instructions), anchor=tk.N,
+                              justify=tk.CENTER, font=("Arial", 12), fill="#2c3e50", tags="welcome")
 
     def start_game(self):
         """Start or restart the game"""
-        # Reset game state
-        self.score = 0
-        self.level = 1
-        self.time_remaining = 60
-        self.game_active = True
-        self.character_position = [400, 400]
-        self.achievements = []
-        self.obstacles = []
-        self.collectibles = []
+        # Reset game state and generate initial obstacles and collectibles
+        self.stop_replay()
+        self.load_mastery()
+        self.step_engine("start")
+        if not self.engine.game_active:
+            return None  # The game server could not start it
 
         # Update UI
-        self.score_label.config(text=f"Score: {self.score}")
-        self.level_label.config(text=f"Level: {self.level}")
-        self.time_label.config(text=f"Time: {self.time_remaining}")
+        self.update_status()
 
         # Enable question button
         self.question_button.config(state=tk.NORMAL)
 
-        # Clear canvas and draw game elements
-        self.canvas.delete("all")
+        # Clear canvas (the welcome screen is only hidden) and draw game elements
+        self.canvas.itemconfig("welcome", state=tk.HIDDEN)
+        self.canvas.delete("!welcome")
+        self.scene.reset()
+        self.toasts.clear()
         self.draw_game()
 
-        # Start the timer
-        self.update_timer()
-
-        # Generate initial obstacles and collectibles
-        self.generate_obstacles()
-        self.generate_collectibles()
+        # Start the timer, the game loop and spawning (replacing the jobs of a previous game)
+        self.clear_input()
+        self.scheduler.every("countdown", 1.0, self.update_timer)
+        self.scheduler.every("frame", self.frame_ms / 1000, self.game_tick, catch_up=False)
+        self.scheduler.every("spawn", 5.0, self.spawn_tick)
+        self.scheduler.cancel("toasts")
+
+        # Render the next level's sprites while the player gets going (images need the main thread)
+        self.root.after_idle(self.prepare_next_theme)
+
+        # Build the question dialog while the player gets going, before the first question
+        if self.question_dialog is None:
+            self.root.after(500, self.get_question_dialog)
+
+    def prepare_next_theme(self):
+        """Render the sprites of the next level before it starts"""
+        if self.engine.level < self.engine.rules.max_level:
+            self.sprites.themed(theme_for_level(self.engine.level + 1))
+
+    def load_mastery(self):
+        """Load the player's question mastery statistics the first time a game starts"""
+        # A game server chooses the questions of its sessions itself
+        if self.mastery_store is None and isinstance(self.engine, GameEngine):
+            from learning_quest_mastery import AdaptiveScheduler, MasteryStore
+
+            self.mastery_store = MasteryStore()
+            self.engine.scheduler = AdaptiveScheduler(self.engine.questions, self.engine.sampler,
+                                                      self.mastery_store, self.player)
+
+    def stop_game_jobs(self):
+        """Stop the periodic work of a game that has ended"""
+        self.scheduler.cancel("countdown", "frame", "spawn")
+        self.fade_toasts()
+
+    def fade_toasts(self):
+        """Keep redrawing without the game loop until the last toast has expired"""
+        self.scheduler.every("toasts", self.frame_ms / 1000, self.toasts_tick, catch_up=False)
+
+    def toasts_tick(self, intervals=1):
+        """Show and expire toasts while no game is running"""
+        if self.toasts.busy():
+            self.draw_game()
+        else:
+            self.scheduler.cancel("toasts")
+
+    def window_hidden(self, event):
+        """Pause everything while the main window is minimized"""
+        if event.widget is self.root:
+            self.scheduler.pause()
+
+    def window_shown(self, event):
+        """Resume when the main window is shown again"""
+        if event.widget is self.root:
+            self.scheduler.resume()
+
+    def update_status(self):
+        """Show the engine's score, level and time in the header labels"""
+        engine = self.engine
+        self.score_label.config(text=f"Score: {engine.score}")
+        self.level_label.config(text=f"Level: {engine.level}")
+        self.time_label.config(text=f"Time: {engine.time_remaining}")
+
+        # Change color when time is running low
+        if engine.time_remaining <= 10:
+            self.time_label.config(fg="#e74c3c")
+        elif engine.time_remaining <= 30:
+            self.time_label.config(fg="#f39c12")
+        else:
+            self.time_label.config(fg="white")
 
     def draw_game(self):
-        """Draw all game elements on the canvas"""
-        # Clear canvas
-        self.canvas.delete("all")
+        """Draw all game elements on the canvas, touching only what changed"""
+        with self.profiler.measure("draw_game"):
+            self.draw_scene()
+
+        # Input events drawn by this frame are on screen once Tk has repainted (in idle time)
+        if self.profiler.marks:
+            self.root.after_idle(self.profiler.rendered)
+
+    def draw_scene(self):
+        """Update the retained scene from the engine state"""
+        engine = self.engine
+        scene = self.scene
+        scene.begin_frame()
 
         # Draw background based on level
         level_colors = {
@@ -254,49 +373,38 @@ class LearningQuestGame:
             2: "#e8f5e8",  # Light green for level 2
             3: "#fde8e8"   # Light red for level 3
         }
-        bg_color = level_colors.get(self.level, "#ecf0f1")
-        self.canvas.config(bg=bg_color)
+        scene.set_background(level_colors.get(engine.level, "#ecf0f1"))
 
         # Draw level indicator
-        self.canvas.create_text(400, 30, text=f"🌟 Level {self.level} 🌟", 
-                              font=("Arial", 18, "bold"), fill="#2c3e50")
-
-        # Draw obstacles
-        for obstacle in self.obstacles:
-            # Red squares for obstacles
-            self.canvas.create_rectangle(obstacle[0], obstacle[1], 
-                                       obstacle[0] + 40, obstacle[1] + 40, 
-                                       fill="#e74c3c", outline="#c0392b", width=2)
-            # Add emoji-style decoration
-            self.canvas.create_text(obstacle[0] + 20, obstacle[1] + 20, 
-                                  text="⚠️", font=("Arial", 16))
-
-        # Draw collectibles
-        for collectible in self.collectibles:
-            # Yellow circles for collectibles
-            self.canvas.create_oval(collectible[0], collectible[1], 
-                                  collectible[0] + 30, collectible[1] + 30, 
-                                  fill="#f1c40f", outline="#f39c12", width=2)
-            # Add sparkle effect
-            self.canvas.create_text(collectible[0] + 15, collectible[1] + 15, 
-                                  text="✨", font=("Arial", 12))
+        banner = scene.place("banner", 400, 30, self.build_text_item, "hud")
+        scene.configure(banner[0], text=f"🌟 Level {engine.level} 🌟",
+                        font=("Arial", 18, "bold"), fill="#2c3e50")
+
+        # Sprites in the colors of this level (existing items change with them)
+        self.sprites.use_theme(theme_for_level(engine.level))
+
+        # Draw the obstacles and collectibles in view (keyed by entity so they can be moved or
+        # deleted); in a large world the others are not on the canvas at all
+        camera_x, camera_y = self.camera()
+        view = (camera_x, camera_y, camera_x + 800, camera_y + 450)
+        scene.sync("obstacles", ((obstacle_id, x - camera_x, y - camera_y)
+                                 for obstacle_id, x, y in engine.obstacles_in(*view)), self.build_obstacle)
+        scene.sync("collectibles", ((collectible_id, x - camera_x, y - camera_y)
+                                    for collectible_id, x, y in engine.collectibles_in(*view)),
+                   self.build_collectible)
 
         # Draw character
-        x, y = self.character_position
-        # Main character body
-        self.canvas.create_oval(x - 20, y - 20, x + 20, y + 20, 
-                              fill="#3498db", outline="#2980b9", width=3)
-        # Character face
-        self.canvas.create_text(x, y, text="😊", font=("Arial", 16))
+        x, y = engine.character_position
+        scene.place("character", x - camera_x, y - camera_y, self.build_character, "character")
 
         # Draw goal text
-        target_score = self.level * 50
+        target_score = engine.target_score()
         goal_text = f"Goal: Reach {target_score} points to advance!"
-        if self.level == 3:
-            goal_text = "Goal: Reach 150+ points to win the game!"
+        if engine.level == engine.rules.max_level:
+            goal_text = f"Goal: Reach {target_score}+ points to win the game!"
 
-        self.canvas.create_text(400, 420, text=goal_text, 
-                              font=("Arial", 14, "bold"), fill="#27ae60")
+        goal = scene.place("goal", 400, 420, self.build_text_item, "hud")
+        scene.configure(goal[0], text=goal_text, font=("Arial", 14, "bold"), fill="#27ae60")
 
         # Draw progress bar
         progress_width = 300
@@ -304,388 +412,480 @@ class LearningQuestGame:
         progress_x = 250
         progress_y = 60
 
-        # Background of progress bar
-        self.canvas.create_rectangle(progress_x, progress_y, 
-                                   progress_x + progress_width, progress_y + progress_height,
-                                   fill="#bdc3c7", outline="#95a5a6")
+        background, fill, text = scene.place("progress", progress_x, progress_y,
+                                             self.build_progress_bar, "hud")
 
         # Fill of progress bar
-        progress_percent = min(self.score / target_score, 1.0)
+        progress_percent = min(engine.score / target_score, 1.0)
         fill_width = progress_width * progress_percent
         if fill_width > 0:
-            self.canvas.create_rectangle(progress_x, progress_y, 
-                                       progress_x + fill_width, progress_y + progress_height,
-                                       fill="#2ecc71", outline="")
+            scene.coords(fill, progress_x, progress_y,
+                         progress_x + fill_width, progress_y + progress_height)
+            scene.configure(fill, state=tk.NORMAL)
+        else:
+            scene.configure(fill, state=tk.HIDDEN)
 
         # Progress text
-        self.canvas.create_text(400, 70, text=f"{self.score}/{target_score}", 
-                              font=("Arial", 10, "bold"), fill="white")
-
-    def generate_obstacles(self):
-        """Generate random obstacles based on the current level"""
-        self.obstacles = []
-        # More obstacles as level increases
-        num_obstacles = 2 + self.level * 2
-
-        for _ in range(num_obstacles):
-            x = random.randint(50, 710)
-            y = random.randint(100, 350)
-            # Make sure obstacles don't spawn too close to character start
-            if abs(x - 400) > 60 or abs(y - 400) > 60:
-                self.obstacles.append([x, y])
-
-        self.draw_game()
-
-    def generate_collectibles(self):
-        """Generate random collectibles (bonus points)"""
-        self.collectibles = []
-        # Consistent number of collectibles
-        num_collectibles = 6
-
-        for _ in range(num_collectibles):
-            x = random.randint(50, 720)
-            y = random.randint(100, 350)
-            # Make sure collectibles don't spawn inside obstacles
-            collision = False
-            for obstacle in self.obstacles:
-                if (abs(x - obstacle[0]) < 50 and abs(y - obstacle[1]) < 50):
-                    collision = True
-                    break
-
-            if not collision:
-                self.collectibles.append([x, y])
-
-        self.draw_game()
-
-    def move_left(self, event):
-        """Move character left"""
-        if not self.game_active:
+        scene.configure(text, text=f"{engine.score}/{target_score}")
+
+        # Notifications on top of everything
+        self.toasts.update()
+
+        # Performance overlay (F3)
+        if self.show_profiler or ("profiler", 0) in scene.nodes:
+            self.draw_profiler()
+
+        scene.end_frame()
+
+    def camera(self):
+        """Top-left corner of the part of the world on the canvas (follows the character)"""
+        world_width, world_height = self.engine.rules.world_size()
+        x, y = self.engine.character_position
+        return (min(max(x - 400, 0), world_width - 800),
+                min(max(y - 225, 0), world_height - 450))
+
+    def draw_profiler(self):
+        """Show (or hide) the profiler's numbers in the corner of the canvas"""
+        background, text = self.scene.place(("profiler", 0), 10, 90, self.build_profiler_hud, "profiler")
+        if not self.show_profiler:
+            self.scene.configure(background, state=tk.HIDDEN)
+            self.scene.configure(text, state=tk.HIDDEN)
             return
 
-        self.character_position[0] = max(20, self.character_position[0] - 25)
-        self.check_collisions()
-        self.draw_game()
-
-    def move_right(self, event):
-        """Move character right"""
-        if not self.game_active:
+        lines = self.profiler.summary_lines()
+        self.scene.configure(text, state=tk.NORMAL, text="\n".join(lines))
+        self.scene.coords(background, 10, 90, 480, 100 + 14 * len(lines))
+        self.scene.configure(background, state=tk.NORMAL)
+
+    def build_profiler_hud(self, canvas, x, y, tag):
+        """Create the background and text items of the profiler overlay"""
+        background = canvas.create_rectangle(x, y, x + 470, y + 10, fill="#2c3e50", outline="",
+                                             stipple="gray75", state=tk.HIDDEN, tags=tag)
+        text = canvas.create_text(x + 6, y + 5, text="", anchor=tk.NW, font=("Courier", 9),
+                                  fill="white", state=tk.HIDDEN, tags=tag)
+        return (background, text)
+
+    def toggle_profiler(self):
+        """Show or hide the performance overlay (memory is traced only while it is shown)"""
+        self.show_profiler = not self.show_profiler
+        if self.show_profiler:
+            self.profiler.start_memory()
+            self.scheduler.every("profiler", 0.5, self.refresh_profiler)
+        else:
+            self.profiler.stop_memory()
+            self.scheduler.cancel("profiler")
+        self.needs_redraw = True
+        if self.engine.game_active:
+            self.draw_game()
+
+    def refresh_profiler(self, intervals=1):
+        """Sample the canvas item count and redraw the overlay on the next frame"""
+        self.profiler.count_items(len(self.canvas.find_all()), self.scene.last_frame_touched)
+        self.needs_redraw = True
+
+    def export_profile(self):
+        """Append the current measurements to the profile JSONL file"""
+        self.profiler.count_items(len(self.canvas.find_all()), self.scene.last_frame_touched)
+        try:
+            self.profiler.export(PROFILE_FILE, frame_ms=self.frame_ms,
+                                 question_dialog=self.question_dialog.latency_summary()
+                                 if self.question_dialog is not None else None)
+        except OSError as e:
+            from tkinter import messagebox
+            messagebox.showerror("Error", f"Could not save profile: {e}")
             return
-
-        self.character_position[0] = min(780, self.character_position[0] + 25)
-        self.check_collisions()
-        self.draw_game()
-
-    def move_up(self, event):
-        """Move character up"""
-        if not self.game_active:
+        self.toasts.notify("Profile saved 📊", PROFILE_FILE, "info")
+        self.needs_redraw = True
+
+    def build_text_item(self, canvas, x, y, tag):
+        """Create a text item that is filled in later with configure()"""
+        return (canvas.create_text(x, y, text="", tags=tag),)
+
+    def build_obstacle(self, canvas, x, y, tag):
+        """Create the canvas item for one obstacle"""
+        # Square with a warning sign (see learning_quest_sprites)
+        return (canvas.create_image(x, y, image=self.sprites.image("obstacle"), anchor=tk.NW, tags=tag),)
+
+    def build_collectible(self, canvas, x, y, tag):
+        """Create the canvas item for one collectible"""
+        # Coin with a sparkle
+        return (canvas.create_image(x, y, image=self.sprites.image("collectible"), anchor=tk.NW, tags=tag),)
+
+    def build_character(self, canvas, x, y, tag):
+        """Create the canvas item for the player's character"""
+        # Round body with a smiling face, centered on the position
+        return (canvas.create_image(x, y, image=self.sprites.image("character"), anchor=tk.CENTER, tags=tag),)
+
+    def build_progress_bar(self, canvas, x, y, tag):
+        """Create the background, fill and text items of the progress bar"""
+        background = canvas.create_rectangle(x, y, x + 300, y + 20,
+                                             fill="#bdc3c7", outline="#95a5a6", tags=tag)
+        fill = canvas.create_rectangle(x, y, x, y + 20, fill="#2ecc71", outline="",
+                                       state=tk.HIDDEN, tags=tag)
+        text = canvas.create_text(x + 150, y + 10, text="",
+                                  font=("Arial", 10, "bold"), fill="white", tags=tag)
+        return (background, fill, text)
+
+    def key_pressed(self, event):
+        """Remember that an arrow key went down (the move happens on the next frame)"""
+        direction = KEY_DIRECTIONS.get(event.keysym)
+        if direction is None:
             return
 
-        self.character_position[1] = max(90, self.character_position[1] - 25)
-        self.check_collisions()
-        self.draw_game()
-
-    def move_down(self, event):
-        """Move character down"""
-        if not self.game_active:
+        if direction in self.held_keys:
+            # Auto-repeat of a key that is already held: nothing new to do
+            self.pending_releases.discard(direction)
             return
 
-        self.character_position[1] = min(400, self.character_position[1] + 25)
-        self.check_collisions()
-        self.draw_game()
-
-    def check_collisions(self):
-        """Check if character collides with obstacles or collectibles"""
-        x, y = self.character_position
-
-        # Check obstacle collisions
-        for obstacle in self.obstacles[:]:
-            if (abs(x - (obstacle[0] + 20)) < 35 and 
-                abs(y - (obstacle[1] + 20)) < 35):
-                # Collision with obstacle - lose points
-                self.score = max(0, self.score - 5)
-                self.score_label.config(text=f"Score: {self.score}")
-                self.obstacles.remove(obstacle)
-                messagebox.showwarning("Oops! 💥", "You hit an obstacle! -5 points.")
-                break
-
-        # Check collectible collisions
-        for collectible in self.collectibles[:]:
-            if (abs(x - (collectible[0] + 15)) < 30 and 
-                abs(y - (collectible[1] + 15)) < 30):
-                # Collected a point - gain points
-                self.score += 10
-                self.score_label.config(text=f"Score: {self.score}")
-                self.collectibles.remove(collectible)
-
-                # Generate new collectible to replace the collected one
-                self.generate_new_collectible()
-                break
-
-    def generate_new_collectible(self):
-        """Generate a single new collectible"""
-        for _ in range(10):  # Try up to 10 times to find a good position
-            x = random.randint(50, 720)
-            y = random.randint(100, 350)
-
-            # Check if position is clear of obstacles and character
-            collision = False
-            for obstacle in self.obstacles:
-                if (abs(x - obstacle[0]) < 50 and abs(y - obstacle[1]) < 50):
-                    collision = True
-                    break
-
-            if not collision and abs(x - self.character_position[0]) > 40:
-                self.collectibles.append([x, y])
-                break
+        self.held_keys[direction] = time.monotonic()
+        self.profiler.mark("input")
+        # A quick tap still moves once, even if it is released before the next frame
+        if self.queued_move is None:
+            self.queued_move = direction
+
+    def key_released(self, event):
+        """Mark an arrow key as released (applied on the next frame)"""
+        direction = KEY_DIRECTIONS.get(event.keysym)
+        # Auto-repeat sends release/press pairs, so wait for the frame before forgetting the key
+        if direction in self.held_keys:
+            self.pending_releases.add(direction)
+
+    def clear_input(self):
+        """Forget all held and queued keys"""
+        self.held_keys = {}
+        self.pending_releases = set()
+        self.queued_move = None
+
+    def next_move(self):
+        """Merge the input since the last frame into at most one move"""
+        for direction in self.pending_releases:
+            self.held_keys.pop(direction, None)
+        self.pending_releases = set()
+
+        if self.queued_move is not None:
+            direction = self.queued_move
+            self.queued_move = None
+            return direction
+
+        if self.held_keys:
+            # Keep moving in the most recently pressed direction once it has been held long enough
+            direction, pressed_at = list(self.held_keys.items())[-1]
+            if (time.monotonic() - pressed_at) * 1000 >= self.repeat_delay_ms:
+                return direction
+        return None
+
+    def game_tick(self, intervals=1):
+        """Run one frame: make at most one move and redraw at most once"""
+        if not self.engine.game_active:
+            self.clear_input()
+            return
 
+        events = []
+        direction = self.next_move()
+        if direction is not None:
+            events = self.step_engine(direction)
+            self.needs_redraw = True
+
+        if self.needs_redraw or self.toasts.busy():
+            self.needs_redraw = False
+            self.update_status()
+            self.draw_game()
+
+        if events:
+            self.handle_events(events)
+            if not self.engine.game_active:
+                # The end-of-game dialogs may have swallowed key releases
+                self.clear_input()
+
+    def step_engine(self, action):
+        """Send an action to the engine, recording it if the session is being recorded"""
+        try:
+            events = self.engine.step(action)
+        except (OSError, ValueError) as e:
+            # A remote engine lost its game server (or the server refused the action)
+            self.end_lost_game(e)
+            return []
+        if self.recorder is not None:
+            if action == "ask":
+                # Questions are recorded by index: the adaptive order depends on the clock
+                if events:
+                    self.recorder.record(("ask", self.engine.current_slot[1]))
+            else:
+                self.recorder.record(action)
+        return events
+
+    def end_lost_game(self, error):
+        """Stop a game that can no longer be played and tell the player why"""
+        from tkinter import messagebox
+
+        self.engine.game_active = False
+        self.stop_game_jobs()
+        self.hide_question_dialog()
+        self.question_button.config(state=tk.DISABLED)
+        self.update_status()
+        messagebox.showerror("Game Server", f"The game had to stop:\n{error}")
+
+    def perform(self, action):
+        """Send an action to the engine, redraw and react to what happened"""
+        if not self.engine.game_active:
+            return []
+
+        events = self.step_engine(action)
+        self.update_status()
         self.draw_game()
+        self.handle_events(events)
+        return events
+
+    def handle_events(self, events):
+        """Show feedback for the events reported by the engine"""
+        from tkinter import messagebox, simpledialog
+
+        engine = self.engine
+        for event in events:
+            kind = event[0]
+            # Feedback during play is a toast so the game never stops for it
+            if kind == "obstacle_hit":
+                self.toasts.notify("Oops! 💥", f"You hit an obstacle! -{event[1]} points.", "warning")
+            elif kind == "correct":
+                self.toasts.notify("Correct! 🎉", f"That's right! +{event[1]} points", "success")
+            elif kind == "wrong":
+                self.toasts.notify("Incorrect 😔", f"The answer was: {event[2]}  (-{event[1]} points)", "warning")
+            elif kind == "level_up":
+                self.toasts.notify("Level Up! 🎊", 
+                                   f"Level {event[1]}: reach {engine.target_score()} points, " +
+                                   f"+{engine.rules.level_bonus_time}s", "info")
+                self.root.after_idle(self.prepare_next_theme)
+            elif kind == "victory":
+                self.stop_game_jobs()
+                self.hide_question_dialog()
+                self.question_button.config(state=tk.DISABLED)
+                messagebox.showinfo("🏆 VICTORY! 🏆", 
+                                  f"Amazing! You've completed all levels!\n\n" +
+                                  f"Final Score: {engine.score} points\n" +
+                                  f"Time Remaining: {engine.time_remaining} seconds\n\n" +
+                                  f"You're a Python learning champion!")
+
+                # Ask for player name to save score
+                player_name = simpledialog.askstring("🏆 High Score", 
+                                                    "Enter your name for the high score:")
+                if player_name:
+                    self.save_high_score(player_name, engine.score)
+            elif kind == "time_up":
+                self.stop_game_jobs()
+                self.hide_question_dialog()
+                self.question_button.config(state=tk.DISABLED)
+                messagebox.showinfo("⏰ Time's Up!", 
+                                  f"Game over! You reached Level {engine.level} with {engine.score} points.\n\n" +
+                                  f"Thanks for playing Learning Quest!")
+
+                # Ask for player name to save score
+                player_name = simpledialog.askstring("Game Over", 
+                                                    "Enter your name for the high score:")
+                if player_name:
+                    self.save_high_score(player_name, engine.score)
+
+    def hide_question_dialog(self):
+        """Hide the question dialog if it is open (e.g. when the game ends)"""
+        if self.question_dialog is not None and self.question_dialog.is_visible():
+            self.question_dialog.hide()
+
+    def get_question_dialog(self):
+        """Build the question dialog the first time it is needed"""
+        if self.question_dialog is None:
+            from learning_quest_dialogs import QuestionDialog
+            self.question_dialog = QuestionDialog(self.root, self.submit_answer, self.skip_question)
+        return self.question_dialog
 
     def show_question(self):
-        """Display a random question based on the current level"""
-        if not self.game_active:
+        """Display a question based on the current level"""
+        clicked_at = time.perf_counter()
+        if not self.engine.game_active:
             return
 
-        # Get a random question for the current level
-        level_questions = self.questions.get(self.level, self.questions[1])
-        question_data = random.choice(level_questions)
+        # Get the next question for the current level and show it in the reusable dialog
+        level = self.engine.level
+        question_data = self.step_engine("ask")[0][1]
+        self.get_question_dialog().show(level, question_data, clicked_at)
 
-        # Create a custom dialog for the question
-        question_window = tk.Toplevel(self.root)
-        question_window.title(f"🧠 Level {self.level} Question")
-        question_window.geometry("600x400")
-        question_window.resizable(False, False)
-        question_window.configure(bg="#ecf0f1")
+    def submit_answer(self, choice):
+        """Check the answer selected in the question dialog"""
+        if choice == -1:
+            from tkinter import messagebox
+            messagebox.showwarning("No Selection", "Please select an answer!")
+            return
 
-        # Center the window
-        question_window.transient(self.root)
-        question_window.grab_set()
+        self.question_dialog.hide()
+        self.profiler.mark("answer")
+        self.perform(("answer", choice))
+
+    def skip_question(self):
+        """Allow player to skip question without penalty"""
+        from tkinter import messagebox
+        result = messagebox.askyesno("Skip Question", 
+                                   "Are you sure you want to skip this question?\nNo points will be gained or lost.")
+        if result:
+            self.step_engine("skip")
+            self.question_dialog.hide()
+
+    def update_timer(self, seconds=1):
+        """Update the game timer (catching up if the scheduler woke up late)"""
+        events = []
+        for _ in range(seconds):
+            if not self.engine.game_active:
+                break
+            events.extend(self.step_engine("tick"))
 
-        # Question header
-        header_frame = tk.Frame(question_window, bg="#3498db", height=60)
-        header_frame.pack(fill=tk.X)
-        header_frame.pack_propagate(False)
+        self.update_status()
+        self.handle_events(events)
 
-        header_label = tk.Label(header_frame, text=f"🎯 Level {self.level} Challenge", 
-                               font=("Arial", 18, "bold"), bg="#3498db", fg="white")
-        header_label.pack(pady=15)
-
-        # Question label
-        question_frame = tk.Frame(question_window, bg="#ecf0f1")
-        question_frame.pack(fill=tk.X, padx=20, pady=20)
-
-        question_label = tk.Label(question_frame, text=question_data["question"], 
-                                wraplength=550, font=("Arial", 16), bg="#ecf0f1",
-                                justify=tk.CENTER)
-        question_label.pack()
-
-        # Answer frame
-        answer_frame = tk.Frame(question_window, bg="#ecf0f1")
-        answer_frame.pack(pady=10, fill=tk.X, padx=40)
-
-        # Variable to store the selected answer
-        selected_answer = tk.IntVar()
-        selected_answer.set(-1)  # Default: no selection
-
-        # Create radio buttons for options
-        for i, option in enumerate(question_data["options"]):
-            radio_frame = tk.Frame(answer_frame, bg="#ffffff", relief=tk.RAISED, bd=1)
-            radio_frame.pack(fill=tk.X, pady=5)
-
-            radio = tk.Radiobutton(radio_frame, text=f"{chr(65+i)}. {option}", 
-                                 variable=selected_answer, value=i, 
-                                 font=("Arial", 12), bg="#ffffff",
-                                 padx=10, pady=8, anchor=tk.W)
-            radio.pack(fill=tk.X)
-
-        # Function to check the answer
-        def check_answer():
-            if selected_answer.get() == -1:
-                messagebox.showwarning("No Selection", "Please select an answer!")
-                return
+    def spawn_tick(self, intervals=1):
+        """Top up collectibles that could not be respawned right away"""
+        if self.engine.game_active:
+            self.step_engine("spawn")
+            self.needs_redraw = True
 
-            if selected_answer.get() == question_data["answer"]:
-                # Correct answer
-                self.score += 20
-                self.score_label.config(text=f"Score: {self.score}")
-                messagebox.showinfo("Correct! 🎉", "That's right! +20 points\n\nGreat job!")
+    def autosave(self, intervals=1):
+        """Ask the score journal to write queued scores (without waiting for it)"""
+        if self.score_journal is not None:
+            self.score_journal.flush(timeout=0)
 
-                # Check if score is high enough to advance to next level
-                if self.score >= self.level * 50:
-                    self.advance_level()
-            else:
-                # Incorrect answer
-                self.score = max(0, self.score - 10)
-                self.score_label.config(text=f"Score: {self.score}")
-                correct_option = question_data["options"][question_data["answer"]]
-                messagebox.showinfo("Incorrect 😔", 
-                                  f"Sorry, that's wrong.\n\nThe correct answer was:\n{correct_option}\n\n-10 points")
-
-            question_window.destroy()
-
-        def skip_question():
-            """Allow player to skip question without penalty"""
-            result = messagebox.askyesno("Skip Question", 
-                                       "Are you sure you want to skip this question?\nNo points will be gained or lost.")
-            if result:
-                question_window.destroy()
-
-        # Button frame
-        button_frame = tk.Frame(question_window, bg="#ecf0f1")
-        button_frame.pack(pady=20)
-
-        # Submit button
-        submit_button = tk.Button(button_frame, text="✅ Submit Answer", 
-                                command=check_answer, font=("Arial", 14, "bold"),
-                                bg="#2ecc71", fg="white", padx=20, pady=10)
-        submit_button.pack(side=tk.LEFT, padx=10)
-
-        # Skip button
-        skip_button = tk.Button(button_frame, text="⏭️ Skip", 
-                              command=skip_question, font=("Arial", 14, "bold"),
-                              bg="#95a5a6", fg="white", padx=20, pady=10)
-        skip_button.pack(side=tk.LEFT, padx=10)
-
-    def advance_level(self):
-        """Advance to the next level"""
-        if self.level < 3:
-            self.level += 1
-            self.level_label.config(text=f"Level: {self.level}")
-
-            # Bonus time for advancing
-            self.time_remaining += 30
-            self.time_label.config(text=f"Time: {self.time_remaining}")
-
-            # Generate new obstacles and collectibles
-            self.generate_obstacles()
-            self.generate_collectibles()
-
-            messagebox.showinfo("Level Up! 🎊", 
-                              f"Congratulations! You've advanced to Level {self.level}!\n\n" +
-                              f"🎯 New Goal: Reach {self.level * 50} points\n" +
-                              f"⏰ +30 seconds added to your timer!")
-
-            # Achievement for reaching a new level
-            achievement = f"Reached Level {self.level}"
-            if achievement not in self.achievements:
-                self.achievements.append(achievement)
-        else:
-            # Player has completed all levels
-            self.game_active = False
-            self.question_button.config(state=tk.DISABLED)
-
-            messagebox.showinfo("🏆 VICTORY! 🏆", 
-                              f"Amazing! You've completed all levels!\n\n" +
-                              f"Final Score: {self.score} points\n" +
-                              f"Time Remaining: {self.time_remaining} seconds\n\n" +
-                              f"You're a Python learning champion!")
-
-            # Ask for player name to save score
-            player_name = simpledialog.askstring("🏆 High Score", 
-                                                "Enter your name for the high score:")
-            if player_name:
-                self.save_high_score(player_name, self.score)
-
-    def update_timer(self):
-        """Update the game timer"""
-        if self.game_active and self.time_remaining > 0:
-            self.time_remaining -= 1
-            self.time_label.config(text=f"Time: {self.time_remaining}")
-
-            # Change color when time is running low
-            if self.time_remaining <= 10:
-                self.time_label.config(fg="#e74c3c")
-            elif self.time_remaining <= 30:
-                self.time_label.config(fg="#f39c12")
-            else:
-                self.time_label.config(fg="white")
-
-            self.root.after(1000, self.update_timer)
-        elif self.game_active:
-            # Time's up
-            self.game_active = False
-            self.question_button.config(state=tk.DISABLED)
-            messagebox.showinfo("⏰ Time's Up!", 
-                              f"Game over! You reached Level {self.level} with {self.score} points.\n\n" +
-                              f"Thanks for playing Learning Quest!")
-
-            # Ask for player name to save score
-            player_name = simpledialog.askstring("Game Over", 
-                                                "Enter your name for the high score:")
-            if player_name:
-                self.save_high_score(player_name, self.score)
+    def get_score_journal(self):
+        """Open the high score database and start the journal that writes to it"""
+        if self.score_journal is None:
+            from learning_quest_journal import ScoreJournal
+            from learning_quest_scores import ScoreStore
+
+            self.score_store = ScoreStore()
+            self.score_journal = ScoreJournal(self.score_store)
+            self.score_journal.start()
+        return self.score_journal
 
     def save_high_score(self, name, score):
-        """Save the player's score to a file"""
-        try:
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-            score_entry = f"{name},{score},{self.level},{timestamp}\n"
+        """Queue the player's score; the journal writes it in the background"""
+        from tkinter import messagebox
 
-            with open("learning_quest_scores.txt", "a") as file:
-                file.write(score_entry)
+        try:
+            self.get_score_journal().append(name, score, self.engine.level)
 
             messagebox.showinfo("💾 Score Saved", 
                               f"Your score has been saved!\n\n" +
                               f"Player: {name}\n" +
                               f"Score: {score}\n" +
-                              f"Level: {self.level}")
+                              f"Level: {self.engine.level}")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save score: {str(e)}")
 
     def show_high_scores(self):
         """Display the high scores"""
+        from tkinter import messagebox
+
         try:
-            scores = []
-            with open("learning_quest_scores.txt", "r") as file:
-                for line in file:
-                    if line.strip():
-                        parts = line.strip().split(",")
-                        if len(parts) >= 4:
-                            name, score, level, timestamp = parts[0], int(parts[1]), int(parts[2]), parts[3]
-                            scores.append((name, score, level, timestamp))
-
-            # Sort by score (descending)
-            scores.sort(key=lambda x: x[1], reverse=True)
-
-            # Create high scores window
-            scores_window = tk.Toplevel(self.root)
-            scores_window.title("🏆 High Scores")
-            scores_window.geometry("500x400")
-            scores_window.configure(bg="#ecf0f1")
-
-            # Header
-            header = tk.Label(scores_window, text="🏆 Learning Quest High Scores", 
-                            font=("Arial", 18, "bold"), bg="#3498db", fg="white")
-            header.pack(fill=tk.X, pady=(0, 20))
-
-            # Scores frame with scrollbar
-            scores_frame = tk.Frame(scores_window, bg="#ecf0f1")
-            scores_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-
-            if scores:
-                # Display top 10 scores
-                for i, (name, score, level, timestamp) in enumerate(scores[:10]):
-                    rank = i + 1
-                    medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
-
-                    score_text = f"{medal} {name} - {score} pts (Level {level})"
-
-                    score_label = tk.Label(scores_frame, text=score_text, 
-                                         font=("Arial", 12), bg="#ffffff", 
-                                         relief=tk.RAISED, bd=1, pady=5)
-                    score_label.pack(fill=tk.X, pady=2)
+            journal = self.get_score_journal()
+            # Write our queued scores and pick up the ones written by other copies of the game
+            journal.flush(sync_store=True, timeout=5.0)
+            if journal.last_error is not None:
+                raise journal.last_error
+            store = self.score_store
+
+            if store.count() == 0:
+                messagebox.showinfo("No Scores", "No high scores found yet!\nPlay the game to set the first record!")
+                return
+
+            # The leaderboard only ever loads the rows it shows, so reuse it if it is open
+            if self.leaderboard is not None and self.leaderboard.exists():
+                self.leaderboard.refresh()
+                self.leaderboard.window.lift()
             else:
-                no_scores_label = tk.Label(scores_frame, text="No high scores yet!\nBe the first to play!", 
-                                         font=("Arial", 14), bg="#ecf0f1")
-                no_scores_label.pack(pady=50)
+                from learning_quest_leaderboard import LeaderboardView
+                self.leaderboard = LeaderboardView(self.root, store)
 
-        except FileNotFoundError:
-            messagebox.showinfo("No Scores", "No high scores found yet!\nPlay the game to set the first record!")
         except Exception as e:
             messagebox.showerror("Error", f"Could not load high scores: {str(e)}")
 
+    def shutdown(self):
+        """Finish writing queued scores and the recording before the program exits"""
+        if self.score_journal is not None:
+            self.score_journal.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def play_replay(self, path, speed=1.0):
+        """Play a recorded session in the window at its recorded speed (times `speed`)"""
+        from tkinter import messagebox
+        from learning_quest_replay import Replay, ReplayError
+
+        try:
+            replay = Replay(path)
+            engine = replay.build_engine(self.engine.questions)
+        except (OSError, ReplayError) as e:
+            messagebox.showerror("Replay", f"Could not load the replay:\n{e}")
+            return
+
+        # The replay drives the engine on its own: no timers, input or recording
+        self.stop_game_jobs()
+        self.stop_replay()
+        self.clear_input()
+        self.question_button.config(state=tk.DISABLED)
+        engine.profiler = self.profiler
+        self.live_engine = self.engine
+        self.engine = engine
+        self.replay = (replay.actions, 0, time.monotonic(), speed)
+        self.replay_next()
+
+    def replay_next(self):
+        """Apply the replay actions that are due, redraw and wait for the next one"""
+        self.replay_job = None
+        actions, position, started, speed = self.replay
+        elapsed = (time.monotonic() - started) * speed
+
+        events = []
+        while position < len(actions) and actions[position][0] <= elapsed:
+            action = actions[position][1]
+            position += 1
+            if action == "start":
+                self.canvas.delete("all")
+                self.scene.reset()
+                self.toasts.clear()
+            events.extend(self.engine.step(action))
+        self.replay = (actions, position, started, speed)
+
+        # Show play feedback as usual, but never open the end-of-game dialogs
+        for event in events:
+            if event[0] in ("victory", "time_up"):
+                self.toasts.notify("Replay 🎬", f"Game over with {event[1]} points", "info")
+        self.handle_events([event for event in events if event[0] not in ("victory", "time_up")])
+        if self.engine.game_active or events:
+            self.update_status()
+            self.draw_game()
+
+        if position < len(actions):
+            delay_ms = max(0, int((actions[position][0] - elapsed) / speed * 1000))
+            self.replay_job = self.root.after(delay_ms, self.replay_next)
+        else:
+            self.toasts.notify("Replay 🎬", "End of the recording", "info")
+            self.draw_game()
+            self.fade_toasts()
+            self.replay = None
+
+    def stop_replay(self):
+        """Stop a replay (if one is shown) and switch back to the player's engine"""
+        if self.replay_job is not None:
+            self.root.after_cancel(self.replay_job)
+            self.replay_job = None
+        self.replay = None
+        if self.live_engine is not None:
+            self.engine = self.live_engine
+            self.live_engine = None
+
     def show_help(self):
-        """Display help information"""
-        help_window = tk.Toplevel(self.root)
+        """Display help information (the window is built once and shown again later)"""
+        if self.help_window is not None and self.help_window.winfo_exists():
+            self.help_window.deiconify()
+            self.help_window.lift()
+            return
+
+        help_window = self.help_window = tk.Toplevel(self.root)
+        help_window.protocol("WM_DELETE_WINDOW", help_window.withdraw)
         help_window.title("❓ Help - Learning Quest")
         help_window.geometry("600x500")
         help_window.configure(bg="#ecf0f1")
@@ -706,6 +906,7 @@ Learn Python programming concepts while playing a fun adventure game!
 🎮 CONTROLS:
 • Use ← → ↑ ↓ arrow keys to move your character
 • Click 'Answer Question' to solve programming challenges
+• F3 shows performance numbers, F4 saves them to learning_quest_profile.jsonl
 
 🏆 SCORING:
 • Collect 🟡 yellow circles: +10 points each
@@ -741,22 +942,51 @@ Good luck on your learning adventure! 🚀
                             bg="#ffffff", justify=tk.LEFT, anchor=tk.NW)
         help_label.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
+# Printed when the game starts
+BANNER = """🎮 Starting Learning Quest - Code in Place Final Project
+
+This game demonstrates the following Python concepts from Code in Place:
+✓ Object-oriented programming with classes
+✓ Graphics programming with tkinter
+✓ Event handling and user input
+✓ Randomization with the random module
+✓ Data structures: lists and dictionaries
+✓ File I/O for saving high scores
+✓ Game logic and state management
+✓ Functions and methods
+✓ Conditional statements and loops
+
+Launching game window..."""
+
 def main():
     """Main function to run the Learning Quest game"""
-    print("🎮 Starting Learning Quest - Code in Place Final Project")
-    print()
-    print("This game demonstrates the following Python concepts from Code in Place:")
-    print("✓ Object-oriented programming with classes")
-    print("✓ Graphics programming with tkinter")
-    print("✓ Event handling and user input")
-    print("✓ Randomization with the random module")
-    print("✓ Data structures: lists and dictionaries")
-    print("✓ File I/O for saving high scores")
-    print("✓ Game logic and state management")
-    print("✓ Functions and methods")
-    print("✓ Conditional statements and loops")
-    print()
-    print("Launching game window...")
+    main_started = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Learning Quest - Code in Place Final Project")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the game's random numbers")
+    parser.add_argument("--record", metavar="LOG", help="record the session to a replay log")
+    parser.add_argument("--replay", metavar="LOG", help="play a recorded session in the window")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (2 = twice as fast)")
+    parser.add_argument("--server", metavar="ADDRESS",
+                        help="play on a game server (host:port or unix:/path) instead of locally")
+    parser.add_argument("--world", metavar="COLUMNSxROWS", default="1x1",
+                        help="play in a scrolling world of screen-sized chunks, e.g. 50x50")
+    parser.add_argument("--quiet", action="store_true", help="do not print the banner")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="print how long it takes until the window is interactive, then exit")
+    parser.add_argument("--startup-budget-ms", type=float, default=None,
+                        help="with --measure-startup, exit with status 1 if startup took longer")
+    args = parser.parse_args()
+    try:
+        world_chunks = tuple(int(size) for size in args.world.lower().split("x"))
+    except ValueError:
+        world_chunks = ()
+    if len(world_chunks) != 2 or min(world_chunks) < 1:
+        parser.error("--world must look like 20x20")
+    if args.server and (args.record or args.replay):
+        parser.error("--record and --replay only work with a local game")
+
+    if not args.quiet:
+        print(BANNER, flush=True)
 
     # Create the main window and game instance
     root = tk.Tk()
@@ -767,13 +997,47 @@ def main():
     except:
         pass  # Icon file not found, continue without it
 
-    # Create the game
-    game = LearningQuestGame(root)
+    # Create the game (on a game server if one is given)
+    engine = None
+    if args.server:
+        from learning_quest_server import RemoteEngine
+        engine = RemoteEngine(args.server, seed=args.seed, rules={"world_chunks": world_chunks})
+    game = LearningQuestGame(root, seed=args.seed, record_path=args.record, engine=engine,
+                             rules=GameRules(world_chunks=world_chunks))
+    if args.replay:
+        root.after(100, game.play_replay, args.replay, args.speed)
+
+    startup = None
+    if args.measure_startup:
+        startup = {"imports_ms": (main_started - STARTED_AT) * 1000,
+                   "window_ms": (time.perf_counter() - STARTED_AT) * 1000}
+        # The first idle callback after the loop starts runs once the window has been drawn
+        root.after(0, root.after_idle, finish_startup_measurement, root, startup)
 
     # Start the tkinter event loop
     root.mainloop()
+    game.shutdown()
+    if engine is not None:
+        engine.close()
+
+    if startup is not None:
+        print(f"Startup: imports {startup['imports_ms']:.1f} ms, window built {startup['window_ms']:.1f} ms, "
+              f"interactive {startup['interactive_ms']:.1f} ms")
+        if args.startup_budget_ms is not None and startup["interactive_ms"] > args.startup_budget_ms:
+            print(f"Startup took longer than the budget of {args.startup_budget_ms:.0f} ms")
+            sys.exit(1)
+        return
+
+    if not args.quiet:
+        print("Thanks for playing Learning Quest! 🎓")
+
+
+def finish_startup_measurement(root, startup):
+    """Record the time until the first interactive frame and close the window"""
+    root.update_idletasks()
+    startup["interactive_ms"] = (time.perf_counter() - STARTED_AT) * 1000
+    root.destroy()
 
-    print("Thanks for playing Learning Quest! 🎓")
 
 # Run the game if this script is executed directly
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+Learning Quest - Score Journal
+
+A write-behind journal in front of the high score database. Saving a score
+only puts it on a queue; a background thread writes the queued scores to the
+journal file (learning_quest_scores.txt, same "name,score,level,timestamp"
+format as before) in batches, so the game window never waits for the disk.
+
+Several copies of the game can share one journal: every batch is written
+while holding an advisory lock on the file, so lines from different writers
+never interleave. When the journal grows past a size limit it is compacted:
+its scores are imported into the SQLite store (the snapshot) and the file is
+emptied, again under the lock.
+"""
+
+import os
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from learning_quest_scores import SCORES_FILE
+
+
+def lock_file(file):
+    """Take an exclusive advisory lock on an open file (waits for other writers)"""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(file):
+    """Release the lock taken by lock_file"""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class _Request:
+    """A flush/sync/stop request for the journal thread"""
+
+    def __init__(self, sync=False, stop=False):
+        self.sync = sync
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class ScoreJournal:
+    """
+    Queues score records and writes them to the journal file in batches on a
+    background thread.
+
+    fsync controls durability: "batch" syncs the file after every batch,
+    "interval" at most once every fsync_interval seconds, and "never" leaves
+    it to the operating system.
+    """
+
+    def __init__(self, store, path=SCORES_FILE, batch_size=64, flush_interval=0.5,
+                 fsync="batch", fsync_interval=5.0, compact_bytes=1024 * 1024):
+        """Create the journal (call start() to start the writer thread)"""
+        if fsync not in ("batch", "interval", "never"):
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+
+        self.store = store
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+
+        self.queue = queue.Queue()
+        self.thread = None
+        self.last_fsync = time.monotonic()
+        # The last error the writer thread ran into (the records are kept and retried)
+        self.last_error = None
+
+    def start(self):
+        """Start the background writer thread"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="score-journal", daemon=True)
+            self.thread.start()
+
+    def append(self, name, score, level, timestamp=None):
+        """Queue a score to be written (returns immediately)"""
+        if timestamp is None:
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        # Commas and newlines would break the line format
+        name = " ".join(str(name).replace(",", " ").split())
+        self.queue.put((name, int(score), int(level), timestamp))
+
+    def flush(self, sync_store=False, timeout=None):
+        """
+        Wait until everything queued so far is written. With sync_store the
+        journal is also imported into the store, so queries see the new scores.
+        Returns False if the timeout ran out first.
+        """
+        request = _Request(sync=sync_store)
+        self.queue.put(request)
+        return request.done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Write everything that is still queued and stop the writer thread"""
+        if self.thread is None:
+            return
+        request = _Request(stop=True)
+        self.queue.put(request)
+        request.done.wait(timeout)
+        self.thread = None
+
+    def run(self):
+        """Writer thread: collect records into batches and write them"""
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0.0, deadline - time.monotonic())
+
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _Request):
+                batch = self.write_batch(batch)
+                if item.sync and not batch:
+                    self.sync_store()
+                item.done.set()
+                if item.stop:
+                    return
+            elif item is not None:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+
+            # Write when the batch is full or its oldest record has waited long enough
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                batch = self.write_batch(batch)
+                if batch:
+                    # Writing failed, try again after another interval
+                    deadline = time.monotonic() + self.flush_interval
+
+    def write_batch(self, batch):
+        """Append a batch to the journal file under the lock; returns what is left unwritten"""
+        if not batch:
+            return batch
+
+        data = "".join(f"{name},{score},{level},{timestamp}\n"
+                       for name, score, level, timestamp in batch).encode("utf-8")
+        try:
+            with open(self.path, "ab") as file:
+                lock_file(file)
+                try:
+                    file.write(data)
+                    file.flush()
+                    self.sync_file(file)
+
+                    if file.tell() >= self.compact_bytes:
+                        self.compact(file)
+                finally:
+                    unlock_file(file)
+        except Exception as e:
+            self.last_error = e
+            return batch
+
+        self.last_error = None
+        return []
+
+    def sync_file(self, file):
+        """fsync the journal according to the fsync policy"""
+        now = time.monotonic()
+        if self.fsync == "batch" or (self.fsync == "interval" and
+                                     now - self.last_fsync >= self.fsync_interval):
+            os.fsync(file.fileno())
+            self.last_fsync = now
+
+    def compact(self, file):
+        """Move the journal's scores into the store and empty the file (lock must be held)"""
+        self.store.import_csv(self.path)
+        file.truncate(0)
+        os.fsync(file.fileno())
+        self.store.import_csv(self.path)  # records the new, empty file
+
+    def sync_store(self):
+        """Import the journal into the store while holding the lock"""
+        try:
+            with open(self.path, "ab") as file:
+                lock_file(file)
+                try:
+                    self.store.import_csv(self.path)
+                finally:
+                    unlock_file(file)
+        except Exception as e:
+            self.last_error = e
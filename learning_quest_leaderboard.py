@@ -0,0 +1,169 @@
+"""
+Learning Quest - Leaderboard Window
+
+A virtualized list of high scores: the window owns a fixed number of row
+labels and, while scrolling, only changes their text to show the rows that
+are visible. Rows are read from the ScoreStore a small page at a time, so the
+window uses the same amount of memory and widgets for 10 scores or for
+hundreds of thousands.
+
+Typing in the name box or choosing a level filters the list as you type.
+"""
+
+import tkinter as tk
+
+
+class LeaderboardView:
+    """
+    The High Scores window, showing a scrollable, filterable view over a
+    ScoreStore without ever loading more than one page of rows.
+    """
+
+    def __init__(self, root, store, visible_rows=10, page_size=50, filter_delay_ms=150):
+        """Build the window with a fixed pool of row widgets"""
+        self.root = root
+        self.store = store
+        self.visible_rows = visible_rows
+        self.page_size = page_size
+        self.filter_delay_ms = filter_delay_ms
+
+        # What is shown: the first visible rank and the rows matching the filter
+        self.first_row = 0
+        self.total = 0
+        self.name_filter = ""
+        self.level_filter = None
+
+        # A small cache of rows around the visible ones
+        self.cache_start = 0
+        self.cache_rows = []
+        self.filter_job = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("🏆 High Scores")
+        self.window.geometry("500x480")
+        self.window.configure(bg="#ecf0f1")
+
+        # Header
+        header = tk.Label(self.window, text="🏆 Learning Quest High Scores",
+                        font=("Arial", 18, "bold"), bg="#3498db", fg="white")
+        header.pack(fill=tk.X, pady=(0, 10))
+
+        # Filters: player name and level
+        filter_frame = tk.Frame(self.window, bg="#ecf0f1")
+        filter_frame.pack(fill=tk.X, padx=20)
+
+        tk.Label(filter_frame, text="Player:", font=("Arial", 11), bg="#ecf0f1").pack(side=tk.LEFT)
+        self.name_var = tk.StringVar()
+        self.name_var.trace_add("write", lambda *args: self.schedule_filter())
+        tk.Entry(filter_frame, textvariable=self.name_var, width=18).pack(side=tk.LEFT, padx=5)
+
+        tk.Label(filter_frame, text="Level:", font=("Arial", 11), bg="#ecf0f1").pack(side=tk.LEFT, padx=(10, 0))
+        self.level_var = tk.StringVar(value="All")
+        tk.OptionMenu(filter_frame, self.level_var, "All", "1", "2", "3",
+                      command=lambda value: self.apply_filter()).pack(side=tk.LEFT, padx=5)
+
+        self.count_label = tk.Label(filter_frame, text="", font=("Arial", 10), bg="#ecf0f1", fg="#7f8c8d")
+        self.count_label.pack(side=tk.RIGHT)
+
+        # Scores frame with scrollbar
+        list_frame = tk.Frame(self.window, bg="#ecf0f1")
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+        self.scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        rows_frame = tk.Frame(list_frame, bg="#ecf0f1")
+        rows_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # The row widgets are created once and reused for whatever rows are visible
+        self.row_labels = []
+        for _ in range(visible_rows):
+            label = tk.Label(rows_frame, text="", font=("Arial", 12), bg="#ffffff",
+                           relief=tk.RAISED, bd=1, pady=5)
+            label.pack(fill=tk.X, pady=2)
+            self.row_labels.append(label)
+
+        # Mouse wheel scrolling (Windows/macOS and X11). Bound on the window only: every widget
+        # in it has the window in its bindtags, so binding the rows too would scroll twice
+        self.window.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.window.bind("<Button-4>", lambda event: self.scroll_to(self.first_row - 3))
+        self.window.bind("<Button-5>", lambda event: self.scroll_to(self.first_row + 3))
+
+        self.refresh()
+
+    def exists(self):
+        """Check if the window is still open"""
+        return bool(self.window.winfo_exists())
+
+    def refresh(self):
+        """Re-count the matching rows and show the list from the top"""
+        self.total = self.store.count(self.name_filter, self.level_filter)
+        self.cache_start = 0
+        self.cache_rows = []
+        self.count_label.config(text=f"{self.total} scores")
+        self.scroll_to(0)
+
+    def schedule_filter(self):
+        """Apply the name filter once typing pauses"""
+        if self.filter_job is not None:
+            self.window.after_cancel(self.filter_job)
+        self.filter_job = self.window.after(self.filter_delay_ms, self.apply_filter)
+
+    def apply_filter(self):
+        """Read the filter widgets and show the matching rows"""
+        self.filter_job = None
+        self.name_filter = self.name_var.get().strip()
+        level = self.level_var.get()
+        self.level_filter = int(level) if level.isdigit() else None
+        self.refresh()
+
+    def rows(self, start, count):
+        """Rows start..start+count, loading a new page into the cache when needed"""
+        end = start + count
+        if start < self.cache_start or end > self.cache_start + len(self.cache_rows):
+            # Load a page centered on the visible rows
+            self.cache_start = max(0, start - (self.page_size - count) // 2)
+            self.cache_rows = self.store.page(self.cache_start, self.page_size,
+                                              self.name_filter, self.level_filter)
+        offset = start - self.cache_start
+        return self.cache_rows[offset:offset + count]
+
+    def scroll_to(self, first_row):
+        """Show the rows starting at first_row"""
+        last_start = max(0, self.total - self.visible_rows)
+        self.first_row = max(0, min(int(first_row), last_start))
+        self.render()
+
+    def render(self):
+        """Update the recycled row labels with the visible rows"""
+        rows = self.rows(self.first_row, self.visible_rows)
+
+        for i, label in enumerate(self.row_labels):
+            if i < len(rows):
+                name, score, level, timestamp = rows[i]
+                rank = self.first_row + i + 1
+                medal = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
+                label.config(text=f"{medal} {name} - {score} pts (Level {level})", relief=tk.RAISED)
+            elif i == 0 and self.total == 0:
+                label.config(text="No matching scores", relief=tk.FLAT)
+            else:
+                label.config(text="", relief=tk.FLAT)
+
+        # Scrollbar thumb shows the visible part of all matching rows
+        if self.total:
+            self.scrollbar.set(self.first_row / self.total,
+                               min(1.0, (self.first_row + self.visible_rows) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def on_scrollbar(self, command, value, unit=None):
+        """Handle drags and clicks on the scrollbar"""
+        if command == "moveto":
+            self.scroll_to(float(value) * self.total)
+        elif command == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_to(self.first_row + int(value) * step)
+
+    def on_mouse_wheel(self, event):
+        """Scroll three rows per wheel notch"""
+        self.scroll_to(self.first_row - 3 * (1 if event.delta > 0 else -1))
@@ -0,0 +1,235 @@
+"""
+Learning Quest - Load Generator
+
+Plays thousands of simulated sessions against a game server at once to show
+how many it can host. Sessions are spread over a number of connections; each
+one moves a few times a second, answers a question now and then, sends a
+tick every second like the real game and starts a new game when one ends.
+
+Response latency percentiles, the request rate, errors and the server's
+memory per session are printed at the end. Without --server a server is
+started in a child process (on a Unix socket where available) and stopped
+afterwards.
+
+Usage:
+    python learning_quest_loadgen.py --sessions 5000 --duration 20
+    python learning_quest_loadgen.py --server 127.0.0.1:8765 --sessions 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from learning_quest_server import parse_address
+
+MOVES = ("left", "right", "up", "down")
+
+
+class LoadConnection:
+    """One connection to the server that many simulated sessions send requests over"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.next_id = 0
+        self.latencies = []
+        self.errors = 0
+        self.reader_task = asyncio.ensure_future(self.read_responses())
+
+    async def read_responses(self):
+        """Hand every response to the request waiting for it"""
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.pending.pop(response["id"], None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.pending.values():
+            future.set_exception(ConnectionError("The game server closed the connection"))
+
+    async def request(self, request):
+        """Send one request and wait for its response"""
+        self.next_id += 1
+        request["id"] = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+
+        started = time.perf_counter()
+        self.writer.write(json.dumps(request, separators=(",", ":")).encode("utf-8") + b"\n")
+        response = await future
+        self.latencies.append(time.perf_counter() - started)
+        if not response.get("ok"):
+            self.errors += 1
+        return response
+
+    def close(self):
+        """Close the connection"""
+        self.reader_task.cancel()
+        self.writer.close()
+
+
+async def connect(address):
+    """Open a LoadConnection to a parsed address"""
+    if address[0] == "unix":
+        reader, writer = await asyncio.open_unix_connection(address[1])
+    else:
+        reader, writer = await asyncio.open_connection(address[1], address[2])
+    return LoadConnection(reader, writer)
+
+
+async def play_session(connection, rng, deadline, moves_per_second, question_rate):
+    """Play one simulated session until the deadline"""
+    response = await connection.request({"op": "new", "seed": rng.randrange(2 ** 32)})
+    if not response.get("ok"):
+        return
+    session = response["session"]
+    await connection.request({"op": "step", "session": session, "action": "start"})
+
+    # Spread the sessions over the first second so they do not all tick together
+    await asyncio.sleep(rng.random())
+    next_tick = time.monotonic() + 1.0
+    pause = 1.0 / moves_per_second
+    while time.monotonic() < deadline:
+        if time.monotonic() >= next_tick:
+            action = "tick"
+            next_tick += 1.0
+        elif rng.random() < question_rate:
+            await connection.request({"op": "step", "session": session, "action": "ask"})
+            action = ["answer", rng.randrange(4)]
+        else:
+            action = rng.choice(MOVES)
+
+        response = await connection.request({"op": "step", "session": session, "action": action})
+        if response.get("ok") and not response["state"]["game_active"]:
+            await connection.request({"op": "step", "session": session, "action": "start"})
+        await asyncio.sleep(pause * (0.5 + rng.random()))
+
+    await connection.request({"op": "close", "session": session})
+
+
+def percentile(sorted_values, percent):
+    """A percentile of a sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+async def run_load(address, sessions, connections, duration, moves_per_second=5.0,
+                   question_rate=0.05, seed=None):
+    """Run the load test against a parsed address and return a report dict"""
+    rng = random.Random(seed)
+    pool = [await connect(address) for _ in range(min(connections, sessions))]
+    before = (await pool[0].request({"op": "stats"}))["stats"]
+
+    started = time.monotonic()
+    deadline = started + duration
+    players = [play_session(pool[i % len(pool)], random.Random(rng.random()), deadline,
+                            moves_per_second, question_rate)
+               for i in range(sessions)]
+
+    # Look at the server while every session is running
+    async def sample_stats():
+        await asyncio.sleep(min(duration / 2, 5.0))
+        return (await pool[0].request({"op": "stats"}))["stats"]
+
+    results = await asyncio.gather(sample_stats(), *players, return_exceptions=True)
+    elapsed = time.monotonic() - started
+    during = results[0]
+    failures = [result for result in results[1:] if isinstance(result, Exception)]
+
+    latencies = sorted(latency for connection in pool for latency in connection.latencies)
+    errors = sum(connection.errors for connection in pool)
+    for connection in pool:
+        connection.close()
+
+    report = {
+        "sessions": sessions,
+        "connections": len(pool),
+        "seconds": elapsed,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / elapsed,
+        "errors": errors,
+        "failed_sessions": len(failures),
+        "latency_ms": {f"p{p}": percentile(latencies, p) * 1000 for p in (50, 95, 99)},
+        "server_sessions": during.get("sessions") if isinstance(during, dict) else None,
+    }
+    if isinstance(during, dict) and "max_rss_kb" in during and "max_rss_kb" in before:
+        report["server_rss_kb"] = during["max_rss_kb"]
+        report["kb_per_session"] = (during["max_rss_kb"] - before["max_rss_kb"]) / sessions
+    return report
+
+
+def start_server_process(folder):
+    """Start a game server in a child process and return (process, address)"""
+    if hasattr(socket, "AF_UNIX"):
+        path = os.path.join(folder, "learning_quest.sock")
+        command = ["--unix", path]
+        address = ("unix", path)
+    else:
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        command = ["--port", str(port)]
+        address = ("tcp", "127.0.0.1", port)
+
+    server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "learning_quest_server.py")
+    process = subprocess.Popen([sys.executable, server_script, "--max-sessions", "1000000"] + command,
+                               stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # "listening on ..." once it is ready
+    return process, address
+
+
+def main():
+    """Run a load test from the command line"""
+    parser = argparse.ArgumentParser(description="Load test a Learning Quest game server")
+    parser.add_argument("--server", metavar="ADDRESS",
+                        help="host:port or unix:/path (default: start a server for the test)")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to play")
+    parser.add_argument("--moves-per-second", type=float, default=5.0, help="moves per session per second")
+    parser.add_argument("--question-rate", type=float, default=0.05, help="chance an action is a question")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        process = None
+        if args.server:
+            address = parse_address(args.server)
+        else:
+            process, address = start_server_process(folder)
+        try:
+            report = asyncio.run(run_load(address, args.sessions, args.connections, args.duration,
+                                          args.moves_per_second, args.question_rate, args.seed))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    if args.json:
+        print(json.dumps(report))
+        return
+
+    print(f"{report['sessions']} sessions over {report['connections']} connections "
+          f"for {report['seconds']:.1f}s (server had {report['server_sessions']} sessions)")
+    print(f"{report['requests']} requests, {report['requests_per_second']:.0f}/s, "
+          f"{report['errors']} errors, {report['failed_sessions']} failed sessions")
+    print("Latency: " + ", ".join(f"{name} {ms:.2f} ms" for name, ms in report["latency_ms"].items()))
+    if "kb_per_session" in report:
+        print(f"Server memory: {report['server_rss_kb'] / 1024:.1f} MiB, "
+              f"about {report['kb_per_session']:.1f} KiB per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Learning Quest - Adaptive Question Scheduler
+
+Chooses the next question like a spaced-repetition flash card system. Every
+answer updates the player's mastery statistics for that question: a right
+answer pushes the next review further away (doubling each time in a row),
+a wrong answer brings the question back soon.
+
+Questions the player has seen wait in one heap per level, ordered by when
+they are due. Once due they move to a second heap ordered by how weak the
+player is on them, so the weakest due question comes first and picking the
+next question costs O(log n) however big the bank is. Questions that are not
+due yet make room for new ones from the no-repeat QuestionSampler.
+
+The statistics are saved per player in an SQLite database, one row per
+question, and every answer only writes the row for that question.
+"""
+
+import heapq
+import itertools
+import sqlite3
+import time
+
+MASTERY_DB = "learning_quest_mastery.db"
+
+
+class MasteryStore:
+    """Per-player question statistics saved in SQLite, one row per question"""
+
+    def __init__(self, path=MASTERY_DB):
+        """Open (or create) the mastery database"""
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.executescript("""
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = NORMAL;
+                CREATE TABLE IF NOT EXISTS mastery (
+                    player TEXT NOT NULL,
+                    question_id TEXT NOT NULL,
+                    level INTEGER NOT NULL,
+                    question_index INTEGER NOT NULL,
+                    correct INTEGER NOT NULL,
+                    wrong INTEGER NOT NULL,
+                    streak INTEGER NOT NULL,
+                    due REAL NOT NULL,
+                    PRIMARY KEY (player, question_id)
+                );
+            """)
+
+    def load(self, player):
+        """All saved statistics of a player as {question_id: stats}"""
+        rows = self.connection.execute(
+            "SELECT question_id, level, question_index, correct, wrong, streak, due "
+            "FROM mastery WHERE player = ?", (player,))
+        return {row[0]: list(row[1:]) for row in rows}
+
+    def save(self, player, question_id, stats):
+        """Save (insert or replace) the statistics of one question"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO mastery "
+                "(player, question_id, level, question_index, correct, wrong, streak, due) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [player, question_id] + list(stats))
+
+    def close(self):
+        """Close the database"""
+        self.connection.close()
+
+
+class AdaptiveScheduler:
+    """
+    Picks questions from due reviews first and new questions otherwise.
+
+    Statistics per question are [level, index, correct, wrong, streak, due].
+    Waiting heap entries are (due, -weakness, sequence, question_id) and due
+    ones are (-weakness, due, sequence, question_id); an entry whose due time
+    no longer matches the statistics is outdated and skipped.
+    """
+
+    # Seconds until a question comes back after a wrong answer, and the first
+    # review interval after a right one (doubled for every right answer in a row)
+    retry_delay = 30.0
+    review_interval = 120.0
+    # Seconds a skipped review waits before it is offered again
+    skip_delay = 15.0
+
+    def __init__(self, bank, sampler, store=None, player="default", clock=time.time):
+        """Create a scheduler, loading the player's saved statistics"""
+        self.bank = bank
+        self.sampler = sampler
+        self.store = store
+        self.player = player
+        self.clock = clock
+
+        self.stats = store.load(player) if store is not None else {}
+        self.sequence = itertools.count()
+        self.heaps = {}  # level -> reviews waiting to be due
+        self.due = {}  # level -> due reviews, weakest first
+        for question_id, stats in self.stats.items():
+            self.heaps.setdefault(stats[0], []).append(self.heap_entry(question_id, stats))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def heap_entry(self, question_id, stats):
+        """The heap entry for a question: due time first, weakest first on ties"""
+        level, index, correct, wrong, streak, due = stats
+        weakness = (wrong + 1) / (correct + wrong + 2)
+        return (due, -weakness, next(self.sequence), question_id)
+
+    def is_current(self, question_id, due):
+        """Check if a heap entry still matches the statistics of its question"""
+        stats = self.stats.get(question_id)
+        return stats is not None and stats[5] == due
+
+    def release_due(self, level):
+        """Move the reviews of a level that have become due to its weakest-first heap"""
+        heap = self.heaps.get(level)
+        now = self.clock()
+        while heap and heap[0][0] <= now:
+            due, weakness, sequence, question_id = heapq.heappop(heap)
+            if self.is_current(question_id, due):
+                heapq.heappush(self.due.setdefault(level, []), (weakness, due, sequence, question_id))
+
+    def next_review(self, level, due_only):
+        """
+        The weakest due review of a level, or (unless due_only) the one due soonest.
+
+        Its entry stays on the heap until record() or defer() outdates it, so a
+        question that is never answered is still due the next time.
+        """
+        self.release_due(level)
+        for heap, due_position in ((self.due.get(level), 1), (None if due_only else self.heaps.get(level), 0)):
+            while heap:
+                entry = heap[0]
+                question_id = entry[3]
+                if not self.is_current(question_id, entry[due_position]):
+                    heapq.heappop(heap)  # outdated entry
+                    continue
+
+                index = self.stats[question_id][1]
+                # The packs may have changed since the statistics were saved
+                if index < self.bank.count(level):
+                    question = self.bank.get(level, index)
+                    if question["id"] == question_id:
+                        return index, question
+                heapq.heappop(heap)
+                del self.stats[question_id]
+        return None
+
+    def draw(self, level):
+        """Return (index, question) for the next question of a level"""
+        review = self.next_review(level, due_only=True)
+        if review is not None:
+            return review
+
+        # Nothing due: try a question the player has never seen
+        for _ in range(min(8, self.bank.count(level))):
+            index, question = self.sampler.draw(level)
+            if question["id"] not in self.stats:
+                return index, question
+
+        # Every question has been seen: take the one due soonest
+        review = self.next_review(level, due_only=False)
+        if review is not None:
+            return review
+        return self.sampler.draw(level)
+
+    def record(self, level, index, question, correct):
+        """Update the mastery statistics after an answer and save them"""
+        question_id = question["id"]
+        stats = self.stats.get(question_id) or [level, index, 0, 0, 0, 0.0]
+        stats[0] = level
+        stats[1] = index
+
+        if correct:
+            stats[2] += 1
+            stats[4] += 1
+            stats[5] = self.clock() + self.review_interval * 2 ** (stats[4] - 1)
+        else:
+            stats[3] += 1
+            stats[4] = 0
+            stats[5] = self.clock() + self.retry_delay
+
+        self.stats[question_id] = stats
+        heapq.heappush(self.heaps.setdefault(level, []), self.heap_entry(question_id, stats))
+        self.compact(level)
+
+        if self.store is not None:
+            self.store.save(self.player, question_id, stats)
+
+    def defer(self, question):
+        """Offer a skipped review again only after skip_delay (new questions are left alone)"""
+        stats = self.stats.get(question["id"])
+        if stats is None:
+            return
+        # Only for this session: the saved due time stays as it was
+        stats[5] = max(stats[5], self.clock() + self.skip_delay)
+        heapq.heappush(self.heaps.setdefault(stats[0], []), self.heap_entry(question["id"], stats))
+        self.compact(stats[0])
+
+    def compact(self, level):
+        """Drop outdated heap entries once they outnumber the live ones"""
+        for heaps, due_position in ((self.heaps, 0), (self.due, 1)):
+            heap = heaps.get(level, [])
+            if len(heap) > 2 * len(self.stats) + 16:
+                heaps[level] = [entry for entry in heap if self.is_current(entry[3], entry[due_position])]
+                heapq.heapify(heaps[level])
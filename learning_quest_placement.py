@@ -0,0 +1,177 @@
+"""
+Learning Quest - Entity Placement
+
+Places obstacles and collectibles so a level always gets as many as the
+rules ask for, spread out evenly instead of in random clumps.
+
+scatter() uses Poisson-disk sampling (Bridson's algorithm): points are grown
+outwards from random starting points, each new one at least `radius` away
+from all others, which a background grid of radius / sqrt(2) cells checks
+in constant time. The result is "blue noise": no two points close together
+and no large empty patches. The radius is chosen from the number of points
+that are needed and growing stops as soon as there are enough, so the work
+grows with the count, not with the size of the area or how many random
+tries fail.
+
+find_spot() places a single entity (a respawned collectible) and only fails
+when there is no room left in the area.
+"""
+
+import math
+
+# Attempts around an active point before Bridson's algorithm retires it
+CANDIDATES_PER_POINT = 30
+
+# A Poisson-disk sample with radius r that leaves no room for more points has
+# about PACKING * area / r**2 of them; used to pick a radius that gives enough
+PACKING = 0.6
+
+# scatter() uses this fraction of the largest radius that fits
+RADIUS_MARGIN = 0.85
+
+# Random starting points tried per point needed before growing: cheaper than growing, whose
+# candidates often land outside a narrow area
+START_TRIES = 3
+
+
+def poisson_disk(rng, area, radius, allowed=None, candidates=CANDIDATES_PER_POINT, limit=None):
+    """
+    Points in an area (left, top, right, bottom) where allowed(x, y) is
+    true, all at least `radius` apart, as (x, y) integers.
+
+    Growing stops as soon as there are `limit` points; without a limit it
+    goes on until there is no room left for another one.
+    """
+    left, top, right, bottom = area
+    width = right - left
+    height = bottom - top
+    radius_squared = radius * radius
+    cell = radius / math.sqrt(2)
+    columns = int(width / cell) + 1
+    rows = int(height / cell) + 1
+    grid = [None] * (columns * rows)  # At most one point fits in a cell
+    points = []
+    active = []
+
+    def add(x, y):
+        point = (x, y)
+        grid[int(y / cell) * columns + int(x / cell)] = point
+        points.append(point)
+        active.append(point)
+
+    def is_free(x, y):
+        column = int(x / cell)
+        row = int(y / cell)
+        first_column = max(column - 2, 0)
+        last_column = min(column + 3, columns)
+        for near_row in range(max(row - 2, 0), min(row + 3, rows)):
+            start = near_row * columns
+            for other in grid[start + first_column:start + last_column]:
+                if other is not None and (other[0] - x) ** 2 + (other[1] - y) ** 2 < radius_squared:
+                    return False
+        return allowed is None or allowed(left + x, top + y)
+
+    def done():
+        return limit is not None and len(points) >= limit
+
+    def grow():
+        while active and not done():
+            index = rng.randrange(len(active))
+            x, y = active[index]
+            for _ in range(candidates):
+                # A random point in the ring between radius and 2 * radius around the active point
+                angle = 2 * math.pi * rng.random()
+                distance = radius * math.sqrt(1 + 3 * rng.random())
+                new_x = round(x + distance * math.cos(angle))
+                new_y = round(y + distance * math.sin(angle))
+                if 0 <= new_x <= width and 0 <= new_y <= height and is_free(new_x, new_y):
+                    add(new_x, new_y)
+                    break
+            else:
+                # No room left around this point
+                active[index] = active[-1]
+                active.pop()
+
+    # Start from random points all over the area: growing from just one would stop at the
+    # limit with the points bunched up around it
+    for _ in range((limit or 1) * START_TRIES):
+        if done():
+            break
+        x, y = round(width * rng.random()), round(height * rng.random())
+        if is_free(x, y):
+            add(x, y)
+    grow()
+
+    # Points cannot grow across parts that are not allowed (e.g. around obstacles), so start
+    # again in every part they did not reach. Points are only ever added, so a cell that is
+    # taken stays taken and one sweep over the grid cells (from a random one) finds them all.
+    cells = columns * rows
+    first = rng.randrange(cells)
+    number = first
+    while number < first + cells and not done():
+        row, column = divmod(number % cells, columns)
+        number += 1
+        x = min(round((column + 0.5) * cell), width)
+        y = min(round((row + 0.5) * cell), height)
+        if is_free(x, y):
+            add(x, y)
+            grow()
+
+    return [(left + x, top + y) for x, y in points]
+
+
+def scatter(rng, area, count, spacing, allowed=None):
+    """
+    `count` evenly spread points in an area where allowed(x, y) is true.
+
+    Points are at least `spacing` apart (further if the area has room for
+    it). Only if the allowed part of the area cannot hold `count` points
+    that far apart is the spacing reduced until they fit, and only if not
+    even that works are fewer points returned.
+    """
+    if count <= 0:
+        return []
+    left, top, right, bottom = area
+    room = (right - left + 1) * (bottom - top + 1)
+
+    # Just under the largest radius that still gives `count` points: growing stops when
+    # there are enough, which is before they run out of room (the slow part) and while
+    # they already cover most of the area
+    fitting = math.sqrt(PACKING * room / count)
+    radius = min(max(spacing, fitting * RADIUS_MARGIN), fitting)
+    smallest = radius / 8
+    while True:
+        points = poisson_disk(rng, area, radius, allowed, limit=count)
+        if len(points) >= count:
+            return points
+        if not points or radius < smallest:
+            return points  # Too little of the area is allowed to fit them all
+        radius *= 0.75
+
+
+def find_spot(rng, area, allowed, tries=10, step=5):
+    """
+    A random point in an area where allowed(x, y) is true, or None if there is none.
+
+    A few random points are tried first; if they are all taken, the area is
+    searched on a grid of `step` pixels (starting from a random place), so a
+    spot is found whenever that grid has one.
+    """
+    left, top, right, bottom = area
+    for _ in range(tries):
+        x = rng.randint(left, right)
+        y = rng.randint(top, bottom)
+        if allowed(x, y):
+            return x, y
+
+    columns = (right - left) // step + 1
+    rows = (bottom - top) // step + 1
+    spots = columns * rows
+    first = rng.randrange(spots)
+    for number in range(first, first + spots):
+        row, column = divmod(number % spots, columns)
+        x = left + column * step
+        y = top + row * step
+        if allowed(x, y):
+            return x, y
+    return None
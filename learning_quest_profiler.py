@@ -0,0 +1,253 @@
+"""
+Learning Quest - Profiler
+
+Measures what the game costs while it runs: how long sections like
+draw_game, check_collisions and entity generation take per call, how long it
+takes from an input event until its result is on screen, how many items are
+on the canvas and (while memory tracing is on) how much memory Python has
+allocated since tracing started.
+
+Timings keep only the most recent calls of each section, so the profiler can
+stay on for a whole session. A snapshot of everything can be appended to a
+JSONL file to compare machines and builds.
+"""
+
+import json
+import sys
+import time
+from collections import deque
+
+# tracemalloc and platform are imported when they are first needed (they slow down startup)
+
+PROFILE_FILE = "learning_quest_profile.jsonl"
+
+# Upper edges (in milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Counts of values (in milliseconds) per bucket, plus one bucket for anything slower"""
+
+    def __init__(self, edges=LATENCY_BUCKETS_MS):
+        """Create an empty histogram with the given bucket edges"""
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.count = 0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        """Count one value"""
+        bucket = 0
+        while bucket < len(self.edges) and ms > self.edges[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, percent):
+        """Upper edge of the bucket that holds the given percentile (None if empty)"""
+        if not self.count:
+            return None
+        wanted = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted and count:
+                return self.edges[bucket] if bucket < len(self.edges) else self.max_ms
+        return self.max_ms
+
+    def as_dict(self):
+        """The histogram as plain data for the JSONL export"""
+        return {
+            "edges_ms": list(self.edges),
+            "counts": list(self.counts),
+            "count": self.count,
+            "max_ms": self.max_ms,
+        }
+
+
+class _Section:
+    """Context manager that times one named section (reused for every call)"""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullSection:
+    """Context manager that does nothing (used by NullProfiler)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullProfiler:
+    """Stands in for a Profiler when nothing should be measured"""
+
+    section = _NullSection()
+
+    def measure(self, name):
+        """Return a context manager that measures nothing"""
+        return self.section
+
+
+class Profiler:
+    """
+    Collects section timings, event-to-render latencies and memory use.
+
+    Timings are kept per section name in a window of the most recent calls;
+    latencies are counted in histograms per kind of event, from mark() until
+    rendered() is called after the screen was updated.
+    """
+
+    def __init__(self, window=240):
+        """Create a profiler that keeps the last `window` timings per section"""
+        self.window = window
+        self.timings = {}  # name -> deque of seconds
+        self.totals = {}   # name -> [calls, seconds] since the start
+        self.sections = {}
+        self.latencies = {}  # event kind -> Histogram
+        self.marks = {}      # event kind -> time of the oldest event not yet rendered
+        self.canvas_items = 0
+        self.items_touched = 0
+        self.memory_baseline = None
+        self.started_at = time.time()
+
+    def measure(self, name):
+        """Context manager that times a section: with profiler.measure("draw_game"): ..."""
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = _Section(self, name)
+        return section
+
+    def record(self, name, seconds):
+        """Add one timing of a section"""
+        timings = self.timings.get(name)
+        if timings is None:
+            timings = self.timings[name] = deque(maxlen=self.window)
+            self.totals[name] = [0, 0.0]
+        timings.append(seconds)
+        total = self.totals[name]
+        total[0] += 1
+        total[1] += seconds
+
+    def mark(self, kind):
+        """An input event happened; its latency ends at the next rendered()"""
+        if kind not in self.marks:
+            self.marks[kind] = time.perf_counter()
+
+    def rendered(self):
+        """The screen shows the result of every marked event: record their latencies"""
+        now = time.perf_counter()
+        for kind, marked_at in self.marks.items():
+            histogram = self.latencies.get(kind)
+            if histogram is None:
+                histogram = self.latencies[kind] = Histogram()
+            histogram.add((now - marked_at) * 1000)
+        self.marks = {}
+
+    def count_items(self, canvas_items, items_touched):
+        """Remember the number of canvas items and how many the last frame touched"""
+        self.canvas_items = canvas_items
+        self.items_touched = items_touched
+
+    def is_tracing_memory(self):
+        """Check if memory tracing was started by this profiler"""
+        return self.memory_baseline is not None
+
+    def start_memory(self):
+        """Start tracing memory allocations (this makes allocations slower)"""
+        import tracemalloc
+
+        if self.memory_baseline is None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.memory_baseline = tracemalloc.get_traced_memory()[0]
+
+    def stop_memory(self):
+        """Stop tracing memory allocations"""
+        import tracemalloc
+
+        if self.memory_baseline is not None:
+            tracemalloc.stop()
+            self.memory_baseline = None
+
+    def memory(self):
+        """Current, peak and growth (since tracing started) in KiB, or None if not tracing"""
+        if self.memory_baseline is None:
+            return None
+
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "current_kb": current / 1024,
+            "peak_kb": peak / 1024,
+            "growth_kb": (current - self.memory_baseline) / 1024,
+        }
+
+    def section_stats(self, name):
+        """Calls, mean and max (ms) of the recent timings of a section"""
+        timings = self.timings.get(name)
+        if not timings:
+            return None
+        return {
+            "calls": self.totals[name][0],
+            "mean_ms": sum(timings) / len(timings) * 1000,
+            "max_ms": max(timings) * 1000,
+        }
+
+    def snapshot(self):
+        """Everything measured so far as plain data"""
+        import platform
+
+        return {
+            "time": time.time(),
+            "uptime_s": time.time() - self.started_at,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sections": {name: self.section_stats(name) for name in self.timings},
+            "latency": {kind: histogram.as_dict() for kind, histogram in self.latencies.items()},
+            "canvas_items": self.canvas_items,
+            "items_touched": self.items_touched,
+            "memory": self.memory(),
+        }
+
+    def export(self, path=PROFILE_FILE, **extra):
+        """Append a snapshot (plus any extra fields, e.g. build="...") as one JSON line"""
+        record = self.snapshot()
+        record.update(extra)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+        return record
+
+    def summary_lines(self):
+        """Short text lines for the on-screen HUD"""
+        lines = []
+        for name in sorted(self.timings):
+            stats = self.section_stats(name)
+            lines.append(f"{name:<20} {stats['mean_ms']:6.2f} ms  max {stats['max_ms']:6.2f}")
+
+        for kind in sorted(self.latencies):
+            histogram = self.latencies[kind]
+            lines.append(f"{kind + ' to render':<20} p50 <={histogram.percentile(50)} ms  "
+                         f"p95 <={histogram.percentile(95)} ms  (n={histogram.count})")
+
+        lines.append(f"{'canvas items':<20} {self.canvas_items}  ({self.items_touched} touched last frame)")
+
+        memory = self.memory()
+        if memory is not None:
+            lines.append(f"{'memory':<20} {memory['current_kb']:.0f} KiB  "
+                         f"({memory['growth_kb']:+.0f} KiB, peak {memory['peak_kb']:.0f})")
+        return lines
@@ -0,0 +1,429 @@
+"""
+Learning Quest - Question Banks
+
+The built-in questions, plus a loader for question packs shipped as JSON or
+CSV files in the question_packs folder.
+
+A JSON pack is a list of questions:
+
+    [{"level": 1, "question": "...", "options": ["...", "..."], "answer": 0}, ...]
+
+(or a {"1": [...], "2": [...]} dictionary keyed by level, like QUESTIONS).
+A CSV pack has the columns level, question, option1 ... option4 and answer,
+where answer is the option number starting at 0 or a letter A-D. Either
+format may give each question an "id"; otherwise one is made from its text.
+
+Packs are validated and compiled once into a cache next to them: one JSON
+line per question plus a per-level index of line offsets. The cache is
+rebuilt only when a pack changes (checked by size and mtime, then by content
+hash). At startup only the index is read; questions are read from the cache
+file one at a time when they are asked.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import random
+from array import array
+from collections import OrderedDict
+
+QUESTION_PACKS_DIR = "question_packs"
+COMPILED_DIR_NAME = ".compiled"
+# Bump when the compiled format changes so old caches are rebuilt (2: blank options in the
+# middle are rejected instead of shifting the answer)
+COMPILED_VERSION = 2
+
+# Store questions in a dictionary where the key is the difficulty level
+QUESTIONS = {
+    1: [
+        {"question": "What does the 'print' function do in Python?",
+         "options": ["Displays text on the screen", "Prints to a printer", "Creates a PDF file", "Takes a screenshot"],
+         "answer": 0},
+        {"question": "Which symbol is used for comments in Python?",
+         "options": ["//", "/*", "#", "<!--"],
+         "answer": 2},
+        {"question": "What is the correct way to create a variable named 'age' with the value 25?",
+         "options": ["variable age = 25", "age = 25", "int age = 25", "age := 25"],
+         "answer": 1},
+        {"question": "What type of data can a Python list contain?",
+         "options": ["Only numbers", "Only strings", "Any type of data", "Only booleans"],
+         "answer": 2},
+        {"question": "How do you get user input in Python?",
+         "options": ["get()", "input()", "read()", "scan()"],
+         "answer": 1},
+    ],
+    2: [
+        {"question": "What does the 'len()' function return?",
+         "options": ["The longest item in a list", "The number of items in a list", "The memory size of an object", "The length of a string in pixels"],
+         "answer": 1},
+        {"question": "How do you create a list in Python?",
+         "options": ["list = (1, 2, 3)", "list = [1, 2, 3]", "list = {1, 2, 3}", "list = <1, 2, 3>"],
+         "answer": 1},
+        {"question": "What is the correct way to start a for loop in Python?",
+         "options": ["for i in range(10):", "for(i=0; i<10; i++)", "for i = 1 to 10", "foreach i in 10"],
+         "answer": 0},
+        {"question": "How do you add an item to the end of a list?",
+         "options": ["list.add(item)", "list.append(item)", "list.insert(item)", "list.push(item)"],
+         "answer": 1},
+        {"question": "What does 'random.randint(1, 10)' return?",
+         "options": ["A random decimal between 1 and 10", "A random integer between 1 and 9", "A random integer between 1 and 10", "Always returns 5"],
+         "answer": 2},
+    ],
+    3: [
+        {"question": "What does the 'append()' method do to a list?",
+         "options": ["Removes an item", "Adds an item to the end", "Sorts the list", "Reverses the list"],
+         "answer": 1},
+        {"question": "How do you open a file named 'data.txt' for reading in Python?",
+         "options": ["file = open('data.txt', 'r')", "file = open('data.txt', 'w')", "file = read('data.txt')", "file = load('data.txt')"],
+         "answer": 0},
+        {"question": "Which of these is NOT a valid way to create a dictionary?",
+         "options": ["dict = {}", "dict = dict()", "dict = {1, 2, 3}", "dict = {'a': 1, 'b': 2}"],
+         "answer": 2},
+        {"question": "What is the purpose of the '__init__' method in a Python class?",
+         "options": ["To delete the object", "To initialize object attributes", "To print object information", "To copy the object"],
+         "answer": 1},
+        {"question": "How do you handle exceptions in Python?",
+         "options": ["try/catch", "try/except", "handle/error", "check/fail"],
+         "answer": 1},
+    ]
+}
+
+
+class QuestionPackError(Exception):
+    """A question pack could not be read or contains an invalid question"""
+
+
+def question_id(question_data):
+    """A stable id for a question: its own id, or a hash of its text"""
+    if question_data.get("id"):
+        return str(question_data["id"])
+    return hashlib.sha1(question_data["question"].encode("utf-8")).hexdigest()[:12]
+
+
+def validate_question(question_data, where):
+    """Check one question and return it in the standard form"""
+    try:
+        level = int(question_data["level"])
+        text = str(question_data["question"]).strip()
+        options = [str(option).strip() for option in question_data["options"]]
+        # Blank trailing options are unused columns (e.g. a CSV row with 3 options); a blank one
+        # before the last would shift the answer onto the wrong option
+        while options and not options[-1]:
+            options.pop()
+        answer = question_data["answer"]
+        # Answers may be given as a letter A-D
+        if isinstance(answer, str):
+            answer = answer.strip()
+            answer = ord(answer.upper()) - ord("A") if answer.isalpha() else int(answer)
+    except (KeyError, TypeError, ValueError) as e:
+        raise QuestionPackError(f"{where}: missing or invalid field ({e})")
+
+    if level < 1:
+        raise QuestionPackError(f"{where}: level must be 1 or more")
+    if not text:
+        raise QuestionPackError(f"{where}: question text is empty")
+    if not 2 <= len(options) <= 4:
+        raise QuestionPackError(f"{where}: a question needs 2 to 4 options")
+    if not all(options):
+        raise QuestionPackError(f"{where}: only the last options may be left empty")
+    if not 0 <= answer < len(options):
+        raise QuestionPackError(f"{where}: answer {answer} is not one of the options")
+
+    question = {"level": level, "question": text, "options": options, "answer": answer}
+    question["id"] = question_id({"id": question_data.get("id"), "question": text})
+    return question
+
+
+def read_pack(path):
+    """Read and validate all questions in a JSON or CSV pack"""
+    name = os.path.basename(path)
+    try:
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            if isinstance(data, dict):
+                data = [dict(question, level=level)
+                        for level, questions in data.items() for question in questions]
+            return [validate_question(question, f"{name} question {i + 1}")
+                    for i, question in enumerate(data)]
+
+        with open(path, encoding="utf-8", newline="") as file:
+            questions = []
+            for i, row in enumerate(csv.DictReader(file)):
+                row["options"] = [row.get(f"option{n}") or "" for n in range(1, 5)]
+                questions.append(validate_question(row, f"{name} line {i + 2}"))
+            return questions
+    except (OSError, ValueError) as e:
+        raise QuestionPackError(f"{name}: {e}")
+
+
+def file_hash(path):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class QuestionBank:
+    """
+    Questions kept in memory, by level. Used for the built-in questions and
+    small banks; has the same interface as CompiledQuestionBank.
+    """
+
+    def __init__(self, questions=None):
+        """Create a bank from a {level: [question, ...]} dictionary"""
+        questions = questions or QUESTIONS
+        self.questions = {level: [dict(question, id=question_id(question)) for question in level_questions]
+                          for level, level_questions in questions.items()}
+
+    def levels(self):
+        """Levels that have questions"""
+        return sorted(self.questions)
+
+    def count(self, level):
+        """Number of questions for a level"""
+        return len(self.questions.get(level, ()))
+
+    def get(self, level, index):
+        """The question at an index within a level"""
+        return self.questions[level][index]
+
+
+class CompiledQuestionBank:
+    """
+    Questions read lazily from a compiled cache file.
+
+    Only the per-level offsets are kept in memory; each question is read
+    (and kept in a small LRU cache) the first time it is asked for.
+    """
+
+    def __init__(self, data_path, offsets, cache_size=256):
+        """Open a compiled bank from its data file and {level: offsets}"""
+        self.data_path = data_path
+        self.offsets = offsets
+        self.file = None
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    def levels(self):
+        """Levels that have questions"""
+        return sorted(self.offsets)
+
+    def count(self, level):
+        """Number of questions for a level"""
+        return len(self.offsets.get(level, ()))
+
+    def get(self, level, index):
+        """The question at an index within a level"""
+        offset = self.offsets[level][index]
+        question = self.cache.get(offset)
+        if question is not None:
+            self.cache.move_to_end(offset)
+            return question
+
+        if self.file is None:
+            self.file = open(self.data_path, "rb")
+        self.file.seek(offset)
+        question = json.loads(self.file.readline().decode("utf-8"))
+
+        self.cache[offset] = question
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return question
+
+    def close(self):
+        """Close the data file"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ShuffleBag:
+    """
+    Hands out the numbers 0..size-1 in random order without repeats, then
+    starts over. It is a Fisher-Yates shuffle done one draw at a time that
+    only remembers the positions it has swapped, so both refilling and
+    drawing are O(1) however large the bag is.
+    """
+
+    def __init__(self, size, rng):
+        """Create a full bag of size numbers"""
+        self.size = size
+        self.random = rng
+        self.refill()
+
+    def refill(self):
+        """Put every number back in the bag"""
+        self.remaining = self.size
+        self.swapped = {}
+
+    def draw(self):
+        """Take a random number that has not been drawn since the last refill"""
+        if self.remaining == 0:
+            self.refill()
+
+        # Swap a random position with the last one still in the bag
+        position = self.random.randrange(self.remaining)
+        last = self.remaining - 1
+        value = self.swapped.get(position, position)
+        self.swapped[position] = self.swapped.pop(last, last)
+        self.remaining -= 1
+        return value
+
+
+class QuestionSampler:
+    """
+    Draws questions from a bank without repeats: one shuffle bag per level,
+    refilled lazily when it runs out. Questions answered in this session
+    are skipped until every question of the level has been answered.
+    """
+
+    def __init__(self, bank, rng=None, seed=None):
+        """Create a sampler over a question bank (seeded for reproducible draws)"""
+        self.bank = bank
+        self.random = rng or random.Random(seed)
+        self.bags = {}
+        self.answered = set()
+
+    def reset(self):
+        """Start a new session: full bags and nothing answered"""
+        self.bags = {}
+        self.answered = set()
+
+    def draw(self, level):
+        """Return (index, question) for a question of the level"""
+        size = self.bank.count(level)
+        bag = self.bags.get(level)
+        if bag is None or bag.size != size:
+            bag = self.bags[level] = ShuffleBag(size, self.random)
+
+        # At most one bag's worth of tries, after that answered questions may come back
+        for _ in range(size):
+            index = bag.draw()
+            question = self.bank.get(level, index)
+            if question["id"] not in self.answered:
+                break
+        return index, question
+
+    def mark_answered(self, question):
+        """Remember that a question was answered so it is not asked again this session"""
+        self.answered.add(question["id"])
+
+
+def pack_files(packs_dir):
+    """The JSON and CSV pack files in a folder, sorted by name"""
+    try:
+        names = os.listdir(packs_dir)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(packs_dir, name) for name in sorted(names)
+            if name.endswith((".json", ".csv")) and not name.startswith(".")]
+
+
+def collect_questions(paths):
+    """The built-in questions plus the validated questions of the packs, as {level: [question, ...]}"""
+    by_level = {}
+    for level, level_questions in QUESTIONS.items():
+        for question in level_questions:
+            by_level.setdefault(level, []).append(dict(question, level=level, id=question_id(question)))
+    for path in paths:
+        for question in read_pack(path):
+            by_level.setdefault(question["level"], []).append(question)
+    return by_level
+
+
+def compile_packs(paths, data_path):
+    """Validate packs and write the compiled data file; returns {level: offsets}"""
+    by_level = collect_questions(paths)
+    offsets = {}
+    temp_path = data_path + ".tmp"
+    with open(temp_path, "wb") as file:
+        for level in sorted(by_level):
+            offsets[level] = array("q")
+            for question in by_level[level]:
+                offsets[level].append(file.tell())
+                file.write(json.dumps(question, ensure_ascii=False).encode("utf-8") + b"\n")
+    os.replace(temp_path, data_path)
+    return offsets
+
+
+def load_question_bank(packs_dir=QUESTION_PACKS_DIR):
+    """
+    Load the built-in questions plus any packs in packs_dir, using the
+    compiled cache when it is still up to date.
+
+    If the cache cannot be written (e.g. a read-only install), the packs
+    are read into memory instead. Packs that cannot be read raise
+    QuestionPackError.
+    """
+    paths = pack_files(packs_dir)
+    if not paths:
+        return QuestionBank()
+
+    compiled_dir = os.path.join(packs_dir, COMPILED_DIR_NAME)
+    data_path = os.path.join(compiled_dir, "questions.jsonl")
+    index_path = os.path.join(compiled_dir, "index.json")
+
+    try:
+        signature = [[os.path.basename(path), os.path.getsize(path), os.stat(path).st_mtime_ns]
+                     for path in paths]
+    except OSError as e:  # A pack removed while the folder was read
+        raise QuestionPackError(f"Could not read the question packs: {e}")
+
+    # Try the cache: same files with the same size/mtime, or else the same contents
+    index = None
+    try:
+        with open(index_path, encoding="utf-8") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        pass
+
+    if index is not None and index.get("version") == COMPILED_VERSION and os.path.exists(data_path):
+        if index["signature"] == signature:
+            return CompiledQuestionBank(data_path, index_offsets(index))
+
+        cached = {entry[0]: entry for entry in index.get("hashes", [])}
+        try:
+            hashes = [[os.path.basename(path), file_hash(path)] for path in paths]
+        except OSError as e:
+            raise QuestionPackError(f"Could not read the question packs: {e}")
+        if [cached.get(name) for name, digest in hashes] == hashes:
+            # Only the timestamps changed: keep the compiled data, refresh the signature
+            index["signature"] = signature
+            try:
+                write_index(index_path, index)
+            except OSError:
+                pass  # Checked by hash again next time
+            return CompiledQuestionBank(data_path, index_offsets(index))
+
+    # (Re)compile the packs
+    try:
+        os.makedirs(compiled_dir, exist_ok=True)
+        offsets = compile_packs(paths, data_path)
+        index = {
+            "version": COMPILED_VERSION,
+            "signature": signature,
+            "hashes": [[os.path.basename(path), file_hash(path)] for path in paths],
+            "levels": {str(level): list(level_offsets) for level, level_offsets in offsets.items()},
+        }
+        write_index(index_path, index)
+    except OSError:
+        # No cache (read-only folder, a pack removed meanwhile): read the packs into memory
+        return QuestionBank(collect_questions(paths))
+    return CompiledQuestionBank(data_path, offsets)
+
+
+def index_offsets(index):
+    """The {level: offsets} table of a compiled index"""
+    return {int(level): array("q", level_offsets) for level, level_offsets in index["levels"].items()}
+
+
+def write_index(index_path, index):
+    """Write a compiled index atomically"""
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(index, file)
+    os.replace(temp_path, index_path)
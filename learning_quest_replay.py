@@ -0,0 +1,248 @@
+"""
+Learning Quest - Record and Replay
+
+Records a play session as a compact binary log of the actions sent to the
+GameEngine and when they happened, so the session can be played back
+exactly. The engine's random numbers are seeded and the seed is stored in
+the log, and the questions that were asked are stored by index, so a replay
+gives the same obstacles, collectibles, questions and scores as the session
+it was recorded from.
+
+A log starts with b"LQR", a version byte and a JSON header (seed, rule
+changes, questions per level). Every action after it is the milliseconds
+since the previous action as a varint, one byte for the action and, for
+questions and answers, the question index or chosen option as a varint.
+A move is two bytes most of the time.
+
+Replays run either as fast as possible without a window (for regression and
+profiling runs) or in real time in the game window (see
+LearningQuestGame.play_replay and the --replay option of the game).
+
+Usage:
+    python learning_quest_replay.py session.lqr --profile
+"""
+
+import argparse
+import json
+import time
+
+from learning_quest_engine import GameEngine, GameRules
+from learning_quest_profiler import Profiler
+
+MAGIC = b"LQR"
+# Version 2: learning_quest_placement, 3: every level is laid out from its own seed, 4: scatter()
+# stops once it has enough points. Each gives other levels than the one before, so older logs
+# cannot be replayed
+VERSION = 4
+
+# One byte per action; ask and answer are followed by a varint argument
+ACTION_CODES = {
+    "start": 0,
+    "left": 1,
+    "right": 2,
+    "up": 3,
+    "down": 4,
+    "tick": 5,
+    "spawn": 6,
+    "skip": 7,
+    "ask": 8,
+    "answer": 9,
+}
+CODE_ACTIONS = {code: action for action, code in ACTION_CODES.items()}
+ACTIONS_WITH_ARGUMENT = ("ask", "answer")
+
+
+class ReplayError(Exception):
+    """A replay log that cannot be read"""
+
+
+def write_varint(output, value):
+    """Append a non-negative integer to a bytearray as a LEB128 varint"""
+    while value >= 0x80:
+        output.append((value & 0x7F) | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def read_varint(data, position):
+    """Read a varint at a position and return (value, next position)"""
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ReplayError("Replay log ends in the middle of a number")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def rule_changes(rules):
+    """The rules that differ from the defaults, as a dictionary"""
+    defaults = vars(GameRules())
+    return {name: value for name, value in vars(rules).items() if defaults.get(name) != value}
+
+
+def question_counts(questions):
+    """Number of questions per level (stored in the header to spot a different question bank)"""
+    return {str(level): questions.count(level) for level in questions.levels()}
+
+
+class SessionRecorder:
+    """
+    Writes the actions of a session to a replay log.
+
+    Call record(action) for every action sent to the engine; for "ask" pass
+    ("ask", index) with the index of the question that was drawn.
+    """
+
+    def __init__(self, path, seed, rules=None, questions=None, clock=time.monotonic):
+        """Create the log file and write its header"""
+        self.path = path
+        self.clock = clock
+        self.last_time = clock()
+        header = {
+            "seed": seed,
+            "rules": rule_changes(rules) if rules is not None else {},
+            "questions": question_counts(questions) if questions is not None else None,
+            "recorded": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+
+        output = bytearray(MAGIC)
+        output.append(VERSION)
+        write_varint(output, len(header_bytes))
+        output += header_bytes
+        self.file = open(path, "wb")
+        self.file.write(output)
+        self.buffer = bytearray()
+
+    def record(self, action):
+        """Add one action with the time since the previous one"""
+        now = self.clock()
+        delay_ms = max(0, int((now - self.last_time) * 1000 + 0.5))
+        # Keep the rounding error from adding up over a long session
+        self.last_time += delay_ms / 1000
+
+        name, argument = action if isinstance(action, tuple) else (action, None)
+        write_varint(self.buffer, delay_ms)
+        self.buffer.append(ACTION_CODES[name])
+        if name in ACTIONS_WITH_ARGUMENT:
+            write_varint(self.buffer, argument)
+
+        # Write once a second (every tick), so a crash loses at most a second of play
+        if name == "tick":
+            self.flush()
+
+    def flush(self):
+        """Write the recorded actions to the file"""
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer = bytearray()
+        self.file.flush()
+
+    def close(self):
+        """Write the remaining actions and close the file"""
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+class Replay:
+    """A replay log read into memory: its header and a list of (seconds, action)"""
+
+    def __init__(self, path):
+        """Read and decode a replay log"""
+        with open(path, "rb") as file:
+            data = file.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise ReplayError(f"{path} is not a Learning Quest replay")
+        if data[len(MAGIC)] != VERSION:
+            raise ReplayError(f"Unsupported replay version {data[len(MAGIC)]}")
+
+        header_size, position = read_varint(data, len(MAGIC) + 1)
+        self.header = json.loads(data[position:position + header_size].decode("utf-8"))
+        position += header_size
+
+        self.actions = []
+        elapsed_ms = 0
+        while position < len(data):
+            try:
+                delay_ms, position = read_varint(data, position)
+                name = CODE_ACTIONS[data[position]]
+                position += 1
+                action = name
+                if name in ACTIONS_WITH_ARGUMENT:
+                    argument, position = read_varint(data, position)
+                    action = (name, argument)
+            except (IndexError, KeyError, ReplayError):
+                break  # A log cut off by a crash: keep every complete action
+            elapsed_ms += delay_ms
+            self.actions.append((elapsed_ms / 1000, action))
+
+    def duration(self):
+        """Seconds from the start of the recording until the last action"""
+        return self.actions[-1][0] if self.actions else 0.0
+
+    def build_engine(self, questions=None):
+        """A new engine with the recorded seed and rules (call step() with the actions)"""
+        rules = GameRules(**self.header.get("rules", {}))
+        engine = GameEngine(rules=rules, questions=questions, seed=self.header["seed"])
+        expected = self.header.get("questions")
+        if expected is not None and question_counts(engine.questions) != expected:
+            raise ReplayError("The question bank is different from the one the replay was recorded with")
+        return engine
+
+
+def replay_headless(replay, questions=None, profiler=None):
+    """Run every action of a replay as fast as possible and return (engine, events)"""
+    engine = replay.build_engine(questions)
+    if profiler is not None:
+        engine.profiler = profiler
+
+    events = []
+    for _, action in replay.actions:
+        events.extend(engine.step(action))
+    return engine, events
+
+
+def main():
+    """Replay a log without a window and print the final state"""
+    from learning_quest_questions import load_question_bank
+
+    parser = argparse.ArgumentParser(description="Replay a recorded Learning Quest session headless")
+    parser.add_argument("log", help="replay log recorded with the game's --record option")
+    parser.add_argument("--profile", action="store_true", help="print section timings of the engine")
+    parser.add_argument("--json", action="store_true", help="print the final state as JSON")
+    args = parser.parse_args()
+
+    replay = Replay(args.log)
+    profiler = Profiler() if args.profile else None
+
+    start = time.perf_counter()
+    engine, events = replay_headless(replay, load_question_bank(), profiler)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "actions": len(replay.actions),
+        "recorded_seconds": replay.duration(),
+        "score": engine.score,
+        "level": engine.level,
+        "time_remaining": engine.time_remaining,
+        "events": len(events),
+    }
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"Replayed {len(replay.actions)} actions ({replay.duration():.1f}s of play) "
+              f"in {elapsed * 1000:.1f} ms")
+        print(f"Final score {engine.score}, level {engine.level}, {engine.time_remaining}s left")
+    if profiler is not None:
+        print("\n".join(profiler.summary_lines()))
+
+
+if __name__ == "__main__":
+    main()
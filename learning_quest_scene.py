@@ -0,0 +1,228 @@
+"""
+Learning Quest - Retained Scene Layer
+
+Keeps track of the canvas items that make up the game screen so that a redraw
+only touches the items that actually changed, instead of deleting everything
+and drawing the whole screen again.
+
+Each entity on the screen is a "node": a key, the position it was drawn at and
+the canvas item IDs that were created for it. Moving an entity moves its items,
+changing a label updates the text of its item, and entities that disappear have
+their items deleted.
+"""
+
+import time
+
+
+class SceneLayer:
+    """
+    A retained-mode layer on top of a tkinter Canvas.
+
+    Nodes are created once by a build function and afterwards only moved,
+    reconfigured or deleted. The number of canvas items touched is counted per
+    frame so we can check that a single move only redraws what changed.
+    """
+
+    def __init__(self, canvas, layers=()):
+        """Create an empty scene on top of the given canvas"""
+        self.canvas = canvas
+        # Layer tags from bottom to top, used to keep new items in the right order
+        self.layers = list(layers)
+
+        # key -> [x, y, item ids]
+        self.nodes = {}
+        # group name -> set of node keys that belong to it
+        self.groups = {}
+        # item id -> options / coords we last gave it
+        self.item_options = {}
+        self.item_coords = {}
+        self.background = None
+
+        # Counters for the items touched per frame
+        self.items_touched = 0
+        self.last_frame_touched = 0
+        self.frame_count = 0
+        self.created_this_frame = False
+
+    def reset(self):
+        """Forget all nodes (used after the canvas was cleared with delete("all"))"""
+        self.nodes = {}
+        self.groups = {}
+        self.item_options = {}
+        self.item_coords = {}
+        self.background = None
+
+    def begin_frame(self):
+        """Start counting the items touched in a new frame"""
+        self.items_touched = 0
+        self.created_this_frame = False
+
+    def end_frame(self):
+        """Finish the frame and return how many canvas items were touched"""
+        # Newly created items land on top, so restore the layer order
+        if self.created_this_frame:
+            for tag in self.layers:
+                self.canvas.tag_raise(tag)
+
+        self.last_frame_touched = self.items_touched
+        self.frame_count += 1
+        return self.items_touched
+
+    def set_background(self, color):
+        """Change the canvas background only if the color is different"""
+        if color != self.background:
+            self.canvas.config(bg=color)
+            self.background = color
+
+    def place(self, key, x, y, build, tag=""):
+        """Create the items for a node once, afterwards only move them"""
+        node = self.nodes.get(key)
+
+        if node is None:
+            items = build(self.canvas, x, y, tag)
+            self.nodes[key] = [x, y, items]
+            self.items_touched += len(items)
+            self.created_this_frame = True
+            return items
+
+        old_x, old_y, items = node
+        if old_x != x or old_y != y:
+            for item in items:
+                self.canvas.move(item, x - old_x, y - old_y)
+            node[0] = x
+            node[1] = y
+            self.items_touched += len(items)
+        return items
+
+    def sync(self, group, entities, build):
+        """Place every (key, x, y) of a group and delete the nodes that are gone"""
+        seen = set()
+        for key, x, y in entities:
+            node_key = (group, key)
+            self.place(node_key, x, y, build, group)
+            seen.add(node_key)
+
+        for node_key in self.groups.get(group, set()) - seen:
+            self.remove(node_key)
+        self.groups[group] = seen
+
+    def remove(self, key):
+        """Delete all the canvas items of a node"""
+        node = self.nodes.pop(key, None)
+        if node is None:
+            return
+
+        for item in node[2]:
+            self.canvas.delete(item)
+            self.item_options.pop(item, None)
+            self.item_coords.pop(item, None)
+        self.items_touched += len(node[2])
+
+    def configure(self, item, **options):
+        """Change item options (text, fill, state...) only if they are different"""
+        current = self.item_options.setdefault(item, {})
+        changed = {}
+        for name, value in options.items():
+            if current.get(name) != value:
+                changed[name] = value
+
+        if changed:
+            self.canvas.itemconfig(item, **changed)
+            current.update(changed)
+            self.items_touched += 1
+
+    def coords(self, item, *coords):
+        """Change the coordinates of an item only if they are different"""
+        if self.item_coords.get(item) != coords:
+            self.canvas.coords(item, *coords)
+            self.item_coords[item] = coords
+            self.items_touched += 1
+
+
+class ToastOverlay:
+    """
+    Short notifications drawn on the canvas instead of modal message boxes.
+
+    Toasts are queued and shown for a few seconds in a fixed number of slots
+    whose canvas items are created once. A message that arrives again while
+    it is still queued or on screen is collapsed into the existing toast
+    ("x3") instead of adding another one. update() runs once per frame and
+    shows at most one new toast per call, so its cost per frame is bounded.
+    """
+
+    # Background colors for the kinds of toast
+    colors = {
+        "info": "#3498db",
+        "success": "#27ae60",
+        "warning": "#e74c3c",
+    }
+
+    def __init__(self, scene, max_visible=3, duration=2.0, max_pending=10, x=400, y=115, spacing=42):
+        """Create an overlay that draws into a scene"""
+        self.scene = scene
+        self.max_visible = max_visible
+        self.duration = duration
+        self.max_pending = max_pending
+        self.x = x
+        self.y = y
+        self.spacing = spacing
+        self.clear()
+
+    def clear(self):
+        """Drop all toasts (used when the canvas is cleared)"""
+        # Each toast is [title, message, kind, count, expires_at]
+        self.pending = []
+        self.visible = []
+        # Number of slots shown by the last update
+        self.shown = 0
+
+    def busy(self):
+        """Check if update() still has something to show or hide"""
+        return bool(self.pending or self.visible or self.shown)
+
+    def notify(self, title, message, kind="info"):
+        """Queue a toast, or collapse it into an identical one already queued or shown"""
+        for toast in self.visible + self.pending:
+            if toast[0] == title and toast[1] == message:
+                toast[3] += 1
+                if toast in self.visible:
+                    toast[4] = time.monotonic() + self.duration
+                return
+
+        self.pending.append([title, message, kind, 1, None])
+        if len(self.pending) > self.max_pending:
+            self.pending.pop(0)
+
+    def update(self, now=None):
+        """Expire old toasts, show at most one new one and update the slot items"""
+        if now is None:
+            now = time.monotonic()
+
+        self.visible = [toast for toast in self.visible if toast[4] > now]
+        if self.pending and len(self.visible) < self.max_visible:
+            toast = self.pending.pop(0)
+            toast[4] = now + self.duration
+            self.visible.append(toast)
+
+        for slot in range(self.max_visible):
+            background, text = self.scene.place(("toast", slot), self.x, self.y + slot * self.spacing,
+                                                self.build_slot, "toasts")
+            if slot < len(self.visible):
+                title, message, kind, count, expires_at = self.visible[slot]
+                label = f"{title}  {message}"
+                if count > 1:
+                    label += f"  x{count}"
+                self.scene.configure(background, state="normal", fill=self.colors.get(kind, "#3498db"))
+                self.scene.configure(text, state="normal", text=label)
+            else:
+                self.scene.configure(background, state="hidden")
+                self.scene.configure(text, state="hidden")
+        self.shown = len(self.visible)
+
+    def build_slot(self, canvas, x, y, tag):
+        """Create the background and text items of one toast slot"""
+        background = canvas.create_rectangle(x - 260, y - 17, x + 260, y + 17,
+                                             fill="#3498db", outline="", state="hidden", tags=tag)
+        text = canvas.create_text(x, y, text="", font=("Arial", 12, "bold"), fill="white",
+                                  state="hidden", tags=tag)
+        return (background, text)
@@ -0,0 +1,128 @@
+"""
+Learning Quest - Scheduler
+
+One place for all the periodic work of the game window (countdown, game loop
+frames, spawning, autosave). Deadlines are kept on time.monotonic() and the
+next deadline of a job is always its previous deadline plus its interval, so
+slow callbacks or time spent in a dialog never make the timer run slow: when
+the scheduler wakes up late, a job is told how many intervals have passed and
+can catch up.
+
+Only one tkinter "after" callback is pending at any time, set for the
+earliest deadline, so the Tk loop is woken no more often than needed.
+"""
+
+import time
+import traceback
+
+
+class _Job:
+    """A periodic job registered with the scheduler"""
+
+    def __init__(self, name, interval, callback, deadline, catch_up):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.deadline = deadline
+        self.catch_up = catch_up
+
+
+class Scheduler:
+    """
+    Runs periodic jobs at drift-free deadlines with a single Tk after().
+
+    A job's callback receives the number of intervals that have passed since
+    it last ran (1 when on time). Jobs registered with catch_up=False always
+    get 1 and simply skip the intervals they missed.
+    """
+
+    def __init__(self, root, clock=time.monotonic):
+        """Create a scheduler that wakes up through root.after"""
+        self.root = root
+        self.clock = clock
+        self.jobs = {}
+        self.after_id = None
+        self.wake_at = None
+        self.paused_at = None
+        self.running = False
+
+    def every(self, name, interval, callback, catch_up=True, first_delay=None):
+        """Run callback every interval seconds (replaces any job with the same name)"""
+        if first_delay is None:
+            first_delay = interval
+        now = self.paused_at if self.paused_at is not None else self.clock()
+        self.jobs[name] = _Job(name, interval, callback, now + first_delay, catch_up)
+        self.wake()
+
+    def cancel(self, *names):
+        """Remove jobs by name (unknown names are ignored)"""
+        for name in names:
+            self.jobs.pop(name, None)
+        self.wake()
+
+    def is_paused(self):
+        """Check if the scheduler is paused"""
+        return self.paused_at is not None
+
+    def pause(self):
+        """Stop running jobs until resume() (their deadlines wait too)"""
+        if self.paused_at is None:
+            self.paused_at = self.clock()
+            self.wake()
+
+    def resume(self):
+        """Continue after pause(), moving every deadline by the paused time"""
+        if self.paused_at is None:
+            return
+        paused_for = self.clock() - self.paused_at
+        self.paused_at = None
+        for job in self.jobs.values():
+            job.deadline += paused_for
+        self.wake()
+
+    def wake(self):
+        """Set the single Tk after() callback for the earliest deadline"""
+        if self.running:
+            return  # run_due sets it when it is done
+
+        next_deadline = None
+        if self.paused_at is None and self.jobs:
+            next_deadline = min(job.deadline for job in self.jobs.values())
+
+        if next_deadline == self.wake_at and self.after_id is not None:
+            return
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+        self.wake_at = next_deadline
+
+        if next_deadline is not None:
+            delay_ms = max(0, int((next_deadline - self.clock()) * 1000 + 0.5))
+            self.after_id = self.root.after(delay_ms, self.run_due)
+
+    def run_due(self):
+        """Run every job whose deadline has passed, then wait for the next one"""
+        self.after_id = None
+        self.wake_at = None
+        self.running = True
+        try:
+            now = self.clock()
+            due = sorted((job for job in self.jobs.values() if job.deadline <= now),
+                         key=lambda job: job.deadline)
+            for job in due:
+                # A job may have been cancelled or replaced by an earlier callback
+                if self.jobs.get(job.name) is not job or self.paused_at is not None:
+                    continue
+
+                # Drift-free: the next deadline is a whole number of intervals later
+                intervals = int((now - job.deadline) // job.interval) + 1
+                job.deadline += intervals * job.interval
+                try:
+                    job.callback(intervals if job.catch_up else 1)
+                except Exception:
+                    # Report it and go on: one failing job must not starve the others
+                    traceback.print_exc()
+        finally:
+            # Always wait for the next deadline, or every job would stop for good
+            self.running = False
+            self.wake()
@@ -0,0 +1,203 @@
+"""
+Learning Quest - High Score Store
+
+Keeps the high scores in an SQLite database with indexes on score, player and
+level, so the leaderboard queries (top K, a player's best, top K for a level)
+only read the rows they return instead of parsing and sorting every score
+ever saved.
+
+Scores from the old text file (learning_quest_scores.txt, one
+"name,score,level,timestamp" line per score) are imported incrementally: the
+store remembers how far into the file it has read and only imports new lines.
+
+Usage:
+    python learning_quest_scores.py --import learning_quest_scores.txt --top 10
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+SCORES_FILE = "learning_quest_scores.txt"
+SCORES_DB = "learning_quest_scores.db"
+
+
+def parse_score_line(line):
+    """Turn a "name,score,level,timestamp" line into a tuple (None if it is invalid)"""
+    parts = line.strip().split(",")
+    if len(parts) < 4:
+        return None
+    try:
+        return (parts[0], int(parts[1]), int(parts[2]), parts[3])
+    except ValueError:
+        return None
+
+
+class ScoreStore:
+    """
+    High scores in an indexed SQLite database.
+
+    Every query is answered from an index, so asking for the top K scores
+    costs O(K log N) no matter how many scores are stored.
+    """
+
+    def __init__(self, path=SCORES_DB):
+        """Open (or create) the score database"""
+        self.path = path
+        # The store can be shared with background threads, one statement at a time
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+        with self.lock, self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS scores (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    level INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+                CREATE INDEX IF NOT EXISTS scores_by_name ON scores (name, score DESC);
+                CREATE INDEX IF NOT EXISTS scores_by_level ON scores (level, score DESC, id);
+                CREATE TABLE IF NOT EXISTS imports (
+                    path TEXT PRIMARY KEY,
+                    offset INTEGER NOT NULL
+                );
+            """)
+
+    def close(self):
+        """Close the database"""
+        with self.lock:
+            self.connection.close()
+
+    def add(self, name, score, level, timestamp=None):
+        """Save one score"""
+        if timestamp is None:
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.add_many([(name, score, level, timestamp)])
+
+    def add_many(self, records):
+        """Save many (name, score, level, timestamp) records in one transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO scores (name, score, level, timestamp) VALUES (?, ?, ?, ?)", records)
+
+    def filter_clause(self, name_filter="", level=None):
+        """SQL WHERE clause and parameters for a player name / level filter"""
+        clauses = []
+        params = []
+        if name_filter:
+            # Case-insensitive "name contains" match
+            escaped = name_filter.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        if level:
+            clauses.append("level = ?")
+            params.append(level)
+
+        if not clauses:
+            return "", params
+        return "WHERE " + " AND ".join(clauses), params
+
+    def count(self, name_filter="", level=None):
+        """Number of scores stored (optionally only those matching a filter)"""
+        where, params = self.filter_clause(name_filter, level)
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT COUNT(*) FROM scores {where}", params).fetchone()[0]
+
+    def page(self, offset, limit, name_filter="", level=None):
+        """Rows offset..offset+limit of the leaderboard (optionally filtered), best first"""
+        where, params = self.filter_clause(name_filter, level)
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT name, score, level, timestamp FROM scores {where} "
+                "ORDER BY score DESC, id LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+
+    def top(self, k=10):
+        """The k highest scores as (name, score, level, timestamp), best first"""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT name, score, level, timestamp FROM scores "
+                "ORDER BY score DESC, id LIMIT ?", (k,)).fetchall()
+
+    def top_for_level(self, level, k=10):
+        """The k highest scores that ended on the given level"""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT name, score, level, timestamp FROM scores WHERE level = ? "
+                "ORDER BY score DESC, id LIMIT ?", (level, k)).fetchall()
+
+    def best_for_player(self, name):
+        """A player's best score as (name, score, level, timestamp), or None"""
+        with self.lock:
+            return self.connection.execute(
+                "SELECT name, score, level, timestamp FROM scores WHERE name = ? "
+                "ORDER BY score DESC LIMIT 1", (name,)).fetchone()
+
+    def import_csv(self, path=SCORES_FILE):
+        """Import the lines added to a score text file since the last import"""
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT offset FROM imports WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        old_offset = offset = row[0] if row else 0
+        if size < offset:
+            # The file was emptied or replaced by a shorter one, read it again from the start
+            offset = 0
+        if size == old_offset:
+            return 0
+
+        records = []
+        with open(path, "rb") as file:
+            file.seek(offset)
+            for line in file:
+                # A line without a newline may still be being written, leave it for next time
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                record = parse_score_line(line.decode("utf-8", errors="replace"))
+                if record:
+                    records.append(record)
+
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT INTO scores (name, score, level, timestamp) VALUES (?, ?, ?, ?)", records)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO imports (path, offset) VALUES (?, ?)",
+                (os.path.abspath(path), offset))
+        return len(records)
+
+
+def main():
+    """Import score files and print the leaderboard from the command line"""
+    parser = argparse.ArgumentParser(description="Manage the Learning Quest high score database")
+    parser.add_argument("--db", default=SCORES_DB)
+    parser.add_argument("--import", dest="import_path", help="score text file to import")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--level", type=int, help="only show scores for this level")
+    parser.add_argument("--player", help="show this player's best score")
+    args = parser.parse_args()
+
+    store = ScoreStore(args.db)
+    if args.import_path:
+        print(f"Imported {store.import_csv(args.import_path)} scores")
+
+    if args.player:
+        print(store.best_for_player(args.player))
+    else:
+        rows = store.top_for_level(args.level, args.top) if args.level else store.top(args.top)
+        for rank, (name, score, level, timestamp) in enumerate(rows, 1):
+            print(f"{rank:3d}. {name} - {score} pts (Level {level}) {timestamp}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
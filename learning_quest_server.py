@@ -0,0 +1,535 @@
+"""
+Learning Quest - Game Server
+
+Hosts many headless game sessions in one process with asyncio, so Learning
+Quest can run as a classroom service. Every session is a GameEngine with the
+usual scoring, level and question rules; all sessions share one question
+bank, so a session costs little more than its obstacles and collectibles.
+
+Clients talk to the server over TCP or a Unix socket with one JSON object per
+line. Every request may carry an "id" that is sent back in its response.
+
+    {"id": 1, "op": "new", "seed": 42}
+        -> {"id": 1, "ok": true, "session": "1f3a...", "rules": {...}, "state": {...}}
+    {"id": 2, "op": "step", "session": "1f3a...", "action": "left"}
+    {"id": 3, "op": "step", "session": "1f3a...", "action": ["answer", 2]}
+        -> {"id": 3, "ok": true, "events": [["correct", 20]], "state": {...}}
+    {"id": 4, "op": "state", "session": "1f3a..."}
+    {"id": 5, "op": "close", "session": "1f3a..."}
+    {"id": 6, "op": "stats"}
+    errors -> {"id": 7, "ok": false, "error": "..."}
+
+The state in a step response always has the score, level, time, position and
+whether the game is active; the obstacles and collectibles (as [id, x, y],
+where an id stays the same while the entity exists) are only included when
+they may have changed. Questions are sent without their answer. The
+client sends "tick" once a second like the local game does; ticks beyond one
+per second since the game started are ignored, so a client cannot make time
+pass quicker (but one that fell behind can catch up).
+Sessions belong to the connection that created them and are closed with it.
+Requests on one connection are answered in order, so clients may send several
+before reading the responses.
+
+Usage:
+    python learning_quest_server.py --port 8765
+    python learning_quest_server.py --unix /tmp/learning_quest.sock
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from learning_quest_engine import GameEngine, GameRules
+from learning_quest_questions import QuestionBank, load_question_bank
+
+DEFAULT_PORT = 8765
+
+# Longest request line accepted from a client
+MAX_LINE_BYTES = 64 * 1024
+
+# Most obstacles or collectibles a client may ask for in its rules
+MAX_ENTITIES = 500
+
+# Largest chunk_size a client may ask for, in pixels per side
+MAX_CHUNK_SIZE = 4000
+
+# Ticks a session may be ahead of the time since its game started
+TICK_SLACK = 1
+
+# Rules that must be at least 1 (0 would divide by zero or end no level)
+POSITIVE_RULES = ("points_per_level", "max_level", "step_size", "obstacle_spacing", "collectible_spacing")
+
+# Rules that are (left, top, right, bottom) areas inside a chunk
+AREA_RULES = ("bounds", "obstacle_area", "collectible_area")
+
+# Actions after which the obstacles and collectibles are sent again
+ENTITY_ACTIONS = ("start", "spawn")
+ENTITY_EVENTS = ("obstacle_hit", "collected", "level_up")
+
+
+class ProtocolError(Exception):
+    """A request the server cannot handle (sent back to the client as an error)"""
+
+
+def parse_address(address):
+    """Turn "host:port", ":port" or "unix:/path" into ("tcp", host, port) or ("unix", path)"""
+    if address.startswith("unix:"):
+        return ("unix", address[len("unix:"):])
+    host, _, port = address.rpartition(":")
+    return ("tcp", host or "127.0.0.1", int(port))
+
+
+def parse_action(action):
+    """
+    Turn a JSON action ("left" or ["answer", 2]) into the engine's form.
+
+    Clients only get plain "ask": the server draws the question, so a client
+    cannot pick one (or ask again one whose answer it has already seen).
+    """
+    if isinstance(action, list):
+        if len(action) != 2 or action[0] != "answer" or not is_integer(action[1]):
+            raise ProtocolError(f"Unknown action: {action!r}")
+        return (action[0], action[1])
+    if not isinstance(action, str):
+        raise ProtocolError(f"Unknown action: {action!r}")
+    return action
+
+
+def is_integer(value):
+    """Check if a JSON value is an integer (true and false are not)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def check_rules(overrides):
+    """The GameRules for a client's rule overrides, after checking their types and values"""
+    if not isinstance(overrides, dict):
+        raise ProtocolError("rules must be an object")
+    defaults = GameRules()
+    values = {}
+    for name, value in overrides.items():
+        if name not in vars(defaults):
+            raise ProtocolError(f"Unknown game rule: {name}")
+        default = getattr(defaults, name)
+        if isinstance(default, tuple):
+            if not (isinstance(value, list) and len(value) == len(default) and all(map(is_integer, value))):
+                raise ProtocolError(f"{name} must be a list of {len(default)} integers")
+            value = tuple(value)
+        elif not is_integer(value):
+            raise ProtocolError(f"{name} must be an integer")
+        values[name] = value
+
+    rules = GameRules(**values)
+    for name, value in vars(rules).items():
+        if (min(value) if isinstance(value, tuple) else value) < 0:
+            raise ProtocolError(f"{name} must not be negative")
+    for name in POSITIVE_RULES:
+        if getattr(rules, name) < 1:
+            raise ProtocolError(f"{name} must be at least 1")
+    if min(rules.world_chunks) < 1:
+        raise ProtocolError("world_chunks must be at least 1 by 1")
+    chunk_width, chunk_height = rules.chunk_size
+    if not (1 <= chunk_width <= MAX_CHUNK_SIZE and 1 <= chunk_height <= MAX_CHUNK_SIZE):
+        raise ProtocolError(f"chunk_size must be from 1 to {MAX_CHUNK_SIZE} pixels per side")
+    for name in AREA_RULES:
+        left, top, right, bottom = getattr(rules, name)
+        if not (left < right <= chunk_width and top < bottom <= chunk_height):
+            raise ProtocolError(f"{name} must be a non-empty area inside chunk_size")
+    left, top, right, bottom = rules.bounds
+    x, y = rules.start_position
+    if not (left <= x <= right and top <= y <= bottom):
+        raise ProtocolError("start_position must be inside bounds")
+    return rules
+
+
+def public_event(event):
+    """An engine event as JSON data (questions without their answer)"""
+    if event[0] == "question":
+        question = event[1]
+        return ["question", {"id": question.get("id"), "question": question["question"],
+                             "options": question["options"]}]
+    return list(event)
+
+
+class Session:
+    """One hosted game: its engine and how many ticks it had since its game started"""
+
+    __slots__ = ("session_id", "engine", "started", "ticks", "owner")
+
+    def __init__(self, session_id, engine, owner):
+        self.session_id = session_id
+        self.engine = engine
+        self.started = 0.0
+        self.ticks = 0
+        self.owner = owner
+
+    def state(self, entities):
+        """The game state as JSON data (with the entity positions if `entities`)"""
+        engine = self.engine
+        state = {
+            "score": engine.score,
+            "level": engine.level,
+            "time_remaining": engine.time_remaining,
+            "game_active": engine.game_active,
+            "position": engine.character_position,
+        }
+        if entities:
+            state["obstacles"] = engine.obstacles.records()
+            state["collectibles"] = engine.collectibles.records()
+        return state
+
+
+class GameServer:
+    """
+    Keeps the sessions and answers requests.
+
+    handle_request() does the work for one request and needs no sockets, so
+    the protocol can also be driven directly (for tests and the load generator).
+
+    Every session lays out its next level on one shared worker thread while
+    the current level is played, so a level up usually only swaps it in. The
+    event loop never waits for that thread: a level that is not ready yet
+    (the thread is busy with other sessions) is laid out right away instead.
+    """
+
+    def __init__(self, questions=None, max_sessions=20000, tick_interval=1.0, clock=time.monotonic):
+        """Create a server whose sessions all share one question bank"""
+        self.questions = questions if questions is not None else QuestionBank()
+        self.level_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="levels")
+        self.max_sessions = max_sessions
+        # A session gets at most one tick per tick_interval since its game started (plus
+        # TICK_SLACK for network jitter); ticks beyond that are ignored
+        self.tick_interval = tick_interval
+        self.clock = clock
+        self.sessions = {}
+        self.requests = 0
+        self.connections = 0
+        self.started = clock()
+
+    def handle_line(self, line, owner=None):
+        """Answer one request line and return the response line (both JSON bytes)"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = {"id": None, "ok": False, "error": "Invalid JSON"}
+        else:
+            response = self.handle_request(request, owner)
+        return json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def handle_request(self, request, owner=None):
+        """
+        Answer one request (a dict) and return the response dict.
+
+        owner is the set of session ids of the connection the request came on.
+        """
+        self.requests += 1
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        try:
+            if not isinstance(request, dict):
+                raise ProtocolError("A request must be a JSON object")
+            response.update(self.dispatch(request, owner))
+            response["ok"] = True
+        except ProtocolError as e:
+            response["ok"] = False
+            response["error"] = str(e)
+        except ValueError as e:  # Actions rejected by the engine
+            response["ok"] = False
+            response["error"] = str(e)
+        except Exception as e:
+            # A bug must not take the connection (and the other requests of its chunk) with it
+            traceback.print_exc()
+            response["ok"] = False
+            response["error"] = f"Could not handle the request ({type(e).__name__})"
+        return response
+
+    def dispatch(self, request, owner):
+        """Run the operation of a request and return the fields of its response"""
+        op = request.get("op")
+        if op == "step":
+            return self.step(self.session(request, owner), request.get("action"))
+        if op == "new":
+            return self.new_session(request, owner)
+        if op == "state":
+            return {"state": self.session(request, owner).state(entities=True)}
+        if op == "close":
+            self.close_session(self.session(request, owner))
+            return {}
+        if op == "stats":
+            return {"stats": self.stats()}
+        raise ProtocolError(f"Unknown op: {op!r}")
+
+    def session(self, request, owner):
+        """The session a request is for (only the connection that created it may use it)"""
+        session = self.sessions.get(request.get("session"))
+        if session is None or session.owner is not owner:
+            raise ProtocolError("Unknown session")
+        return session
+
+    def new_session(self, request, owner):
+        """Create a session and start its game"""
+        if len(self.sessions) >= self.max_sessions:
+            raise ProtocolError("The server is full")
+        rules = check_rules(request.get("rules") or {})
+        most_obstacles = rules.base_obstacles + rules.max_level * rules.obstacles_per_level
+        columns, rows = rules.world_chunks
+        if max(rules.num_collectibles, most_obstacles) * columns * rows > MAX_ENTITIES:
+            raise ProtocolError(f"At most {MAX_ENTITIES} obstacles and collectibles per session")
+        seed = request.get("seed")
+        if seed is not None and not isinstance(seed, int):
+            raise ProtocolError("seed must be an integer")
+
+        session_id = secrets.token_hex(8)
+        engine = GameEngine(rules=rules, questions=self.questions, seed=seed)
+        engine.level_executor = self.level_executor
+        engine.start()
+        session = Session(session_id, engine, owner)
+        session.started = self.clock()
+        self.sessions[session_id] = session
+        if owner is not None:
+            owner.add(session_id)
+        return {"session": session_id, "rules": vars(rules), "state": session.state(entities=True)}
+
+    def step(self, session, action):
+        """Apply one action to a session's engine"""
+        action = parse_action(action)
+        if action == "tick":
+            # Counted against the time since the start, not the previous tick, so a client that
+            # catches up on several seconds at once (after waking up late) gets all of them
+            if session.ticks >= (self.clock() - session.started) / self.tick_interval + TICK_SLACK:
+                return {"events": [], "state": session.state(entities=False)}
+            session.ticks += 1
+        elif action == "start":
+            session.started = self.clock()
+            session.ticks = 0
+
+        chunks = len(session.engine.chunks)
+        events = session.engine.step(action)
+        entities = (action in ENTITY_ACTIONS or any(event[0] in ENTITY_EVENTS for event in events)
+                    or len(session.engine.chunks) != chunks)  # Moved near new chunks of a large world
+        return {"events": [public_event(event) for event in events],
+                "state": session.state(entities)}
+
+    def close_session(self, session):
+        """Forget a session"""
+        self.sessions.pop(session.session_id, None)
+        session.engine.drop_prepared_level()
+        if session.owner is not None:
+            session.owner.discard(session.session_id)
+
+    def close_owned(self, owner):
+        """Close every session of a connection that went away"""
+        for session_id in list(owner):
+            self.close_session(self.sessions[session_id])
+
+    def stats(self):
+        """Numbers about the server for monitoring and the load generator"""
+        stats = {
+            "sessions": len(self.sessions),
+            "connections": self.connections,
+            "requests": self.requests,
+            "uptime_s": self.clock() - self.started,
+        }
+        try:
+            import resource
+            # ru_maxrss is in KiB on Linux (bytes on macOS)
+            stats["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except ImportError:  # Windows
+            pass
+        return stats
+
+    async def start(self, address):
+        """Start listening on a parsed address and return the asyncio server"""
+        loop = asyncio.get_running_loop()
+        if address[0] == "unix":
+            if os.path.exists(address[1]):
+                os.remove(address[1])  # A socket left behind by an earlier server
+            return await loop.create_unix_server(lambda: GameProtocol(self), address[1])
+        return await loop.create_server(lambda: GameProtocol(self), address[1], address[2])
+
+
+class GameProtocol(asyncio.Protocol):
+    """
+    One client connection.
+
+    All the complete request lines of a chunk of data are answered together
+    and their responses sent with a single write, so a busy client costs one
+    system call per chunk instead of one per request.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.buffer = b""
+        self.owner = set()  # ids of the sessions created on this connection
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections += 1
+
+    def data_received(self, data):
+        self.buffer += data
+        if b"\n" not in data:
+            if len(self.buffer) > MAX_LINE_BYTES:
+                self.transport.close()  # A request line that never ends
+            return
+
+        *lines, self.buffer = self.buffer.split(b"\n")
+        handle_line = self.server.handle_line
+        responses = [handle_line(line, self.owner) for line in lines if line.strip()]
+        if responses:
+            self.transport.write(b"".join(responses))
+
+    def pause_writing(self):
+        # The client is not reading its responses: stop reading its requests until it does
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def connection_lost(self, exc):
+        self.server.connections -= 1
+        self.server.close_owned(self.owner)
+
+
+async def serve(address, questions=None, max_sessions=20000):
+    """Run a game server until it is cancelled"""
+    game_server = GameServer(questions, max_sessions=max_sessions)
+    server = await game_server.start(address)
+    names = ", ".join(str(socket.getsockname()) for socket in server.sockets)
+    print(f"Learning Quest server listening on {names}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+class RemoteEngine:
+    """
+    A GameEngine stand-in that plays a session on a game server.
+
+    It has the attributes and methods the tkinter view uses (step(), start(),
+    target_score(), score, level, obstacles, ...), so the view can draw a
+    hosted game exactly like a local one. Requests are sent one at a time
+    over a blocking socket.
+    """
+
+    def __init__(self, address, seed=None, rules=None, timeout=5.0):
+        """Connect to a server and create a session on it"""
+        import socket
+
+        address = parse_address(address) if isinstance(address, str) else address
+        if address[0] == "unix":
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            self.socket.connect(address[1])
+        else:
+            self.socket = socket.create_connection((address[1], address[2]), timeout=timeout)
+        self.file = self.socket.makefile("rwb")
+        self.next_id = 0
+
+        # The view reads these like the attributes of a GameEngine
+        self.questions = None
+        self.scheduler = None
+        self.profiler = None
+        self.score = 0
+        self.level = 1
+        self.time_remaining = 0
+        self.game_active = False
+        self.character_position = [0, 0]
+        self.obstacles = []
+        self.collectibles = []
+        self.current_slot = None
+
+        response = self.request({"op": "new", "seed": seed, "rules": rules or {}})
+        self.session = response["session"]
+        self.rules = GameRules(**{name: tuple(value) if isinstance(value, list) else value
+                                  for name, value in response["rules"].items()})
+        self.update(response["state"])
+        # The game is created running; it starts for real with start()
+        self.game_active = False
+
+    def request(self, request):
+        """Send one request and wait for its response"""
+        self.next_id += 1
+        request["id"] = self.next_id
+        self.file.write(json.dumps(request, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The game server closed the connection")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise ValueError(response.get("error", "Request failed"))
+        return response
+
+    def update(self, state):
+        """Copy a state from the server (the entity lists are replaced when the state has them)"""
+        self.score = state["score"]
+        self.level = state["level"]
+        self.time_remaining = state["time_remaining"]
+        self.game_active = state["game_active"]
+        self.character_position = state["position"]
+        if "obstacles" in state:
+            self.obstacles = [tuple(entity) for entity in state["obstacles"]]
+            self.collectibles = [tuple(entity) for entity in state["collectibles"]]
+
+    def start(self):
+        """Start or restart the game"""
+        return self.step("start")
+
+    def step(self, action):
+        """Apply an action on the server and return its events like GameEngine.step"""
+        if isinstance(action, tuple):
+            action = list(action)
+        response = self.request({"op": "step", "session": self.session, "action": action})
+        self.update(response["state"])
+        events = [tuple(event) for event in response["events"]]
+        for event in events:
+            if event[0] == "question":
+                self.current_slot = (self.level, None)
+        return events
+
+    def target_score(self):
+        """Score needed to finish the current level"""
+        return self.rules.target_score(self.level)
+
+    def obstacles_in(self, left, top, right, bottom):
+        """(id, x, y) of the obstacles that can overlap an area (like GameEngine.obstacles_in)"""
+        return [obstacle for obstacle in self.obstacles
+                if left - 40 <= obstacle[1] <= right and top - 40 <= obstacle[2] <= bottom]
+
+    def collectibles_in(self, left, top, right, bottom):
+        """(id, x, y) of the collectibles that can overlap an area (like GameEngine.collectibles_in)"""
+        return [collectible for collectible in self.collectibles
+                if left - 30 <= collectible[1] <= right and top - 30 <= collectible[2] <= bottom]
+
+    def close(self):
+        """Close the session and the connection"""
+        try:
+            self.request({"op": "close", "session": self.session})
+        except (OSError, ValueError):
+            pass
+        self.file.close()
+        self.socket.close()
+
+
+def main():
+    """Run the game server from the command line"""
+    parser = argparse.ArgumentParser(description="Host Learning Quest game sessions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=20000)
+    args = parser.parse_args()
+
+    address = ("unix", args.unix) if args.unix else ("tcp", args.host, args.port)
+    try:
+        asyncio.run(serve(address, load_question_bank(), args.max_sessions))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
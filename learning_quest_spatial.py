@@ -0,0 +1,90 @@
+"""
+Learning Quest - Spatial Index
+
+A uniform grid (spatial hash) for the obstacles and collectibles on the
+playfield. Entities are stored in the cell that contains their position, so a
+collision or placement check only has to look at the few cells around a point
+instead of scanning every entity in the level.
+"""
+
+
+class SpatialHash:
+    """
+    A spatial hash that maps grid cells to the entities whose position
+    (top-left corner) falls inside them.
+
+    Every entity is stored under a key (anything hashable) together with the
+    value that queries should return for it.
+    """
+
+    def __init__(self, cell_size=64):
+        """Create an empty index with square cells of the given size"""
+        self.cell_size = cell_size
+        # (column, row) -> {key: value}
+        self.cells = {}
+        # key -> (column, row) the entity is stored in
+        self.where = {}
+
+    def __len__(self):
+        """Number of entities in the index"""
+        return len(self.where)
+
+    def __contains__(self, key):
+        """Check if an entity is in the index"""
+        return key in self.where
+
+    def cell_of(self, x, y):
+        """Return the grid cell that contains the point (x, y)"""
+        return (int(x) // self.cell_size, int(y) // self.cell_size)
+
+    def clear(self):
+        """Remove every entity from the index"""
+        self.cells = {}
+        self.where = {}
+
+    def insert(self, key, x, y, value):
+        """Add an entity at (x, y)"""
+        if key in self.where:
+            self.remove(key)
+
+        cell = self.cell_of(x, y)
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            bucket = self.cells[cell] = {}
+        bucket[key] = value
+        self.where[key] = cell
+
+    def remove(self, key):
+        """Remove an entity (does nothing if it is not in the index)"""
+        cell = self.where.pop(key, None)
+        if cell is None:
+            return
+
+        bucket = self.cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self.cells[cell]
+
+    def move(self, key, x, y):
+        """Update the position of an entity that is already in the index"""
+        cell = self.cell_of(x, y)
+        old_cell = self.where.get(key)
+        if old_cell == cell:
+            return
+
+        value = self.cells[old_cell][key]
+        self.remove(key)
+        self.insert(key, x, y, value)
+
+    def query(self, left, top, right, bottom):
+        """Return the values of all entities in the cells overlapping a box"""
+        first_column, first_row = self.cell_of(left, top)
+        last_column, last_row = self.cell_of(right, bottom)
+
+        found = []
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                bucket = self.cells.get((column, row))
+                if bucket:
+                    found.extend(bucket.values())
+        return found
@@ -0,0 +1,210 @@
+"""
+Learning Quest - Sprites
+
+Pre-rendered images for the obstacles, collectibles and the character.
+They used to be a shape plus an emoji text item each, and Tk has to shape
+and rasterize a color emoji font every time it repaints a text item. Now
+every look is drawn pixel by pixel once into a PhotoImage and each entity is
+a single image item, which Tk only has to copy to the screen.
+
+Every level has its own theme (colors that go with its background). The
+images of the most recently used themes are kept; older ones are dropped.
+
+Canvas items never show a themed image directly: they all use one "live"
+image per kind of sprite, and changing the theme copies the themed images
+into the live ones. Tk then redraws every item with the new look without a
+single itemconfig.
+"""
+
+from collections import OrderedDict
+
+# Colors of the sprites per theme (one theme per level)
+SPRITE_THEMES = {
+    1: {
+        "obstacle": ("#e74c3c", "#c0392b"),
+        "collectible": ("#f1c40f", "#f39c12"),
+        "character": ("#3498db", "#2980b9"),
+    },
+    2: {
+        "obstacle": ("#cb4335", "#943126"),
+        "collectible": ("#f1c40f", "#d68910"),
+        "character": ("#2e86c1", "#1f618d"),
+    },
+    3: {
+        "obstacle": ("#a93226", "#78281f"),
+        "collectible": ("#f4d03f", "#f39c12"),
+        "character": ("#2471a3", "#1a5276"),
+    },
+}
+
+# Colors of the decorations, the same in every theme
+WARNING_COLOR = "#f9e79f"
+SPARKLE_COLOR = "#ffffff"
+INK_COLOR = "#2c3e50"
+
+# Width and height of each kind of sprite (the character image is centered on its position)
+SPRITE_SIZES = {
+    "obstacle": 40,
+    "collectible": 30,
+    "character": 44,
+}
+
+# Themes whose images are kept
+MAX_THEMES = 3
+
+
+def theme_for_level(level):
+    """The sprite theme of a level (levels without their own use the first)"""
+    return level if level in SPRITE_THEMES else 1
+
+
+def in_circle(x, y, center, radius):
+    """Check if the middle of pixel (x, y) is inside a circle"""
+    dx = x + 0.5 - center
+    dy = y + 0.5 - center
+    return dx * dx + dy * dy <= radius * radius
+
+
+def render_obstacle(fill, outline):
+    """Pixels of an obstacle: a square with a border and a warning sign"""
+    size = SPRITE_SIZES["obstacle"]
+    rows = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            color = fill
+            if x < 2 or y < 2 or x >= size - 2 or y >= size - 2:
+                color = outline
+            elif 8 <= y <= 31 and abs(x + 0.5 - 20) <= (y - 8) * 12 / 23:
+                # Warning triangle with an exclamation mark
+                color = WARNING_COLOR
+                if 19 <= x <= 20 and (14 <= y <= 24 or 27 <= y <= 28):
+                    color = INK_COLOR
+            row.append(color)
+        rows.append(row)
+    return rows
+
+
+def render_collectible(fill, outline):
+    """Pixels of a collectible: a coin with a border and a sparkle (None is transparent)"""
+    size = SPRITE_SIZES["collectible"]
+    center = size / 2
+    rows = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            color = None
+            if in_circle(x, y, center, center):
+                color = fill if in_circle(x, y, center, center - 2) else outline
+                dx = abs(x + 0.5 - center)
+                dy = abs(y + 0.5 - center)
+                if (dx <= 1 and dy <= 7) or (dy <= 1 and dx <= 7) or dx + dy <= 3:
+                    color = SPARKLE_COLOR
+            row.append(color)
+        rows.append(row)
+    return rows
+
+
+def render_character(fill, outline):
+    """Pixels of the character: a round body with a border and a smiling face"""
+    size = SPRITE_SIZES["character"]
+    center = size / 2
+    rows = []
+    for y in range(size):
+        row = []
+        for x in range(size):
+            color = None
+            if in_circle(x, y, center, center - 0.5):
+                color = fill if in_circle(x, y, center, center - 3.5) else outline
+                dx = x + 0.5 - center
+                dy = y + 0.5 - center
+                eye = min((dx + 7) ** 2, (dx - 7) ** 2) + (dy + 5) ** 2 <= 6.25
+                smile = dy >= 4 and 64 <= dx * dx + dy * dy <= 110
+                if eye or smile:
+                    color = INK_COLOR
+            row.append(color)
+        rows.append(row)
+    return rows
+
+
+RENDERERS = {
+    "obstacle": render_obstacle,
+    "collectible": render_collectible,
+    "character": render_character,
+}
+
+
+def render_sprite(kind, theme):
+    """Rows of pixel colors (None for transparent) of one kind of sprite in a theme"""
+    fill, outline = SPRITE_THEMES[theme_for_level(theme)][kind]
+    return RENDERERS[kind](fill, outline)
+
+
+class SpriteCache:
+    """
+    The sprite images of the current theme and the recently used ones.
+
+    image(kind) is the image to give new canvas items; use_theme() changes
+    what all of them show.
+    """
+
+    def __init__(self, master=None, max_themes=MAX_THEMES):
+        """Create an empty cache (images are made for `master` when first needed)"""
+        self.master = master
+        self.max_themes = max_themes
+        self.themes = OrderedDict()  # theme -> {kind: image}, least recently used first
+        self.live = {}
+        self.theme = None
+
+    def image(self, kind):
+        """The live image that canvas items of a kind should show"""
+        if self.theme is None:
+            self.use_theme(1)
+        return self.live[kind]
+
+    def use_theme(self, theme):
+        """Show a theme's sprites on every item that uses the live images"""
+        if theme == self.theme:
+            return
+        images = self.themed(theme)
+        for kind, source in images.items():
+            if kind not in self.live:
+                size = SPRITE_SIZES[kind]
+                self.live[kind] = self.create_image(size, size)
+            self.copy_image(self.live[kind], source)
+        self.theme = theme
+
+    def themed(self, theme):
+        """The images of a theme, rendered the first time it is used"""
+        images = self.themes.get(theme)
+        if images is not None:
+            self.themes.move_to_end(theme)
+            return images
+
+        images = {}
+        for kind in RENDERERS:
+            pixels = render_sprite(kind, theme)
+            images[kind] = self.create_image(len(pixels[0]), len(pixels), pixels)
+        self.themes[theme] = images
+        while len(self.themes) > self.max_themes:
+            self.themes.popitem(last=False)
+        return images
+
+    def create_image(self, width, height, pixels=None):
+        """A new PhotoImage, filled with rows of pixel colors if given"""
+        import tkinter as tk
+
+        image = tk.PhotoImage(master=self.master, width=width, height=height)
+        if pixels is not None:
+            # All pixels in one call, then make the ones without a color transparent
+            image.put(" ".join("{" + " ".join(color or "#000000" for color in row) + "}"
+                               for row in pixels))
+            for y, row in enumerate(pixels):
+                for x, color in enumerate(row):
+                    if color is None:
+                        image.tk.call(image.name, "transparency", "set", x, y, True)
+        return image
+
+    def copy_image(self, target, source):
+        """Replace the pixels of one image (including transparency) with another's"""
+        target.tk.call(target.name, "copy", source.name, "-compositingrule", "set")
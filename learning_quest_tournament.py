@@ -0,0 +1,258 @@
+"""
+Learning Quest - Bot Tournament
+
+Plays many complete games with the real GameEngine, spread over all CPU
+cores with a ProcessPoolExecutor, to check how changes to the level
+thresholds, penalties and timer play out before anyone play-tests them.
+
+Every game is played by a scripted bot: each second of game time it takes a
+few steps towards the nearest collectible, stepping around obstacles, and
+now and then answers a question (correctly with the given accuracy). Games
+are seeded, so the same arguments always give the same results.
+
+The results are combined into the win rate, the final score distribution and
+how long (in game seconds) each level took to complete.
+
+Unlike learning_quest_batch.py, which approximates the rules with NumPy to
+simulate huge numbers of sessions, this runs GameEngine itself, so it checks
+the actual rules in advance_level and the rest of the engine.
+
+Usage:
+    python learning_quest_tournament.py --games 20000 --accuracy 0.6 --points-per-level 60
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from learning_quest_engine import MOVES, GameEngine, GameRules
+from learning_quest_questions import load_question_bank
+
+# The question bank of a worker process (loaded once by init_worker)
+_questions = None
+
+
+class Bot:
+    """
+    A scripted player.
+
+    moves_per_second steps are taken every second of game time; question_rate
+    is the chance per second of answering a question instead, and accuracy
+    the chance that an answer is right.
+    """
+
+    def __init__(self, rng, accuracy=0.7, question_rate=0.25, moves_per_second=4):
+        """Create a bot that makes its choices with rng"""
+        self.rng = rng
+        self.accuracy = accuracy
+        self.question_rate = question_rate
+        self.moves_per_second = moves_per_second
+
+    def hits_obstacle(self, engine, x, y):
+        """Check if the character would touch an obstacle at (x, y) (the engine's collision box)"""
+        for _, obstacle_x, obstacle_y in engine.obstacles.query(x - 55, y - 55, x + 15, y + 15):
+            if abs(x - (obstacle_x + 20)) < 35 and abs(y - (obstacle_y + 20)) < 35:
+                return True
+        return False
+
+    def choose_move(self, engine):
+        """The step towards the nearest collectible that does not run into an obstacle"""
+        x, y = engine.character_position
+        step = engine.rules.step_size
+        left, top, right, bottom = engine.rules.bounds
+
+        target = None
+        if engine.collectibles:
+            target = min(engine.collectibles,
+                         key=lambda c: abs(c[1] + 15 - x) + abs(c[2] + 15 - y))
+
+        # Rank the moves by how close they get to the target (random order without one)
+        options = []
+        for action, (dx, dy) in MOVES.items():
+            new_x = min(right, max(left, x + dx * step))
+            new_y = min(bottom, max(top, y + dy * step))
+            if target is not None:
+                distance = abs(target[1] + 15 - new_x) + abs(target[2] + 15 - new_y)
+            else:
+                distance = self.rng.random()
+            options.append((self.hits_obstacle(engine, new_x, new_y), distance, action))
+        options.sort()
+        return options[0][2]
+
+    def answer(self, engine):
+        """The option the bot picks for the current question"""
+        question = engine.current_question
+        if self.rng.random() < self.accuracy:
+            return question["answer"]
+        wrong = [i for i in range(len(question["options"])) if i != question["answer"]]
+        return self.rng.choice(wrong)
+
+    def play_second(self, engine):
+        """Play one second of game time and return the events"""
+        if self.rng.random() < self.question_rate:
+            events = engine.step("ask")
+            if events:
+                events += engine.step(("answer", self.answer(engine)))
+        else:
+            events = []
+            for _ in range(self.moves_per_second):
+                events += engine.step(self.choose_move(engine))
+                if not engine.game_active:
+                    return events
+        if engine.game_active:
+            events += engine.step("tick")
+        return events
+
+
+def play_game(rules, seed, accuracy, question_rate, moves_per_second, questions=None):
+    """
+    Play one game to the end and return (score, final level, won, level seconds, obstacle hits).
+
+    level seconds holds the game seconds each completed level took.
+    """
+    engine = GameEngine(rules=rules, questions=questions, seed=seed)
+    bot = Bot(random.Random(seed), accuracy, question_rate, moves_per_second)
+    engine.start()
+
+    seconds = 0
+    level_started = 0
+    level_seconds = []
+    hits = 0
+    won = False
+    while engine.game_active:
+        events = bot.play_second(engine)
+        seconds += 1
+        for event in events:
+            if event[0] == "obstacle_hit":
+                hits += 1
+            elif event[0] in ("level_up", "victory"):
+                level_seconds.append(seconds - level_started)
+                level_started = seconds
+                won = event[0] == "victory"
+    return engine.score, engine.level, won, level_seconds, hits
+
+
+def init_worker(packs_dir):
+    """Load the question bank once per worker process"""
+    global _questions
+    _questions = load_question_bank(packs_dir)
+
+
+def play_chunk(rule_overrides, seeds, accuracy, question_rate, moves_per_second):
+    """Play the games of a chunk of seeds (runs in a worker process)"""
+    rules = GameRules(**rule_overrides)
+    return [play_game(rules, seed, accuracy, question_rate, moves_per_second, _questions)
+            for seed in seeds]
+
+
+def run_tournament(games, rule_overrides=None, seed=0, accuracy=0.7, question_rate=0.25,
+                   moves_per_second=4, workers=None, chunk_size=250, packs_dir="question_packs"):
+    """Play `games` games over a process pool and return the list of results"""
+    rule_overrides = rule_overrides or {}
+    GameRules(**rule_overrides)  # Check the rule names before starting any workers
+    # Compile the question packs once here, so the workers only read the cache
+    load_question_bank(packs_dir)
+
+    seeds = [seed * 1000003 + i for i in range(games)]
+    chunks = [seeds[i:i + chunk_size] for i in range(0, games, chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(packs_dir,)) as executor:
+        futures = [executor.submit(play_chunk, rule_overrides, chunk, accuracy, question_rate,
+                                   moves_per_second)
+                   for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def percentiles(values, points=(10, 50, 90)):
+    """Some percentiles of a list of numbers"""
+    values = sorted(values)
+    return {p: values[min(len(values) - 1, len(values) * p // 100)] for p in points}
+
+
+def summarize(results, max_level):
+    """Combine game results into win rate, score percentiles and level completion times"""
+    scores = [result[0] for result in results]
+    summary = {
+        "games": len(results),
+        "win_rate": sum(1 for result in results if result[2]) / len(results),
+        "mean_score": statistics.mean(scores),
+        "score_percentiles": percentiles(scores),
+        "final_levels": {level: sum(1 for result in results if result[1] == level)
+                         for level in range(1, max_level + 1)},
+        "mean_obstacle_hits": statistics.mean(result[4] for result in results),
+        "level_seconds": {},
+    }
+    for level in range(1, max_level + 1):
+        times = [result[3][level - 1] for result in results if len(result[3]) >= level]
+        if times:
+            summary["level_seconds"][level] = {
+                "completed": len(times),
+                "median": statistics.median(times),
+                "p90": percentiles(times, (90,))[90],
+            }
+    return summary
+
+
+def histogram(values, bins=10, width=40):
+    """A small text histogram"""
+    low, high = min(values), max(values)
+    size = max(1, -(-(high - low + 1) // bins))
+    counts = [0] * bins
+    for value in values:
+        counts[min(bins - 1, (value - low) // size)] += 1
+    peak = max(max(counts), 1)
+    return "\n".join(f"{low + i * size:5d}-{low + (i + 1) * size - 1:<5d} {count:8d} "
+                     + "#" * int(width * count / peak)
+                     for i, count in enumerate(counts))
+
+
+def main():
+    """Run a bot tournament from the command line and print the results"""
+    parser = argparse.ArgumentParser(description="Play many Learning Quest games with bots on all cores")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--accuracy", type=float, default=0.7, help="chance of answering correctly")
+    parser.add_argument("--question-rate", type=float, default=0.25, help="chance per second of answering a question")
+    parser.add_argument("--moves-per-second", type=int, default=4)
+    parser.add_argument("--points-per-level", type=int, default=50)
+    parser.add_argument("--obstacle-penalty", type=int, default=5)
+    parser.add_argument("--wrong-penalty", type=int, default=10)
+    parser.add_argument("--start-time", type=int, default=60)
+    parser.add_argument("--level-bonus-time", type=int, default=30)
+    args = parser.parse_args()
+
+    rule_overrides = {
+        "points_per_level": args.points_per_level,
+        "obstacle_penalty": args.obstacle_penalty,
+        "wrong_penalty": args.wrong_penalty,
+        "start_time": args.start_time,
+        "level_bonus_time": args.level_bonus_time,
+    }
+
+    start = time.perf_counter()
+    results = run_tournament(args.games, rule_overrides, args.seed, args.accuracy, args.question_rate,
+                             args.moves_per_second, args.workers)
+    elapsed = time.perf_counter() - start
+    summary = summarize(results, GameRules(**rule_overrides).max_level)
+
+    print(f"Played {summary['games']} games in {elapsed:.1f}s on {args.workers or os.cpu_count()} workers")
+    print(f"Win rate: {summary['win_rate']:.1%}")
+    print(f"Mean score: {summary['mean_score']:.1f}, obstacle hits per game: {summary['mean_obstacle_hits']:.1f}")
+    print("Score percentiles: " + ", ".join(f"p{p}={v}" for p, v in summary["score_percentiles"].items()))
+    print("Final level: " + ", ".join(f"L{l}={c}" for l, c in summary["final_levels"].items()))
+    for level, stats in summary["level_seconds"].items():
+        print(f"Level {level} completed in {stats['completed']} games, "
+              f"median {stats['median']}s, p90 {stats['p90']}s spent on the level")
+    print()
+    print(histogram([result[0] for result in results]))
+
+
+if __name__ == "__main__":
+    main()